@@ -0,0 +1,44 @@
+from typing import Dict, Optional
+import logging
+import os
+
+import pyarrow.compute as pc
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.analytics.snapshot_exporter import SnapshotExporter
+from app.analytics.job_service import AnalyticsJobService
+from app.analytics.writeback import ScheduledWriteback, iter_output_batches
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CalibrationPipeline(ScheduledWriteback):
+
+    name = "calibration"
+    job_type = "calibrate_difficulty"
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        job_service: AnalyticsJobService,
+        exporter: Optional[SnapshotExporter] = None
+    ):
+        super().__init__(neo4j_client, job_service, settings.CALIBRATION_INTERVAL, exporter)
+
+    async def apply(self, output_path: str) -> Dict[str, int]:
+        run_id = os.path.basename(output_path)
+        updated = 0
+        for rows in iter_output_batches(
+            output_path,
+            "calibration",
+            ["concept_id", "calibrated_difficulty", "student_count"],
+            (pc.field("student_count") >= settings.CALIBRATION_MIN_SAMPLES)
+            & pc.field("calibrated_difficulty").is_valid()
+        ):
+            result = await self._client.execute_query(
+                queries.APPLY_CALIBRATED_DIFFICULTY, {"rows": rows, "run_id": run_id}
+            )
+            updated += result[0]["updated"] if result else 0
+        return {"concepts_updated": updated}
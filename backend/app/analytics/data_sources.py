@@ -0,0 +1,117 @@
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql.types import (
+    StructType, StructField, StringType,
+    IntegerType, FloatType, ArrayType, BooleanType, DateType
+)
+from typing import List, Dict, Any, Optional, Union
+import json
+import logging
+import os
+
+from app.analytics.snapshot_exporter import MANIFEST_FILE, resolve_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+CONCEPTS_SCHEMA = StructType([
+    StructField("id", StringType(), False),
+    StructField("name", StringType(), False),
+    StructField("description", StringType(), True),
+    StructField("domain", StringType(), True),
+    StructField("grade_level", IntegerType(), True),
+    StructField("difficulty", FloatType(), True),
+    StructField("keywords", ArrayType(StringType()), True),
+    StructField("curriculum_code", StringType(), True),
+    StructField("estimated_time_minutes", IntegerType(), True)
+])
+
+RELATIONSHIPS_SCHEMA = StructType([
+    StructField("source_id", StringType(), False),
+    StructField("target_id", StringType(), False),
+    StructField("relationship_type", StringType(), False),
+    StructField("strength", FloatType(), True)
+])
+
+PERFORMANCE_SCHEMA = StructType([
+    StructField("student_id", StringType(), False),
+    StructField("concept_id", StringType(), False),
+    StructField("mastery_level", FloatType(), False),
+    StructField("time_spent_minutes", IntegerType(), True),
+    StructField("attempts", IntegerType(), True),
+    StructField("assessment_score", FloatType(), True)
+])
+
+SESSIONS_SCHEMA = StructType([
+    StructField("session_id", StringType(), False),
+    StructField("student_id", StringType(), False),
+    StructField("concept_id", StringType(), False),
+    StructField("session_order", IntegerType(), False),
+    StructField("mastery_before", FloatType(), True),
+    StructField("mastery_after", FloatType(), True),
+    StructField("duration_minutes", IntegerType(), True),
+    StructField("success", BooleanType(), True)
+])
+
+DATASET_SCHEMAS = {
+    "concepts": CONCEPTS_SCHEMA,
+    "relationships": RELATIONSHIPS_SCHEMA,
+    "performance": PERFORMANCE_SCHEMA,
+    "sessions": SESSIONS_SCHEMA,
+}
+
+# Partition columns are written as Hive-style directories next to the data
+# columns above, so they are appended to the schema when reading.
+DATASET_PARTITIONS = {
+    "concepts": [StructField("domain_partition", StringType(), True)],
+    "relationships": [],
+    "performance": [StructField("student_bucket", IntegerType(), True)],
+    "sessions": [StructField("session_date", DateType(), True)],
+}
+
+def as_dataframe(
+    spark: SparkSession,
+    data: Union[List[Dict[str, Any]], DataFrame],
+    schema: Optional[StructType] = None
+) -> DataFrame:
+    if isinstance(data, DataFrame):
+        return data
+    if schema is None:
+        return spark.createDataFrame(data)
+    return spark.createDataFrame(data, schema=schema)
+
+
+class ParquetSnapshotSource:
+
+    def __init__(self, spark: SparkSession, base_path: Optional[str] = None, snapshot_id: Optional[str] = None):
+        self._spark = spark
+        self._path = resolve_snapshot(base_path, snapshot_id)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def manifest(self) -> Dict[str, Any]:
+        with open(os.path.join(self._path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read(self, dataset: str) -> DataFrame:
+        schema = StructType(DATASET_SCHEMAS[dataset].fields + DATASET_PARTITIONS[dataset])
+        logger.info(f"Reading {dataset} snapshot from {self._path}")
+        return (
+            self._spark.read
+            .schema(schema)
+            .option("basePath", os.path.join(self._path, dataset))
+            .parquet(os.path.join(self._path, dataset))
+        )
+
+    def concepts(self) -> DataFrame:
+        return self._read("concepts")
+
+    def relationships(self) -> DataFrame:
+        return self._read("relationships")
+
+    def performance(self) -> DataFrame:
+        return self._read("performance")
+
+    def sessions(self) -> DataFrame:
+        return self._read("sessions")
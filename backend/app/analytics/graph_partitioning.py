@@ -0,0 +1,324 @@
+from typing import Dict, Any, List, Optional, Sequence
+from dataclasses import dataclass
+import logging
+import math
+
+import numpy as np
+import pyarrow.dataset as ds
+from scipy.sparse import coo_matrix, csr_matrix
+
+from app.analytics.outputs import read_manifest
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Multipliers on edge strength by relationship type. Traversals walk
+# REQUIRES chains, so those dominate the cut; BUILDS_ON (used by path
+# queries) counts a little, and any other type is ignored.
+RELATIONSHIP_WEIGHTS = {"REQUIRES": 1.0, "BUILDS_ON": 0.25}
+
+
+@dataclass
+class PartitionResult:
+    node_ids: List[str]
+    assignment: np.ndarray
+    num_partitions: int
+    edge_cut: float
+    total_weight: float
+    iterations: int
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.bincount(self.assignment, minlength=self.num_partitions)
+
+    @property
+    def cut_ratio(self) -> float:
+        return self.edge_cut / self.total_weight if self.total_weight else 0.0
+
+    @property
+    def imbalance(self) -> float:
+        if not self.node_ids:
+            return 0.0
+        return float(self.sizes.max() / (len(self.node_ids) / self.num_partitions) - 1)
+
+    def partition_map(self) -> Dict[str, int]:
+        return dict(zip(self.node_ids, self.assignment.tolist()))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "num_partitions": self.num_partitions,
+            "partition_sizes": {i: int(size) for i, size in enumerate(self.sizes)},
+            "edge_cut": round(self.edge_cut, 3),
+            "cut_ratio": round(self.cut_ratio, 4),
+            "imbalance": round(self.imbalance, 4),
+            "refinement_iterations": self.iterations
+        }
+
+
+class GraphPartitioner:
+    """Balanced k-way partitioning that keeps prerequisite chains together.
+
+    Size-constrained label propagation first finds tightly linked concept
+    communities, which are packed into partitions by connectivity. The
+    packing is then rebalanced and refined by moving boundary nodes towards
+    the partition holding most of their edge weight, keeping every partition
+    within ``max_imbalance`` of the ideal size.
+    """
+
+    def __init__(
+        self,
+        num_partitions: int,
+        max_imbalance: Optional[float] = None,
+        max_iterations: Optional[int] = None
+    ):
+        if num_partitions < 1:
+            raise ValueError("num_partitions must be at least 1")
+        self._k = num_partitions
+        self._max_imbalance = (
+            max_imbalance if max_imbalance is not None else settings.PARTITION_MAX_IMBALANCE
+        )
+        self._max_iterations = max_iterations or settings.PARTITION_MAX_ITERATIONS
+
+    def partition(
+        self,
+        node_ids: Sequence[str],
+        sources: Sequence[str],
+        targets: Sequence[str],
+        weights: Optional[Sequence[Optional[float]]] = None,
+        relationship_types: Optional[Sequence[Optional[str]]] = None
+    ) -> PartitionResult:
+        """Partitions ``node_ids`` over the given edges. With
+        ``relationship_types``, each edge's weight is scaled by
+        ``RELATIONSHIP_WEIGHTS`` and edges of other types are skipped."""
+        node_ids = list(node_ids)
+        n = len(node_ids)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+        src, dst, w = [], [], []
+        for i, (source, target) in enumerate(zip(sources, targets)):
+            s, t = index.get(source), index.get(target)
+            if s is None or t is None or s == t:
+                continue
+            weight = weights[i] if weights is not None else None
+            weight = 1.0 if weight is None or math.isnan(weight) else float(weight)
+            if relationship_types is not None:
+                weight *= RELATIONSHIP_WEIGHTS.get(relationship_types[i], 0.0)
+                if weight <= 0:
+                    continue
+            src.append(s)
+            dst.append(t)
+            w.append(weight)
+
+        directed = coo_matrix((w, (src, dst)), shape=(n, n), dtype=np.float64).tocsr()
+        adjacency = (directed + directed.T).tocsr()
+
+        assignment = self._seed(adjacency)
+        assignment, iterations = self._refine(adjacency, assignment)
+
+        return PartitionResult(
+            node_ids=node_ids,
+            assignment=assignment,
+            num_partitions=self._k,
+            edge_cut=self._cut(adjacency, assignment),
+            total_weight=float(adjacency.sum() / 2),
+            iterations=iterations
+        )
+
+    def _seed(self, adjacency: csr_matrix) -> np.ndarray:
+        n = adjacency.shape[0]
+        if n == 0:
+            return np.zeros(0, dtype=np.int32)
+
+        # Communities are capped at half a partition so the packing step has
+        # enough granularity to fill partitions evenly.
+        communities, links, community_sizes = self._coarsen(adjacency, max_size=math.ceil(n / (2 * self._k)))
+        links = links.tolil()
+
+        # Largest communities first, each into the partition it is most
+        # connected to among those with room left (least loaded on ties, or
+        # when none has room).
+        upper = math.ceil(n / self._k * (1 + self._max_imbalance))
+        loads = np.zeros(self._k, dtype=np.int64)
+        placement = np.full(community_sizes.size, -1, dtype=np.int32)
+        for community in np.argsort(-community_sizes, kind="stable"):
+            size = community_sizes[community]
+            connection = np.zeros(self._k)
+            for other, weight in zip(links.rows[community], links.data[community]):
+                if placement[other] >= 0:
+                    connection[placement[other]] += weight
+            fits = np.flatnonzero(loads + size <= upper)
+            if fits.size:
+                best = fits[np.lexsort((loads[fits], -connection[fits]))[0]]
+            else:
+                best = int(loads.argmin())
+            placement[community] = best
+            loads[best] += size
+
+        return placement[communities]
+
+    def _coarsen(self, adjacency: csr_matrix, max_size: int, max_levels: int = 10):
+        # Multilevel contraction: communities found at one level become the
+        # weighted nodes of the next, until the graph stops shrinking.
+        n = adjacency.shape[0]
+        communities = np.arange(n)
+        graph = adjacency
+        node_weights = np.ones(n, dtype=np.int64)
+
+        for _ in range(max_levels):
+            labels = self._label_propagation(graph, node_weights, max_size)
+            _, labels = np.unique(labels, return_inverse=True)
+            count = int(labels.max()) + 1
+            if count > 0.95 * graph.shape[0]:
+                break
+
+            membership = csr_matrix(
+                (np.ones(labels.size), (np.arange(labels.size), labels)), shape=(labels.size, count)
+            )
+            graph = (membership.T @ graph @ membership).tocsr()
+            graph.setdiag(0)
+            graph.eliminate_zeros()
+            node_weights = np.bincount(labels, weights=node_weights, minlength=count).astype(np.int64)
+            communities = labels[communities]
+            if count <= self._k:
+                break
+
+        return communities, graph, node_weights
+
+    @staticmethod
+    def _label_propagation(
+        adjacency: csr_matrix,
+        node_weights: np.ndarray,
+        max_size: int,
+        rounds: int = 10
+    ) -> np.ndarray:
+        # Size-constrained label propagation: nodes adopt the label carrying
+        # most of their edge weight unless that community would grow too big.
+        n = adjacency.shape[0]
+        labels = np.arange(n)
+        sizes = node_weights.copy()
+        indptr, indices, data = adjacency.indptr, adjacency.indices, adjacency.data
+        rng = np.random.default_rng(0)
+
+        for _ in range(rounds):
+            changed = 0
+            for node in rng.permutation(n):
+                start, end = indptr[node], indptr[node + 1]
+                if start == end:
+                    continue
+                scores: Dict[int, float] = {}
+                for neighbour, weight in zip(indices[start:end], data[start:end]):
+                    label = labels[neighbour]
+                    scores[label] = scores.get(label, 0.0) + weight
+
+                current = labels[node]
+                weight = node_weights[node]
+                for label in sorted(scores, key=scores.get, reverse=True):
+                    if label == current or scores[label] <= scores.get(current, 0.0):
+                        break
+                    if sizes[label] + weight <= max_size:
+                        labels[node] = label
+                        sizes[current] -= weight
+                        sizes[label] += weight
+                        changed += 1
+                        break
+            if changed == 0:
+                break
+        return labels
+
+    def _rebalance(self, adjacency: csr_matrix, assignment: np.ndarray, upper: int) -> np.ndarray:
+        n = adjacency.shape[0]
+        rows = np.arange(n)
+        sizes = np.bincount(assignment, minlength=self._k)
+        while sizes.max() > upper:
+            membership = csr_matrix((np.ones(n), (rows, assignment)), shape=(n, self._k))
+            affinity = (adjacency @ membership).toarray()
+            source = int(sizes.argmax())
+            room = upper - sizes
+            room[source] = 0
+            if room.max() <= 0:
+                break
+
+            members = np.flatnonzero(assignment == source)
+            options = affinity[members].copy()
+            options[:, room <= 0] = -np.inf
+            dest = options.argmax(axis=1)
+            loss = affinity[members, source] - options[np.arange(members.size), dest]
+
+            # Shed the cheapest nodes, never overfilling any destination.
+            excess = sizes[source] - upper
+            for i in np.argsort(loss, kind="stable"):
+                if excess == 0:
+                    break
+                d = dest[i]
+                if sizes[d] >= upper:
+                    continue
+                assignment[members[i]] = d
+                sizes[source] -= 1
+                sizes[d] += 1
+                excess -= 1
+        return assignment
+
+    def _refine(self, adjacency: csr_matrix, assignment: np.ndarray):
+        n = adjacency.shape[0]
+        if n == 0 or self._k == 1:
+            return assignment, 0
+
+        ideal = n / self._k
+        upper = math.ceil(ideal * (1 + self._max_imbalance))
+        lower = math.floor(ideal * (1 - self._max_imbalance))
+        assignment = self._rebalance(adjacency, assignment, upper)
+        sizes = np.bincount(assignment, minlength=self._k)
+        rows = np.arange(n)
+        indptr, indices = adjacency.indptr, adjacency.indices
+
+        iterations = 0
+        for iterations in range(1, self._max_iterations + 1):
+            membership = csr_matrix((np.ones(n), (rows, assignment)), shape=(n, self._k))
+            affinity = (adjacency @ membership).toarray()
+            current = affinity[rows, assignment]
+            affinity[rows, assignment] = -np.inf
+            target = affinity.argmax(axis=1)
+            gain = affinity[rows, target] - current
+
+            candidates = np.flatnonzero(gain > 0)
+            if candidates.size == 0:
+                break
+            candidates = candidates[np.argsort(-gain[candidates], kind="stable")]
+
+            # A move makes its neighbours' gains stale, so they wait for the
+            # next round; every accepted move therefore strictly lowers the cut.
+            locked = np.zeros(n, dtype=bool)
+            moved = 0
+            for node in candidates:
+                if locked[node]:
+                    continue
+                source, dest = assignment[node], target[node]
+                if sizes[dest] >= upper or sizes[source] <= lower:
+                    continue
+                assignment[node] = dest
+                sizes[source] -= 1
+                sizes[dest] += 1
+                locked[indices[indptr[node]:indptr[node + 1]]] = True
+                moved += 1
+
+            if moved == 0:
+                break
+
+        return assignment, iterations
+
+    @staticmethod
+    def _cut(adjacency: csr_matrix, assignment: np.ndarray) -> float:
+        coo = adjacency.tocoo()
+        crossing = assignment[coo.row] != assignment[coo.col]
+        return float(coo.data[crossing].sum() / 2)
+
+
+def load_partition_map(output_path: str) -> Dict[str, int]:
+    dataset = ds.dataset(
+        read_manifest(output_path)["datasets"]["assignments"]["path"],
+        format="parquet",
+        partitioning="hive"
+    )
+    table = dataset.to_table(columns=["id", "partition_id"])
+    return dict(zip(table.column("id").to_pylist(), table.column("partition_id").to_pylist()))
@@ -0,0 +1,410 @@
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from fastapi import Request
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.analytics.jobs import JOB_RUNNERS, ENGINES, run_job
+from app.analytics.snapshot_exporter import latest_snapshot_id
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+def _dedup_key(job_type: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"job_type": job_type, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _new_owner() -> str:
+    # The nonce tells this process apart from an earlier one with the same
+    # host and pid (a restarted container runs the API as PID 1 again).
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+
+
+def _owner_alive(owner: Optional[str], heartbeat_at: Optional[float], current_owner: str) -> bool:
+    if owner == current_owner:
+        return True
+    if not owner or heartbeat_at is None:
+        return False
+    if time.time() - heartbeat_at > settings.ANALYTICS_JOB_LEASE_SECONDS:
+        return False
+    host, pid = owner.split(":")[:2]
+    if host != socket.gethostname():
+        # Another host's worker that is still renewing its lease.
+        return True
+    if pid == str(os.getpid()):
+        # This pid, but an earlier process's nonce.
+        return False
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except (ProcessLookupError, ValueError):
+        return False
+    except PermissionError:
+        return True
+
+
+class JobRegistry:
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS analytics_jobs (
+        job_id TEXT PRIMARY KEY,
+        job_type TEXT NOT NULL,
+        params TEXT NOT NULL,
+        dedup_key TEXT NOT NULL,
+        status TEXT NOT NULL,
+        owner TEXT,
+        heartbeat_at REAL,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT,
+        result TEXT,
+        error TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_jobs_active
+        ON analytics_jobs (dedup_key) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS idx_analytics_jobs_status_created
+        ON analytics_jobs (status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_analytics_jobs_created
+        ON analytics_jobs (created_at DESC);
+    """
+
+    COLUMNS = "job_id, job_type, params, status, owner, created_at, started_at, finished_at, result, error"
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or settings.ANALYTICS_JOB_DB
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analytics_jobs)")}
+        if "heartbeat_at" not in columns:
+            self._conn.execute("ALTER TABLE analytics_jobs ADD COLUMN heartbeat_at REAL")
+
+    @staticmethod
+    def _to_job(row: Tuple) -> Dict[str, Any]:
+        job_id, job_type, params, status, owner, created_at, started_at, finished_at, result, error = row
+        return {
+            "job_id": job_id,
+            "job_type": job_type,
+            "params": json.loads(params),
+            "status": status,
+            "owner": owner,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "result": json.loads(result) if result else None,
+            "error": error
+        }
+
+    def create(self, job_type: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        key = _dedup_key(job_type, params)
+        with self._lock:
+            try:
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    """
+                    INSERT INTO analytics_jobs (job_id, job_type, params, dedup_key, status, created_at)
+                    VALUES (?, ?, ?, ?, 'queued', ?)
+                    """,
+                    (job_id, job_type, json.dumps(params, default=str), key, datetime.utcnow().isoformat())
+                )
+                created = True
+                where, arg = "job_id = ?", job_id
+            except sqlite3.IntegrityError:
+                # An identical job is already queued or running, possibly
+                # submitted through another API worker.
+                created = False
+                where, arg = "dedup_key = ? AND status IN ('queued', 'running')", key
+            row = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM analytics_jobs WHERE {where}", (arg,)
+            ).fetchone()
+        return self._to_job(row), created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM analytics_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    f"""
+                    SELECT {self.COLUMNS} FROM analytics_jobs
+                    WHERE status = ? ORDER BY created_at DESC LIMIT ?
+                    """,
+                    (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {self.COLUMNS} FROM analytics_jobs ORDER BY created_at DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def claim(self, owner: str, max_running: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = self._conn.execute(
+                    "SELECT count(*) FROM analytics_jobs WHERE status = 'running'"
+                ).fetchone()[0]
+                row = None
+                if running < max_running:
+                    row = self._conn.execute(
+                        f"""
+                        SELECT {self.COLUMNS} FROM analytics_jobs
+                        WHERE status = 'queued' ORDER BY created_at LIMIT 1
+                        """
+                    ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        """
+                        UPDATE analytics_jobs SET status = 'running', owner = ?, started_at = ?, heartbeat_at = ?
+                        WHERE job_id = ?
+                        """,
+                        (owner, datetime.utcnow().isoformat(), time.time(), row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._to_job(row)
+        job["status"] = "running"
+        job["owner"] = owner
+        return job
+
+    def finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE analytics_jobs SET status = ?, finished_at = ?, result = ?, error = ?
+                WHERE job_id = ?
+                """,
+                (
+                    status,
+                    datetime.utcnow().isoformat(),
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    job_id
+                )
+            )
+
+    def heartbeat(self, owner: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analytics_jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time(), owner)
+            )
+
+    def fail_orphans(self, current_owner: str) -> int:
+        """Fails running jobs whose owner has exited or stopped renewing
+        its lease, which frees their dedup slot and running quota."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, owner, heartbeat_at FROM analytics_jobs WHERE status = 'running'"
+            ).fetchall()
+        orphans = [
+            job_id for job_id, owner, heartbeat_at in rows
+            if not _owner_alive(owner, heartbeat_at, current_owner)
+        ]
+        for job_id in orphans:
+            self.finish(job_id, "failed", None, "Interrupted: the worker running this job exited")
+        return len(orphans)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, count(*) FROM analytics_jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AnalyticsJobService:
+
+    def __init__(
+        self,
+        registry: Optional[JobRegistry] = None,
+        max_workers: Optional[int] = None,
+        max_running: Optional[int] = None
+    ):
+        self._registry = registry or JobRegistry()
+        self._max_workers = max_workers or settings.ANALYTICS_JOB_WORKERS
+        self._max_running = max_running or settings.ANALYTICS_MAX_RUNNING_JOBS
+        self._owner = _new_owner()
+        self._last_heartbeat = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def registry(self) -> JobRegistry:
+        return self._registry
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: workers must not inherit the event loop,
+            # the Neo4j driver or sockets from the API process.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def start(self) -> None:
+        orphans = await asyncio.to_thread(self._registry.fail_orphans, self._owner)
+        if orphans:
+            logger.warning(f"Marked {orphans} interrupted analytics jobs as failed")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for job_id, task in list(self._running.items()):
+            task.cancel()
+            await asyncio.to_thread(self._registry.finish, job_id, "failed", None, "Interrupted: API shutdown")
+        self._running.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._registry.close()
+
+    async def submit(self, job_type: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+        if job_type not in JOB_RUNNERS:
+            raise ValueError(f"Unknown analytics job type '{job_type}'. Available: {sorted(JOB_RUNNERS)}")
+
+        params = dict(params or {})
+        if params.get("engine", "auto") not in ENGINES:
+            raise ValueError(f"Unknown analytics engine '{params['engine']}'. Available: {list(ENGINES)}")
+        # Pin the snapshot at submission so the job is reproducible and
+        # deduplicates against jobs over the same data.
+        params["snapshot_id"] = params.get("snapshot_id") or latest_snapshot_id()
+        if params["snapshot_id"] is None:
+            raise ValueError("No analytics snapshot has been exported yet")
+
+        job, created = await asyncio.to_thread(self._registry.create, job_type, params)
+        if created:
+            logger.info(f"Queued analytics job {job['job_id']} ({job_type})")
+        self._wakeup.set()
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._registry.get, job_id)
+
+    async def list(self, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._registry.list, limit, status)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        async def _poll() -> Dict[str, Any]:
+            while True:
+                job = await self.get(job_id)
+                if job is None:
+                    raise KeyError(job_id)
+                if job["status"] in FINISHED_STATUSES:
+                    return job
+                await asyncio.sleep(settings.ANALYTICS_JOB_POLL_INTERVAL)
+
+        return await asyncio.wait_for(_poll(), timeout=timeout)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.ANALYTICS_JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+
+            try:
+                if time.monotonic() - self._last_heartbeat >= settings.ANALYTICS_JOB_LEASE_SECONDS / 3:
+                    await asyncio.to_thread(self._registry.heartbeat, self._owner)
+                    orphans = await asyncio.to_thread(self._registry.fail_orphans, self._owner)
+                    if orphans:
+                        logger.warning(f"Marked {orphans} analytics jobs with expired leases as failed")
+                    self._last_heartbeat = time.monotonic()
+
+                while len(self._running) < self._max_workers:
+                    job = await asyncio.to_thread(self._registry.claim, self._owner, self._max_running)
+                    if job is None:
+                        break
+                    self._running[job["job_id"]] = asyncio.create_task(self._execute(job))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Claiming analytics jobs failed: {str(e)}")
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        status, result, error = "failed", None, None
+        try:
+            result = await loop.run_in_executor(self._pool(), run_job, job["job_type"], job["params"])
+            if result["status"] in ("success", "partial"):
+                status = "succeeded"
+            error = "; ".join(result.get("errors") or []) or None
+        except asyncio.CancelledError:
+            raise
+        except BrokenProcessPool as e:
+            # A worker died (typically the JVM was OOM-killed); start fresh next time.
+            error = f"Analytics worker crashed: {str(e)}"
+            self._executor = None
+        except Exception as e:
+            error = str(e)
+
+        try:
+            await asyncio.to_thread(self._registry.finish, job["job_id"], status, result, error)
+            logger.info(f"Analytics job {job['job_id']} ({job['job_type']}) {status}")
+        finally:
+            self._running.pop(job["job_id"], None)
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "owner": self._owner,
+            "local_running": len(self._running),
+            "max_workers": self._max_workers,
+            "max_running": self._max_running,
+            "jobs_by_status": self._registry.counts()
+        }
+
+
+def get_job_service(request: Request) -> AnalyticsJobService:
+    return request.app.state.analytics_jobs
@@ -0,0 +1,77 @@
+from typing import Dict, Any, Callable, List
+from dataclasses import asdict
+import json
+import logging
+import os
+
+from app.analytics.snapshot_exporter import MANIFEST_FILE, resolve_snapshot
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# These run inside the analytics worker processes, never in an API worker:
+# the engine (and, for Spark, its JVM) is created lazily per worker process
+# and reused by every job that process runs.
+
+def _calibrate_difficulty(engine, params: Dict[str, Any]):
+    return engine.calibrate_difficulty(engine.snapshot(params.get("snapshot_id")).performance())
+
+
+def _analyze_learning_patterns(engine, params: Dict[str, Any]):
+    return engine.analyze_learning_patterns(engine.snapshot(params.get("snapshot_id")).sessions())
+
+
+def _partition_knowledge_graph(engine, params: Dict[str, Any]):
+    source = engine.snapshot(params.get("snapshot_id"))
+    return engine.partition_knowledge_graph(
+        source.concepts(), source.relationships(), int(params.get("num_partitions", 4))
+    )
+
+
+def _process_curriculum_data(engine, params: Dict[str, Any]):
+    source = engine.snapshot(params.get("snapshot_id"))
+    return engine.process_curriculum_data(source.concepts(), source.relationships())
+
+
+JOB_RUNNERS: Dict[str, Callable] = {
+    "calibrate_difficulty": _calibrate_difficulty,
+    "analyze_learning_patterns": _analyze_learning_patterns,
+    "partition_knowledge_graph": _partition_knowledge_graph,
+    "process_curriculum_data": _process_curriculum_data,
+}
+
+
+# Snapshot datasets each job reads, used to size its input.
+JOB_INPUTS: Dict[str, List[str]] = {
+    "calibrate_difficulty": ["performance"],
+    "analyze_learning_patterns": ["sessions"],
+    "partition_knowledge_graph": ["concepts", "relationships"],
+    "process_curriculum_data": ["concepts", "relationships"],
+}
+
+ENGINES = ("auto", "arrow", "spark")
+
+
+def select_engine(job_type: str, params: Dict[str, Any]) -> str:
+    engine = params.get("engine") or settings.ANALYTICS_ENGINE
+    if engine != "auto":
+        return engine
+
+    path = resolve_snapshot(snapshot_id=params.get("snapshot_id"))
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        datasets = json.load(f)["datasets"]
+    rows = sum(datasets[name]["rows"] for name in JOB_INPUTS[job_type])
+    return "arrow" if rows <= settings.ANALYTICS_ARROW_MAX_ROWS else "spark"
+
+
+def run_job(job_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    engine_name = select_engine(job_type, params)
+    if engine_name == "arrow":
+        from app.analytics.arrow_jobs import get_arrow_engine as get_engine
+    else:
+        from app.analytics.pyspark_jobs import get_analytics_engine as get_engine
+
+    logger.info(f"Running analytics job {job_type} on the {engine_name} engine with {params}")
+    result = JOB_RUNNERS[job_type](get_engine(), params)
+    return {**asdict(result), "engine": engine_name}
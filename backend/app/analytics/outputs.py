@@ -0,0 +1,71 @@
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from datetime import datetime
+import glob
+import json
+import os
+import uuid
+
+from app.core.config import settings
+
+
+MANIFEST_FILE = "_MANIFEST.json"
+
+
+@dataclass
+class AnalyticsResult:
+    job_name: str
+    status: str
+    records_processed: int
+    output_path: Optional[str]
+    metrics: Dict[str, Any]
+    errors: List[str]
+
+
+def rounded(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def new_output_path(job_name: str, base_path: Optional[str] = None) -> str:
+    run_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(base_path or settings.ANALYTICS_OUTPUT_DIR, job_name, run_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_manifest(
+    path: str,
+    job_name: str,
+    datasets: Dict[str, List[str]],
+    metrics: Dict[str, Any],
+    source: Optional[str] = None
+) -> None:
+    manifest = {
+        "job_name": job_name,
+        "run_id": os.path.basename(path),
+        "created_at": datetime.utcnow().isoformat(),
+        "source": source,
+        "datasets": {
+            name: {"path": os.path.join(path, name), "partition_columns": columns}
+            for name, columns in datasets.items()
+        },
+        "metrics": metrics
+    }
+    tmp = os.path.join(path, f".{MANIFEST_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    # The manifest is written last, so its presence marks a complete run.
+    os.replace(tmp, os.path.join(path, MANIFEST_FILE))
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latest_output(job_name: str, base_path: Optional[str] = None) -> Optional[str]:
+    runs = sorted(
+        os.path.dirname(manifest) for manifest in
+        glob.glob(os.path.join(base_path or settings.ANALYTICS_OUTPUT_DIR, job_name, "*", MANIFEST_FILE))
+    )
+    return runs[-1] if runs else None
@@ -1,30 +1,28 @@
-from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql import SparkSession, DataFrame, Window
 from pyspark.sql.functions import (
     col, avg, count, sum as spark_sum, 
-    when, lit, udf, collect_list, struct
+    min as spark_min, max as spark_max,
+    when, lit, udf, collect_list, struct,
+    lag, row_number, countDistinct, expr, size
 )
-from pyspark.sql.types import (
-    StructType, StructField, StringType, 
-    IntegerType, FloatType, ArrayType, BooleanType
-)
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from pyspark.ml.fpm import PrefixSpan
+from typing import List, Dict, Any, Optional, Union
 import logging
 import json
+import os
 
+from app.analytics.outputs import AnalyticsResult, new_output_path, write_manifest, rounded
+from app.analytics.graph_partitioning import GraphPartitioner
+from app.analytics.data_sources import (
+    CONCEPTS_SCHEMA, RELATIONSHIPS_SCHEMA, PERFORMANCE_SCHEMA, SESSIONS_SCHEMA,
+    ParquetSnapshotSource, as_dataframe
+)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class AnalyticsResult:
-    job_name: str
-    status: str
-    records_processed: int
-    output_path: Optional[str]
-    metrics: Dict[str, Any]
-    errors: List[str]
+Records = Union[List[Dict[str, Any]], DataFrame]
 
 
 class SparkAnalyticsEngine:
@@ -47,10 +45,17 @@ class SparkAnalyticsEngine:
     def stop(self) -> None:
         self._spark.stop()
     
+    def snapshot(self, snapshot_id: Optional[str] = None, base_path: Optional[str] = None) -> ParquetSnapshotSource:
+        return ParquetSnapshotSource(self._spark, base_path, snapshot_id)
+    
+    @staticmethod
+    def _record_count(data: Records, df: DataFrame) -> int:
+        return len(data) if isinstance(data, list) else df.count()
+    
     def process_curriculum_data(
         self,
-        concepts_data: List[Dict[str, Any]],
-        relationships_data: List[Dict[str, Any]]
+        concepts_data: Records,
+        relationships_data: Records
     ) -> AnalyticsResult:
         logger.info("Processing curriculum data with PySpark")
         
@@ -58,42 +63,22 @@ class SparkAnalyticsEngine:
         records_processed = 0
         
         try:
-            concepts_schema = StructType([
-                StructField("id", StringType(), False),
-                StructField("name", StringType(), False),
-                StructField("description", StringType(), True),
-                StructField("domain", StringType(), True),
-                StructField("grade_level", IntegerType(), True),
-                StructField("difficulty", FloatType(), True),
-                StructField("keywords", ArrayType(StringType()), True),
-                StructField("curriculum_code", StringType(), True),
-                StructField("estimated_time_minutes", IntegerType(), True)
-            ])
-            
-            concepts_df = self._spark.createDataFrame(
-                concepts_data, schema=concepts_schema
-            )
+            concepts_df = as_dataframe(self._spark, concepts_data, CONCEPTS_SCHEMA)
             
             validation_errors = self._validate_concepts(concepts_df)
             errors.extend(validation_errors)
             
-            relationships_schema = StructType([
-                StructField("source_id", StringType(), False),
-                StructField("target_id", StringType(), False),
-                StructField("relationship_type", StringType(), False),
-                StructField("strength", FloatType(), True)
-            ])
-            
-            relationships_df = self._spark.createDataFrame(
-                relationships_data, schema=relationships_schema
-            )
+            relationships_df = as_dataframe(self._spark, relationships_data, RELATIONSHIPS_SCHEMA)
             
             rel_errors = self._validate_relationships(relationships_df, concepts_df)
             errors.extend(rel_errors)
             
             domain_stats = self._calculate_domain_statistics(concepts_df)
             
-            records_processed = len(concepts_data) + len(relationships_data)
+            records_processed = (
+                self._record_count(concepts_data, concepts_df) +
+                self._record_count(relationships_data, relationships_df)
+            )
             
             return AnalyticsResult(
                 job_name="process_curriculum_data",
@@ -186,23 +171,12 @@ class SparkAnalyticsEngine:
     
     def calibrate_difficulty(
         self,
-        student_performance: List[Dict[str, Any]]
+        student_performance: Records
     ) -> AnalyticsResult:
         logger.info("Running difficulty calibration job")
         
         try:
-            perf_schema = StructType([
-                StructField("student_id", StringType(), False),
-                StructField("concept_id", StringType(), False),
-                StructField("mastery_level", FloatType(), False),
-                StructField("time_spent_minutes", IntegerType(), True),
-                StructField("attempts", IntegerType(), True),
-                StructField("assessment_score", FloatType(), True)
-            ])
-            
-            perf_df = self._spark.createDataFrame(
-                student_performance, schema=perf_schema
-            )
+            perf_df = as_dataframe(self._spark, student_performance, PERFORMANCE_SCHEMA)
             
             difficulty_metrics = perf_df.groupBy("concept_id").agg(
                 avg("mastery_level").alias("avg_mastery"),
@@ -226,31 +200,32 @@ class SparkAnalyticsEngine:
                 .otherwise(col("calibrated_difficulty"))
             )
             
-            results = calibrated.select(
-                "concept_id", 
-                "calibrated_difficulty",
-                "avg_mastery",
-                "student_count"
-            ).collect()
+            output_path = new_output_path("calibrate_difficulty")
+            self._write(calibrated, output_path, "calibration")
+            
+            summary = self._read(output_path, "calibration").agg(
+                count("*").alias("concepts_calibrated"),
+                avg("calibrated_difficulty").alias("mean_difficulty"),
+                spark_min("calibrated_difficulty").alias("min_difficulty"),
+                spark_max("calibrated_difficulty").alias("max_difficulty"),
+                spark_sum("student_count").alias("total_samples")
+            ).first()
             
-            calibration_data = {
-                row["concept_id"]: {
-                    "calibrated_difficulty": round(row["calibrated_difficulty"], 3),
-                    "avg_mastery": round(row["avg_mastery"], 3),
-                    "sample_size": row["student_count"]
-                }
-                for row in results
+            metrics = {
+                "concepts_calibrated": summary["concepts_calibrated"],
+                "mean_difficulty": rounded(summary["mean_difficulty"]),
+                "min_difficulty": rounded(summary["min_difficulty"]),
+                "max_difficulty": rounded(summary["max_difficulty"]),
+                "total_samples": summary["total_samples"] or 0
             }
+            write_manifest(output_path, "calibrate_difficulty", {"calibration": []}, metrics)
             
             return AnalyticsResult(
                 job_name="calibrate_difficulty",
                 status="success",
-                records_processed=len(student_performance),
-                output_path=None,
-                metrics={
-                    "concepts_calibrated": len(calibration_data),
-                    "calibration_data": calibration_data
-                },
+                records_processed=metrics["total_samples"],
+                output_path=output_path,
+                metrics=metrics,
                 errors=[]
             )
             
@@ -267,69 +242,70 @@ class SparkAnalyticsEngine:
     
     def analyze_learning_patterns(
         self,
-        learning_sessions: List[Dict[str, Any]]
+        learning_sessions: Records
     ) -> AnalyticsResult:
         logger.info("Running learning pattern analysis")
         
         try:
-            session_schema = StructType([
-                StructField("session_id", StringType(), False),
-                StructField("student_id", StringType(), False),
-                StructField("concept_id", StringType(), False),
-                StructField("session_order", IntegerType(), False),
-                StructField("mastery_before", FloatType(), True),
-                StructField("mastery_after", FloatType(), True),
-                StructField("duration_minutes", IntegerType(), True),
-                StructField("success", BooleanType(), True)
-            ])
-            
-            sessions_df = self._spark.createDataFrame(
-                learning_sessions, schema=session_schema
-            )
+            sessions_df = as_dataframe(self._spark, learning_sessions, SESSIONS_SCHEMA)
             
-            bottlenecks = sessions_df.groupBy("concept_id").agg(
+            concept_stats = sessions_df.groupBy("concept_id").agg(
                 (spark_sum(when(col("success") == True, 1).otherwise(0)) / 
                  count("*")).alias("success_rate"),
                 avg("duration_minutes").alias("avg_duration"),
-                avg(col("mastery_after") - col("mastery_before")).alias("avg_progress")
-            ).filter(col("success_rate") < 0.5).collect()
-            
-            sequence_patterns = sessions_df.groupBy("student_id", "session_id").agg(
-                collect_list(struct("session_order", "concept_id")).alias("sequence")
-            )
-            
-            progression = sessions_df.groupBy("concept_id").agg(
                 avg("mastery_before").alias("avg_mastery_before"),
                 avg("mastery_after").alias("avg_mastery_after"),
-                avg(col("mastery_after") - col("mastery_before")).alias("avg_gain")
-            ).collect()
+                avg(col("mastery_after") - col("mastery_before")).alias("avg_gain"),
+                count("*").alias("attempt_count")
+            ).withColumn("is_bottleneck", col("success_rate") < 0.5)
             
-            bottleneck_data = [
-                {
-                    "concept_id": row["concept_id"],
-                    "success_rate": round(row["success_rate"], 3),
-                    "avg_duration": round(row["avg_duration"], 1)
-                }
-                for row in bottlenecks
-            ]
+            steps = self._session_steps(sessions_df).cache()
+            try:
+                transitions = self._mine_transitions(steps, concept_stats)
+                order_hints = self._order_hints(steps)
+                frequent_sequences = self._frequent_sequences(steps)
+                
+                output_path = new_output_path("analyze_learning_patterns")
+                self._write(concept_stats, output_path, "concept_progression", ["is_bottleneck"])
+                self._write(transitions, output_path, "transitions")
+                self._write(order_hints, output_path, "order_hints")
+                self._write(frequent_sequences, output_path, "frequent_sequences", ["pattern_length"])
+            finally:
+                steps.unpersist()
+            
+            summary = self._read(output_path, "concept_progression").agg(
+                count("*").alias("concepts_analyzed"),
+                spark_sum(when(col("is_bottleneck"), 1).otherwise(0)).alias("bottleneck_count"),
+                avg("avg_gain").alias("mean_gain"),
+                spark_sum("attempt_count").alias("records_processed")
+            ).first()
             
-            progression_data = {
-                row["concept_id"]: {
-                    "avg_gain": round(row["avg_gain"], 3)
-                }
-                for row in progression
+            metrics = {
+                "concepts_analyzed": summary["concepts_analyzed"],
+                "bottleneck_count": summary["bottleneck_count"] or 0,
+                "mean_gain": rounded(summary["mean_gain"]),
+                "total_sessions_analyzed": sessions_df.select("session_id").distinct().count(),
+                "transitions_mined": self._read(output_path, "transitions").count(),
+                "concepts_with_order_hints": self._read(output_path, "order_hints").count(),
+                "frequent_sequences": self._read(output_path, "frequent_sequences").count()
             }
+            write_manifest(
+                output_path, "analyze_learning_patterns",
+                {
+                    "concept_progression": ["is_bottleneck"],
+                    "transitions": [],
+                    "order_hints": [],
+                    "frequent_sequences": ["pattern_length"]
+                },
+                metrics
+            )
             
             return AnalyticsResult(
                 job_name="analyze_learning_patterns",
                 status="success",
-                records_processed=len(learning_sessions),
-                output_path=None,
-                metrics={
-                    "bottleneck_concepts": bottleneck_data,
-                    "progression_analysis": progression_data,
-                    "total_sessions_analyzed": sessions_df.select("session_id").distinct().count()
-                },
+                records_processed=summary["records_processed"] or 0,
+                output_path=output_path,
+                metrics=metrics,
                 errors=[]
             )
             
@@ -344,46 +320,131 @@ class SparkAnalyticsEngine:
                 errors=[str(e)]
             )
     
+    def _session_steps(self, sessions_df: DataFrame) -> DataFrame:
+        in_order = Window.partitionBy("student_id", "session_id").orderBy("session_order")
+        whole_session = Window.partitionBy("student_id", "session_id")
+        
+        return sessions_df.withColumn(
+            "prev_concept_id", lag("concept_id").over(in_order)
+        ).withColumn(
+            "step", row_number().over(in_order)
+        ).withColumn(
+            "session_length", count("*").over(whole_session)
+        ).withColumn(
+            "gain", col("mastery_after") - col("mastery_before")
+        )
+    
+    def _mine_transitions(self, steps: DataFrame, concept_stats: DataFrame) -> DataFrame:
+        # A transition A -> B is "studied A, then B next in the same session".
+        # Its success rate on B is shrunk towards B's overall success rate so
+        # rare pairs do not produce extreme strengths.
+        prior = settings.SEQUENCE_STRENGTH_PRIOR
+        baseline = concept_stats.select(
+            col("concept_id").alias("to_concept_id"),
+            col("success_rate").alias("base_success_rate"),
+            col("avg_gain").alias("base_gain")
+        )
+        
+        return steps.where(
+            col("prev_concept_id").isNotNull() & (col("prev_concept_id") != col("concept_id"))
+        ).groupBy(
+            col("prev_concept_id").alias("from_concept_id"),
+            col("concept_id").alias("to_concept_id")
+        ).agg(
+            count("*").alias("transition_count"),
+            countDistinct("student_id").alias("student_count"),
+            spark_sum(when(col("success") == True, 1).otherwise(0)).alias("successes"),
+            avg("gain").alias("avg_gain")
+        ).where(
+            col("transition_count") >= settings.SEQUENCE_MIN_TRANSITIONS
+        ).join(baseline, on="to_concept_id").withColumn(
+            "empirical_strength",
+            (col("successes") + lit(prior) * col("base_success_rate")) /
+            (col("transition_count") + lit(prior))
+        ).withColumn(
+            "gain_lift", col("avg_gain") - col("base_gain")
+        )
+    
+    def _order_hints(self, steps: DataFrame) -> DataFrame:
+        # Where in a session students tend to study a concept, from 0 (first)
+        # to 1 (last); single-concept sessions carry no ordering information.
+        return steps.where(col("session_length") > 1).groupBy("concept_id").agg(
+            avg(
+                (col("step") - 1) / (col("session_length") - 1)
+            ).alias("order_hint"),
+            count("*").alias("order_support")
+        )
+    
+    def _frequent_sequences(self, steps: DataFrame) -> DataFrame:
+        sequences = steps.groupBy("student_id", "session_id").agg(
+            expr(
+                "transform(sort_array(collect_list(struct(session_order, concept_id))), "
+                "s -> array(s.concept_id))"
+            ).alias("sequence")
+        )
+        
+        patterns = PrefixSpan(
+            minSupport=settings.SEQUENCE_MIN_SUPPORT,
+            maxPatternLength=settings.SEQUENCE_MAX_PATTERN_LENGTH,
+            sequenceCol="sequence"
+        ).findFrequentSequentialPatterns(sequences)
+        
+        return patterns.select(
+            expr("transform(sequence, items -> items[0])").alias("concept_ids"),
+            col("freq")
+        ).withColumn(
+            "pattern_length", size("concept_ids")
+        ).where(col("pattern_length") > 1)
+    
     def partition_knowledge_graph(
         self,
-        concepts: List[Dict[str, Any]],
-        relationships: List[Dict[str, Any]],
+        concepts: Records,
+        relationships: Records,
         num_partitions: int = 4
     ) -> AnalyticsResult:
         logger.info(f"Partitioning knowledge graph into {num_partitions} partitions")
         
         try:
-            edges_df = self._spark.createDataFrame(relationships)
-            concepts_df = self._spark.createDataFrame(concepts)
+            edges_df = as_dataframe(self._spark, relationships, RELATIONSHIPS_SCHEMA)
+            concepts_df = as_dataframe(self._spark, concepts, CONCEPTS_SCHEMA)
             
-            partitioned = concepts_df.withColumn(
-                "partition_id",
-                col("grade_level") % num_partitions
-            ).select("id", "name", "domain", "grade_level", "partition_id")
+            # The concept graph is orders of magnitude smaller than the
+            # student data, so only its ids and edges are brought to the
+            # driver for the in-process sparse partitioner.
+            node_ids = [row["id"] for row in concepts_df.select("id").toLocalIterator()]
+            edges = [
+                (row["source_id"], row["target_id"], row["strength"], row["relationship_type"])
+                for row in edges_df.select(
+                    "source_id", "target_id", "strength", "relationship_type"
+                ).toLocalIterator()
+            ]
+            sources, targets, weights, types = zip(*edges) if edges else ((), (), (), ())
             
-            assignments = partitioned.collect()
+            result = GraphPartitioner(num_partitions).partition(node_ids, sources, targets, weights, types)
             
-            partition_map = {
-                row["id"]: row["partition_id"]
-                for row in assignments
-            }
+            assignments_df = self._spark.createDataFrame(
+                list(zip(result.node_ids, result.assignment.tolist())),
+                schema="id string, partition_id int"
+            )
+            partitioned = concepts_df.select("id", "name", "domain", "grade_level").join(
+                assignments_df, on="id"
+            )
             
-            partition_counts = partitioned.groupBy("partition_id").count().collect()
-            partition_sizes = {
-                row["partition_id"]: row["count"]
-                for row in partition_counts
-            }
+            output_path = new_output_path("partition_knowledge_graph")
+            self._write(partitioned, output_path, "assignments", ["partition_id"])
+            
+            metrics = result.summary()
+            write_manifest(
+                output_path, "partition_knowledge_graph",
+                {"assignments": ["partition_id"]}, metrics
+            )
             
             return AnalyticsResult(
                 job_name="partition_knowledge_graph",
                 status="success",
-                records_processed=len(concepts),
-                output_path=None,
-                metrics={
-                    "partition_map": partition_map,
-                    "partition_sizes": partition_sizes,
-                    "num_partitions": num_partitions
-                },
+                records_processed=len(node_ids) + len(edges),
+                output_path=output_path,
+                metrics=metrics,
                 errors=[]
             )
             
@@ -397,6 +458,21 @@ class SparkAnalyticsEngine:
                 metrics={},
                 errors=[str(e)]
             )
+    
+    def _write(
+        self,
+        df: DataFrame,
+        output_path: str,
+        dataset: str,
+        partition_by: Optional[List[str]] = None
+    ) -> None:
+        writer = df.write.mode("overwrite")
+        if partition_by:
+            writer = writer.partitionBy(*partition_by)
+        writer.parquet(os.path.join(output_path, dataset))
+    
+    def _read(self, output_path: str, dataset: str) -> DataFrame:
+        return self._spark.read.parquet(os.path.join(output_path, dataset))
 
 
 analytics_engine: Optional[SparkAnalyticsEngine] = None
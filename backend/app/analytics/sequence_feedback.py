@@ -0,0 +1,73 @@
+from typing import Dict, Optional
+import logging
+import os
+
+import pyarrow.compute as pc
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.analytics.snapshot_exporter import SnapshotExporter
+from app.analytics.job_service import AnalyticsJobService
+from app.analytics.writeback import ScheduledWriteback, iter_output_batches
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SequenceFeedbackPipeline(ScheduledWriteback):
+    """Feeds mined study sequences back into the graph: empirical strengths
+    on existing BUILDS_ON edges and per-concept ordering hints that the gap
+    planner reads at request time."""
+
+    name = "sequence_feedback"
+    job_type = "analyze_learning_patterns"
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        job_service: AnalyticsJobService,
+        exporter: Optional[SnapshotExporter] = None
+    ):
+        super().__init__(neo4j_client, job_service, settings.SEQUENCE_FEEDBACK_INTERVAL, exporter)
+
+    async def apply(self, output_path: str) -> Dict[str, int]:
+        run_id = os.path.basename(output_path)
+
+        edges_updated = 0
+        for rows in iter_output_batches(
+            output_path,
+            "transitions",
+            ["from_concept_id", "to_concept_id", "empirical_strength", "gain_lift", "transition_count"]
+        ):
+            result = await self._client.execute_query(
+                queries.APPLY_BUILDS_ON_EVIDENCE, {"rows": rows, "run_id": run_id}
+            )
+            edges_updated += result[0]["updated"] if result else 0
+
+        concepts_updated = 0
+        for rows in iter_output_batches(
+            output_path,
+            "order_hints",
+            ["concept_id", "order_hint", "order_support"],
+            pc.field("order_support") >= settings.SEQUENCE_MIN_TRANSITIONS
+        ):
+            result = await self._client.execute_query(
+                queries.APPLY_ORDER_HINTS, {"rows": rows, "run_id": run_id}
+            )
+            concepts_updated += result[0]["updated"] if result else 0
+
+        # Evidence from earlier runs that this run no longer supports would
+        # otherwise keep steering the gap planner.
+        result = await self._client.execute_query(
+            queries.CLEAR_STALE_BUILDS_ON_EVIDENCE, {"run_id": run_id}
+        )
+        edges_cleared = result[0]["cleared"] if result else 0
+        result = await self._client.execute_query(queries.CLEAR_STALE_ORDER_HINTS, {"run_id": run_id})
+        concepts_cleared = result[0]["cleared"] if result else 0
+
+        return {
+            "edges_updated": edges_updated,
+            "concepts_updated": concepts_updated,
+            "edges_cleared": edges_cleared,
+            "concepts_cleared": concepts_cleared
+        }
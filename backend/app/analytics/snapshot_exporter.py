@@ -0,0 +1,284 @@
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from datetime import datetime
+import asyncio
+import glob
+import json
+import logging
+import os
+import shutil
+import zlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.events.event_log import read_segment, SEALED_SUFFIX
+from app.analytics.outputs import MANIFEST_FILE
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+LATEST_FILE = "LATEST"
+
+# Arrow mirrors of the Spark schemas in data_sources; FloatType is float32 and
+# IntegerType is int32, so the two sides read each other without casts.
+ARROW_SCHEMAS = {
+    "concepts": pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("description", pa.string()),
+        ("domain", pa.string()),
+        ("grade_level", pa.int32()),
+        ("difficulty", pa.float32()),
+        ("keywords", pa.list_(pa.string())),
+        ("curriculum_code", pa.string()),
+        ("estimated_time_minutes", pa.int32()),
+        ("domain_partition", pa.string()),
+    ]),
+    "relationships": pa.schema([
+        ("source_id", pa.string()),
+        ("target_id", pa.string()),
+        ("relationship_type", pa.string()),
+        ("strength", pa.float32()),
+    ]),
+    "performance": pa.schema([
+        ("student_id", pa.string()),
+        ("concept_id", pa.string()),
+        ("mastery_level", pa.float32()),
+        ("time_spent_minutes", pa.int32()),
+        ("attempts", pa.int32()),
+        ("assessment_score", pa.float32()),
+        ("student_bucket", pa.int32()),
+    ]),
+    "sessions": pa.schema([
+        ("session_id", pa.string()),
+        ("student_id", pa.string()),
+        ("concept_id", pa.string()),
+        ("session_order", pa.int32()),
+        ("mastery_before", pa.float32()),
+        ("mastery_after", pa.float32()),
+        ("duration_minutes", pa.int32()),
+        ("success", pa.bool_()),
+        ("session_date", pa.date32()),
+    ]),
+}
+
+PARTITION_COLUMNS = {
+    "concepts": ["domain_partition"],
+    "relationships": [],
+    "performance": ["student_bucket"],
+    "sessions": ["session_date"],
+}
+
+
+def latest_snapshot_id(base_path: Optional[str] = None) -> Optional[str]:
+    latest = os.path.join(base_path or settings.ANALYTICS_SNAPSHOT_DIR, LATEST_FILE)
+    if not os.path.exists(latest):
+        return None
+    with open(latest, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def resolve_snapshot(base_path: Optional[str] = None, snapshot_id: Optional[str] = None) -> str:
+    base_path = base_path or settings.ANALYTICS_SNAPSHOT_DIR
+    snapshot_id = snapshot_id or latest_snapshot_id(base_path)
+    if snapshot_id is None:
+        raise FileNotFoundError(f"No snapshot has been exported to {base_path}")
+    return os.path.join(base_path, snapshot_id)
+
+
+def student_bucket(student_id: str, buckets: Optional[int] = None) -> int:
+    return zlib.crc32(student_id.encode("utf-8")) % (buckets or settings.ANALYTICS_STUDENT_BUCKETS)
+
+
+class _DatasetWriter:
+
+    def __init__(self, root: str, dataset: str):
+        self._path = os.path.join(root, dataset)
+        self._dataset = dataset
+        self._schema = ARROW_SCHEMAS[dataset]
+        self._pages = 0
+        self.rows = 0
+        os.makedirs(self._path, exist_ok=True)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        table = pa.Table.from_pylist(rows, schema=self._schema)
+        pq.write_to_dataset(
+            table,
+            self._path,
+            partition_cols=PARTITION_COLUMNS[self._dataset] or None,
+            basename_template=f"page-{self._pages:06d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        self._pages += 1
+        self.rows += len(rows)
+
+
+class SnapshotExporter:
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        base_path: Optional[str] = None,
+        page_size: Optional[int] = None,
+        event_archive_dir: Optional[str] = None
+    ):
+        self._client = neo4j_client
+        self._base_path = base_path or settings.ANALYTICS_SNAPSHOT_DIR
+        self._page_size = page_size or settings.ANALYTICS_EXPORT_PAGE_SIZE
+        self._archive_dir = event_archive_dir or settings.EVENT_LOG_ARCHIVE_DIR
+
+    async def export(self, snapshot_id: Optional[str] = None) -> str:
+        snapshot_id = snapshot_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        final_path = os.path.join(self._base_path, snapshot_id)
+        staging = os.path.join(self._base_path, f".staging-{snapshot_id}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        try:
+            counts = {
+                "concepts": await self._export_concepts(staging),
+                "relationships": await self._export_grouped(
+                    staging, "relationships", queries.EXPORT_RELATIONSHIPS_PAGE
+                ),
+                "performance": await self._export_grouped(
+                    staging, "performance", queries.EXPORT_MASTERY_PAGE, self._with_bucket
+                ),
+                "sessions": await asyncio.to_thread(self._export_sessions, staging),
+            }
+
+            manifest = {
+                "snapshot_id": snapshot_id,
+                "created_at": datetime.utcnow().isoformat(),
+                "page_size": self._page_size,
+                "student_buckets": settings.ANALYTICS_STUDENT_BUCKETS,
+                "datasets": {
+                    name: {"rows": rows, "partition_columns": PARTITION_COLUMNS[name]}
+                    for name, rows in counts.items()
+                }
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+
+            os.replace(staging, final_path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        latest_tmp = os.path.join(self._base_path, f".{LATEST_FILE}.tmp")
+        with open(latest_tmp, "w", encoding="utf-8") as f:
+            f.write(snapshot_id)
+        os.replace(latest_tmp, os.path.join(self._base_path, LATEST_FILE))
+
+        logger.info(f"Exported snapshot {snapshot_id}: {counts}")
+        return final_path
+
+    async def _export_concepts(self, root: str) -> int:
+        writer = _DatasetWriter(root, "concepts")
+        after = ""
+        while True:
+            page = await self._client.execute_query(
+                queries.EXPORT_CONCEPTS_PAGE, {"after": after, "page_size": self._page_size}
+            )
+            if not page:
+                break
+            writer.write([{**row, "domain_partition": row.get("domain") or "unknown"} for row in page])
+            after = page[-1]["id"]
+            if len(page) < self._page_size:
+                break
+        return writer.rows
+
+    async def _export_grouped(self, root: str, dataset: str, query: str, transform=None) -> int:
+        # Pages are keyed on the owning node rather than on edges, so a page
+        # never splits one node's edges and the keyset cursor stays indexed.
+        writer = _DatasetWriter(root, dataset)
+        after = ""
+        while True:
+            page = await self._client.execute_query(query, {"after": after, "page_size": self._page_size})
+            if not page:
+                break
+            rows = [row for group in page for row in group["rows"]]
+            writer.write([transform(row) for row in rows] if transform else rows)
+            after = page[-1]["cursor"]
+            if len(page) < self._page_size:
+                break
+        return writer.rows
+
+    @staticmethod
+    def _with_bucket(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {**row, "student_bucket": student_bucket(row["student_id"])}
+
+    def _mastery_events(self) -> Iterator[Tuple[str, int, str, float, str]]:
+        for path in sorted(glob.glob(os.path.join(self._archive_dir, f"*{SEALED_SUFFIX}"))):
+            for event in read_segment(path):
+                if event.get("type") == "mastery":
+                    yield (
+                        event["student_id"], event["seq"], event["concept_id"],
+                        event["mastery_level"], event["recorded_at"]
+                    )
+
+    def _spill_mastery_events(self, spill_dir: str) -> List[str]:
+        # Partitioned by student, so each partition holds whole histories and
+        # can be sorted on its own without loading the archive at once.
+        partitions = settings.ANALYTICS_SESSION_SORT_PARTITIONS
+        paths = [os.path.join(spill_dir, f"part-{i:04d}.jsonl") for i in range(partitions)]
+        os.makedirs(spill_dir, exist_ok=True)
+        files = [open(path, "w", encoding="utf-8") for path in paths]
+        try:
+            for event in self._mastery_events():
+                files[student_bucket(event[0], partitions)].write(json.dumps(event) + "\n")
+        finally:
+            for f in files:
+                f.close()
+        return paths
+
+    @staticmethod
+    def _read_partition(path: str) -> List[Tuple[str, int, str, float, str]]:
+        with open(path, "r", encoding="utf-8") as f:
+            return sorted(tuple(json.loads(line)) for line in f)
+
+    def _export_sessions(self, root: str) -> int:
+        # Sessions are reconstructed from archived mastery events: one session
+        # per student per UTC day, ordered by event sequence.
+        writer = _DatasetWriter(root, "sessions")
+        spill_dir = os.path.join(root, ".session-sort")
+        threshold = settings.MIN_MASTERY_THRESHOLD
+
+        try:
+            rows: List[Dict[str, Any]] = []
+            for path in self._spill_mastery_events(spill_dir):
+                previous: Dict[Tuple[str, str], float] = {}
+                session_key = None
+                order = 0
+                for student_id, _, concept_id, level, recorded_at in self._read_partition(path):
+                    day = datetime.fromisoformat(recorded_at).date()
+                    if session_key != (student_id, day):
+                        session_key = (student_id, day)
+                        order = 0
+                    order += 1
+
+                    rows.append({
+                        "session_id": f"{student_id}:{day.isoformat()}",
+                        "student_id": student_id,
+                        "concept_id": concept_id,
+                        "session_order": order,
+                        "mastery_before": previous.get((student_id, concept_id), 0.0),
+                        "mastery_after": level,
+                        "duration_minutes": None,
+                        "success": level >= threshold,
+                        "session_date": day
+                    })
+                    previous[(student_id, concept_id)] = level
+
+                    if len(rows) >= self._page_size:
+                        writer.write(rows)
+                        rows = []
+                os.remove(path)
+            writer.write(rows)
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        return writer.rows
@@ -0,0 +1,176 @@
+from typing import Dict, Any, List, Optional, Set
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlparse, unquote
+from fastapi import Request
+import json
+import logging
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Versioned: a change to the window aggregation's columns needs a fresh sink
+# and checkpoint, since Spark cannot resume aggregation state of another shape.
+CONCEPT_WINDOWS = "concept_windows_v2"
+SINK_METADATA_DIR = "_spark_metadata"
+COMPACT_SUFFIX = ".compact"
+WINDOW_DATE_PARTITION = "window_date="
+
+
+def committed_files(sink_path: str) -> List[str]:
+    """Files the Spark file sink has committed, read from its metadata log.
+
+    Listing the directory would also pick up files from batches that failed
+    before committing; the log only names files from committed batches. Every
+    tenth batch is compacted into ``<n>.compact``, which carries all entries
+    up to that batch.
+    """
+    log_dir = os.path.join(sink_path, SINK_METADATA_DIR)
+    if not os.path.isdir(log_dir):
+        return []
+
+    batches = {}
+    for name in os.listdir(log_dir):
+        batch = name[:-len(COMPACT_SUFFIX)] if name.endswith(COMPACT_SUFFIX) else name
+        if batch.isdigit():
+            batches[int(batch)] = name
+    compacted = [batch for batch, name in batches.items() if name.endswith(COMPACT_SUFFIX)]
+    start = max(compacted) if compacted else 0
+
+    files = []
+    for batch in sorted(b for b in batches if b >= start):
+        with open(os.path.join(log_dir, batches[batch]), "r", encoding="utf-8") as f:
+            for line in f.read().splitlines()[1:]:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("action", "add") == "add":
+                    files.append(unquote(urlparse(entry["path"]).path))
+    return files
+
+
+def window_date(path: str) -> Optional[date]:
+    """The ``window_date`` partition a sink file was written under."""
+    for part in path.split("/"):
+        if part.startswith(WINDOW_DATE_PARTITION):
+            try:
+                return date.fromisoformat(part[len(WINDOW_DATE_PARTITION):])
+            except ValueError:
+                return None
+    return None
+
+
+class StreamStatsReader:
+    """Serves per-concept stats from the streaming job's window aggregates.
+
+    Committed files are immutable, so each one is read once; a refresh only
+    reads files committed since the previous one. Windows older than the
+    horizon are dropped from the cache, and files whose whole ``window_date``
+    partition is past it are neither read nor remembered.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        self._sink_path = os.path.join(output_dir or settings.STREAM_OUTPUT_DIR, CONCEPT_WINDOWS)
+        self._tables: Dict[str, pa.Table] = {}
+        self._seen: Set[str] = set()
+        self._stats: Optional[Dict[str, Any]] = None
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        horizon = datetime.now(timezone.utc) - timedelta(days=settings.STREAM_STATS_HORIZON_DAYS)
+        # A window ends at most one day after the date it starts on.
+        expired_before = horizon.date() - timedelta(days=1)
+
+        def expired(path: str) -> bool:
+            day = window_date(path)
+            return day is not None and day < expired_before
+
+        self._seen = {path for path in self._seen if not expired(path)}
+        for path in committed_files(self._sink_path):
+            if path not in self._seen and not expired(path) and os.path.exists(path):
+                self._seen.add(path)
+                self._tables[path] = pq.read_table(path, columns=[
+                    "window_end", "concept_id", "concept_name", "assessments",
+                    "mastery_sum", "mastered", "student_ids", "struggles"
+                ])
+
+        current = {}
+        for path, table in self._tables.items():
+            column_type = table.schema.field("window_end").type
+            cutoff = horizon if column_type.tz else horizon.replace(tzinfo=None)
+            table = table.filter(pc.greater_equal(table["window_end"], pa.scalar(cutoff, type=column_type)))
+            if table.num_rows:
+                current[path] = table
+        self._tables = current
+        self._stats = self._aggregate(list(self._tables.values()))
+        self._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _aggregate(tables: List[pa.Table]) -> Dict[str, Any]:
+        if not tables:
+            return {"stats": [], "as_of": None, "windows": 0}
+
+        windows = pa.concat_tables(tables, promote_options="default")
+        grouped = windows.group_by("concept_id").aggregate([
+            ("concept_name", "max"),
+            ("assessments", "sum"),
+            ("mastery_sum", "sum"),
+            ("mastered", "sum"),
+            ("struggles", "sum")
+        ]).to_pylist()
+
+        # One row per (concept, student, window); distinct over the horizon.
+        ids = windows["student_ids"].combine_chunks()
+        students = pa.table({
+            "concept_id": pc.take(windows["concept_id"], pc.list_parent_indices(ids)),
+            "student_id": pc.list_flatten(ids)
+        }).group_by("concept_id").aggregate([("student_id", "count_distinct")]).to_pylist()
+        student_counts = {row["concept_id"]: row["student_id_count_distinct"] for row in students}
+
+        stats = []
+        for row in grouped:
+            assessments = row["assessments_sum"] or 0
+            avg_mastery = row["mastery_sum_sum"] / assessments if assessments else None
+            stats.append({
+                "concept_id": row["concept_id"],
+                "concept_name": row["concept_name_max"],
+                "avg_mastery": round(avg_mastery, 3) if avg_mastery is not None else 0,
+                "student_count": student_counts.get(row["concept_id"], 0),
+                "difficulty_score": round(1 - avg_mastery, 3) if avg_mastery is not None else 0,
+                "assessments": assessments,
+                "success_rate": round(row["mastered_sum"] / assessments, 3) if assessments else None,
+                "struggle_count": row["struggles_sum"] or 0
+            })
+        stats.sort(key=lambda s: s["difficulty_score"], reverse=True)
+
+        as_of = pc.max(windows["window_end"]).as_py()
+        return {
+            "stats": stats,
+            "as_of": as_of.isoformat() if as_of else None,
+            "windows": windows.num_rows
+        }
+
+    def concept_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._stats is None or time.monotonic() - self._refreshed_at >= settings.STREAM_STATS_REFRESH_INTERVAL:
+                try:
+                    self._refresh()
+                except Exception as e:
+                    # Keep serving the last good aggregate if the sink is mid-write.
+                    logger.error(f"Refreshing stream stats failed: {str(e)}")
+                    if self._stats is None:
+                        raise
+            return self._stats
+
+
+def get_stream_stats(request: Request) -> Optional[StreamStatsReader]:
+    return getattr(request.app.state, "stream_stats", None)
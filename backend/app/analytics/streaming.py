@@ -0,0 +1,112 @@
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql.streaming import StreamingQuery
+from pyspark.sql.functions import (
+    col, count, sum as spark_sum, max as spark_max,
+    when, lit, window, to_timestamp, collect_set
+)
+from pyspark.sql.types import StructType, StructField, StringType, LongType, DoubleType
+from typing import Optional
+import logging
+import os
+
+from app.analytics.stream_stats import CONCEPT_WINDOWS
+from app.events.event_log import ASSESSMENT_SOURCE
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Every field any event type carries (see app.events.event_log.new_event);
+# fields an event type does not use are read as null.
+EVENT_SCHEMA = StructType([
+    StructField("event_id", StringType(), False),
+    StructField("seq", LongType(), True),
+    StructField("type", StringType(), False),
+    StructField("student_id", StringType(), False),
+    StructField("concept_id", StringType(), False),
+    StructField("recorded_at", StringType(), False),
+    StructField("mastery_level", DoubleType(), True),
+    StructField("confidence", DoubleType(), True),
+    StructField("threshold", DoubleType(), True),
+    StructField("concept_name", StringType(), True),
+    StructField("error_pattern", StringType(), True),
+    StructField("signature", StringType(), True),
+    StructField("source", StringType(), True),
+])
+
+def read_events(spark: SparkSession, source_dir: Optional[str] = None) -> DataFrame:
+    # The event pipeline only moves sealed, fully applied segments into the
+    # archive, and does so with an atomic rename, which is exactly the
+    # contract the file source needs.
+    return (
+        spark.readStream
+        .schema(EVENT_SCHEMA)
+        .option("maxFilesPerTrigger", settings.STREAM_MAX_FILES_PER_TRIGGER)
+        .option("pathGlobFilter", "*.jsonl")
+        .json(source_dir or settings.EVENT_LOG_ARCHIVE_DIR)
+        .withColumn("event_time", to_timestamp(col("recorded_at")))
+    )
+
+
+def concept_window_stats(events: DataFrame) -> DataFrame:
+    # Manual mastery updates and replays are mastery events too, but not
+    # assessments.
+    assessed = (col("type") == "mastery") & (col("source") == lit(ASSESSMENT_SOURCE))
+    mastered = assessed & (col("mastery_level") >= lit(settings.MIN_MASTERY_THRESHOLD))
+
+    return (
+        events
+        .withWatermark("event_time", settings.STREAM_WATERMARK)
+        # Recovery can replay a segment another worker already archived;
+        # the watermark bounds the dedup state.
+        .dropDuplicatesWithinWatermark(["event_id"])
+        .groupBy(window(col("event_time"), settings.STREAM_WINDOW), col("concept_id"))
+        .agg(
+            spark_max("concept_name").alias("concept_name"),
+            spark_sum(when(assessed, 1).otherwise(0)).alias("assessments"),
+            spark_sum(when(assessed, col("mastery_level")).otherwise(0.0)).alias("mastery_sum"),
+            spark_sum(when(mastered, 1).otherwise(0)).alias("mastered"),
+            # Kept as ids so the reader can count students across windows.
+            collect_set(when(assessed, col("student_id"))).alias("student_ids"),
+            spark_sum(when(col("type") == "struggle", 1).otherwise(0)).alias("struggles"),
+            count("*").alias("events")
+        )
+        .select(
+            col("window.start").alias("window_start"),
+            col("window.end").alias("window_end"),
+            col("window.start").cast("date").alias("window_date"),
+            "concept_id", "concept_name", "assessments", "mastery_sum",
+            "mastered", "student_ids", "struggles", "events"
+        )
+    )
+
+
+def start_concept_stats_stream(
+    spark: SparkSession,
+    source_dir: Optional[str] = None,
+    output_dir: Optional[str] = None,
+    checkpoint_dir: Optional[str] = None
+) -> StreamingQuery:
+    """Maintains per-concept, per-window event aggregates as Parquet.
+
+    Windows are appended once the watermark passes their end, so each one is
+    written exactly once and never revised; the checkpoint makes restarts
+    resume from the last committed batch instead of re-reading the archive.
+    """
+    output_dir = output_dir or settings.STREAM_OUTPUT_DIR
+    checkpoint_dir = checkpoint_dir or settings.STREAM_CHECKPOINT_DIR
+
+    query = (
+        concept_window_stats(read_events(spark, source_dir))
+        .writeStream
+        .queryName(CONCEPT_WINDOWS)
+        .outputMode("append")
+        .format("parquet")
+        .partitionBy("window_date")
+        .option("path", os.path.join(output_dir, CONCEPT_WINDOWS))
+        .option("checkpointLocation", os.path.join(checkpoint_dir, CONCEPT_WINDOWS))
+        .trigger(processingTime=settings.STREAM_TRIGGER_INTERVAL)
+        .start()
+    )
+    logger.info(f"Started {CONCEPT_WINDOWS} stream into {output_dir}")
+    return query
@@ -0,0 +1,132 @@
+from typing import Dict, Any, Optional
+from fastapi import Request
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.events.event_log import try_lock, unlock
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+CONCEPT_STATS_VIEW = "concept_stats"
+
+
+class ConceptStatsView:
+    """Per-concept mastery and struggle aggregates materialized as
+    ``ConceptStats`` nodes.
+
+    One worker rebuilds the view every ``VIEW_REFRESH_INTERVAL`` seconds in
+    concept-id pages, so no single transaction touches every edge; the
+    dashboard endpoints then page over the small, indexed view instead of
+    aggregating ``MASTERS``/``STRUGGLES_WITH`` on every poll.
+    """
+
+    def __init__(self, neo4j_client: Neo4jClient):
+        self._client = neo4j_client
+        self._lock_path = os.path.join(settings.ANALYTICS_OUTPUT_DIR, f".{CONCEPT_STATS_VIEW}.lock")
+        os.makedirs(settings.ANALYTICS_OUTPUT_DIR, exist_ok=True)
+
+    async def ensure_schema(self) -> None:
+        await self._client.create_constraint("ConceptStats", "concept_id")
+        await self._client.create_index("ConceptStats", "difficulty_score")
+        await self._client.create_index("ConceptStats", "struggle_count")
+        await self._client.create_constraint("AnalyticsView", "name")
+
+    async def state(self) -> Optional[Dict[str, Any]]:
+        result = await self._client.execute_query(queries.GET_VIEW_STATE, {"name": CONCEPT_STATS_VIEW})
+        return result[0] if result else None
+
+    async def refresh(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        run_id = uuid.uuid4().hex
+        cursor = ""
+        refreshed = 0
+
+        while True:
+            result = await self._client.execute_query(queries.REFRESH_CONCEPT_STATS_PAGE, {
+                "after": cursor,
+                "limit": settings.VIEW_REFRESH_PAGE_SIZE,
+                "top_patterns": settings.VIEW_TOP_PATTERNS,
+                "run_id": run_id
+            })
+            page = result[0] if result else None
+            if not page or not page["refreshed"]:
+                break
+            refreshed += page["refreshed"]
+            cursor = page["cursor"]
+
+        await self._client.execute_write(queries.DELETE_STALE_CONCEPT_STATS, {"run_id": run_id})
+        duration_ms = int((time.monotonic() - started) * 1000)
+        await self._client.execute_write(queries.COMPLETE_VIEW_REFRESH, {
+            "name": CONCEPT_STATS_VIEW,
+            "run_id": run_id,
+            "duration_ms": duration_ms
+        })
+        logger.info(f"Refreshed {CONCEPT_STATS_VIEW} view for {refreshed} concepts in {duration_ms}ms")
+        return {"run_id": run_id, "concepts_refreshed": refreshed, "duration_ms": duration_ms}
+
+    async def refresh_if_due(self) -> Optional[Dict[str, Any]]:
+        open(self._lock_path, "a").close()
+        fd = try_lock(self._lock_path)
+        if fd is None:
+            return None
+        try:
+            state = await self.state()
+            if state is not None and state["age_seconds"] < settings.VIEW_REFRESH_INTERVAL:
+                return None
+            return await self.refresh()
+        finally:
+            unlock(fd)
+
+    async def difficulty_page(self, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        state = await self.state()
+        if state is None:
+            return None
+        rows = await self._client.execute_query(
+            queries.GET_CONCEPT_STATS_BY_DIFFICULTY, {"offset": offset, "limit": limit}
+        )
+        return {"rows": rows, "total": state["assessed_concepts"], "state": state}
+
+    async def struggle_page(self, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        state = await self.state()
+        if state is None:
+            return None
+        rows = await self._client.execute_query(
+            queries.GET_CONCEPT_STATS_BY_STRUGGLES, {"offset": offset, "limit": limit}
+        )
+        return {"rows": rows, "total": state["struggled_concepts"], "state": state}
+
+
+def view_freshness(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "source": "materialized",
+        "refreshed_at": state["refreshed_at"],
+        "age_seconds": state["age_seconds"],
+        "refresh_interval_seconds": settings.VIEW_REFRESH_INTERVAL,
+        "stale": state["age_seconds"] > 2 * settings.VIEW_REFRESH_INTERVAL
+    }
+
+
+async def run_view_refresh_loop(view: ConceptStatsView) -> None:
+    try:
+        await view.ensure_schema()
+    except Exception as e:
+        logger.error(f"Creating {CONCEPT_STATS_VIEW} view schema failed: {str(e)}")
+    while True:
+        try:
+            await view.refresh_if_due()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Refreshing {CONCEPT_STATS_VIEW} view failed: {str(e)}")
+        await asyncio.sleep(settings.VIEW_REFRESH_POLL_INTERVAL)
+
+
+def get_concept_stats_view(request: Request) -> ConceptStatsView:
+    return request.app.state.concept_stats_view
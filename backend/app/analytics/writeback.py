@@ -0,0 +1,143 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Iterator, List, Sequence
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+
+import pyarrow.dataset as ds
+
+from app.graph.neo4j_client import Neo4jClient
+from app.analytics.outputs import read_manifest
+from app.analytics.snapshot_exporter import SnapshotExporter
+from app.analytics.job_service import AnalyticsJobService
+from app.events.event_log import try_lock, unlock
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def iter_output_batches(
+    output_path: str,
+    dataset: str,
+    columns: Sequence[str],
+    filter: Optional[ds.Expression] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[List[Dict[str, Any]]]:
+    source = ds.dataset(
+        read_manifest(output_path)["datasets"][dataset]["path"],
+        format="parquet",
+        partitioning="hive"
+    )
+    for batch in source.to_batches(
+        columns=list(columns),
+        filter=filter,
+        batch_size=batch_size or settings.ANALYTICS_WRITEBACK_BATCH_SIZE
+    ):
+        rows = batch.to_pylist()
+        if rows:
+            yield rows
+
+
+class ScheduledWriteback(ABC):
+    """Exports a snapshot, runs one analytics job on it and writes the
+    results back into the graph, at most once per ``interval`` seconds."""
+
+    name: str
+    job_type: str
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        job_service: AnalyticsJobService,
+        interval: int,
+        exporter: Optional[SnapshotExporter] = None
+    ):
+        self._client = neo4j_client
+        self._jobs = job_service
+        self._interval = interval
+        self._exporter = exporter or SnapshotExporter(neo4j_client)
+        self._state_dir = settings.ANALYTICS_OUTPUT_DIR
+        os.makedirs(self._state_dir, exist_ok=True)
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self._state_dir, f"{self.name}_state.json")
+
+    def last_run(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self._state_path):
+            return None
+        with open(self._state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self._state_path)
+
+    def is_due(self) -> bool:
+        last = self.last_run()
+        if last is None:
+            return True
+        elapsed = datetime.utcnow() - datetime.fromisoformat(last["completed_at"])
+        return elapsed.total_seconds() >= self._interval
+
+    def job_params(self, snapshot_id: str) -> Dict[str, Any]:
+        return {"snapshot_id": snapshot_id}
+
+    @abstractmethod
+    async def apply(self, output_path: str) -> Dict[str, int]:
+        ...
+
+    async def run(self) -> Dict[str, Any]:
+        started_at = datetime.utcnow()
+        snapshot_path = await self._exporter.export()
+        snapshot_id = os.path.basename(snapshot_path)
+
+        submitted, _ = await self._jobs.submit(self.job_type, self.job_params(snapshot_id))
+        job = await self._jobs.wait(submitted["job_id"])
+        if job["status"] != "succeeded":
+            raise RuntimeError(f"{self.job_type} job {job['job_id']} failed: {job['error']}")
+        result = job["result"]
+        counts = await self.apply(result["output_path"])
+
+        state = {
+            "snapshot_id": snapshot_id,
+            "job_id": job["job_id"],
+            "output_path": result["output_path"],
+            **counts,
+            "metrics": result["metrics"],
+            "started_at": started_at.isoformat(),
+            "completed_at": datetime.utcnow().isoformat()
+        }
+        self._save_state(state)
+        logger.info(f"{self.name} write-back from snapshot {snapshot_id}: {counts}")
+        return state
+
+    async def run_if_due(self) -> Optional[Dict[str, Any]]:
+        # API workers all poll; the lock plus the persisted completion time
+        # make sure only one of them runs each scheduled write-back.
+        lock_path = os.path.join(self._state_dir, f".{self.name}.lock")
+        open(lock_path, "a").close()
+        fd = try_lock(lock_path)
+        if fd is None:
+            return None
+        try:
+            if not self.is_due():
+                return None
+            return await self.run()
+        finally:
+            unlock(fd)
+
+
+async def run_writeback_loop(pipeline: ScheduledWriteback) -> None:
+    while True:
+        try:
+            await pipeline.run_if_due()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled {pipeline.name} write-back failed: {str(e)}")
+        await asyncio.sleep(settings.ANALYTICS_WRITEBACK_POLL_INTERVAL)
@@ -0,0 +1,248 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import math
+import os
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+_SCALAR_TYPES = (str, int, float, bool)
+
+
+def _answer_set(value: Any) -> Optional[frozenset]:
+    """``value`` as a set of choices, or ``None`` unless it is a list of
+    scalars; a bare string is not a list of characters."""
+    if not isinstance(value, (list, tuple, set)):
+        return None
+    if not all(isinstance(v, _SCALAR_TYPES) for v in value):
+        return None
+    return frozenset(value)
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    try:
+        return math.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+
+class Scorer(ABC):
+
+    @abstractmethod
+    def score(self, question: Dict[str, Any], response: Any) -> float:
+        ...
+
+    def validate(self, question: Dict[str, Any]) -> Optional[str]:
+        """Why ``question`` cannot be scored, or ``None`` if it can."""
+        return None
+
+
+class ExactScorer(Scorer):
+
+    def score(self, question: Dict[str, Any], response: Any) -> float:
+        return 1.0 if response == question.get("correct_answer") else 0.0
+
+
+class NumericToleranceScorer(Scorer):
+
+    def score(self, question: Dict[str, Any], response: Any) -> float:
+        try:
+            expected = float(question.get("correct_answer"))
+            actual = float(response)
+        except (TypeError, ValueError):
+            return 0.0
+
+        try:
+            tolerance = float(question.get("tolerance", 1e-6))
+        except (TypeError, ValueError):
+            return 0.0
+        if question.get("relative_tolerance"):
+            return 1.0 if math.isclose(actual, expected, rel_tol=tolerance) else 0.0
+        return 1.0 if abs(actual - expected) <= tolerance else 0.0
+
+    def validate(self, question: Dict[str, Any]) -> Optional[str]:
+        if not _is_number(question.get("correct_answer")):
+            return "correct_answer must be a number"
+        tolerance = question.get("tolerance", 1e-6)
+        if not _is_number(tolerance) or float(tolerance) < 0:
+            return "tolerance must be a non-negative number"
+        return None
+
+
+def _validate_choices(question: Dict[str, Any]) -> Optional[str]:
+    if not _answer_set(question.get("correct_answer")):
+        return "correct_answer must be a non-empty list of scalar choices"
+    return None
+
+
+class MultiSelectScorer(Scorer):
+
+    def score(self, question: Dict[str, Any], response: Any) -> float:
+        chosen = _answer_set(response)
+        expected = _answer_set(question.get("correct_answer"))
+        if chosen is None or not expected:
+            return 0.0
+        return 1.0 if chosen == expected else 0.0
+
+    def validate(self, question: Dict[str, Any]) -> Optional[str]:
+        return _validate_choices(question)
+
+
+class PartialCreditScorer(Scorer):
+
+    def score(self, question: Dict[str, Any], response: Any) -> float:
+        expected = _answer_set(question.get("correct_answer"))
+        chosen = _answer_set(response)
+        if not expected or chosen is None:
+            return 0.0
+
+        credit = (len(chosen & expected) - len(chosen - expected)) / len(expected)
+        return min(max(credit, 0.0), 1.0)
+
+    def validate(self, question: Dict[str, Any]) -> Optional[str]:
+        return _validate_choices(question)
+
+
+DEFAULT_SCORERS: Dict[str, Scorer] = {
+    "exact": ExactScorer(),
+    "numeric": NumericToleranceScorer(),
+    "multi_select": MultiSelectScorer(),
+    "partial_credit": PartialCreditScorer(),
+}
+
+
+@dataclass
+class GradingResult:
+    score: float
+    questions_correct: int
+    questions_total: int
+    feedback: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class GradingEngine:
+
+    def __init__(self, scorers: Optional[Dict[str, Scorer]] = None, max_workers: Optional[int] = None):
+        self._scorers = dict(scorers or DEFAULT_SCORERS)
+        self._max_workers = min(max_workers or settings.GRADING_WORKERS, os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def register_scorer(self, name: str, scorer: Scorer) -> None:
+        self._scorers[name] = scorer
+
+    def unknown_scoring_types(self, questions: Sequence[Dict[str, Any]]) -> List[str]:
+        return sorted({
+            question.get("scoring", "exact")
+            for question in questions
+            if question.get("scoring", "exact") not in self._scorers
+        })
+
+    def invalid_questions(self, questions: Sequence[Dict[str, Any]]) -> List[str]:
+        """One message per question its scorer cannot grade; call after
+        ``unknown_scoring_types`` has come back empty."""
+        problems = []
+        for index, question in enumerate(questions):
+            problem = self._scorer_for(question).validate(question)
+            if problem:
+                problems.append(f"question {question.get('id', index)}: {problem}")
+        return problems
+
+    def _scorer_for(self, question: Dict[str, Any]) -> Scorer:
+        scoring = question.get("scoring", "exact")
+        scorer = self._scorers.get(scoring)
+        if scorer is None:
+            raise ValueError(f"Unknown scoring type: {scoring}")
+        return scorer
+
+    def grade(self, questions: Sequence[Dict[str, Any]], answers: Sequence[Dict[str, Any]]) -> GradingResult:
+        responses: Dict[Any, Any] = {}
+        for answer in answers:
+            responses.setdefault(answer.get("question_id"), answer.get("response"))
+
+        total_credit = 0.0
+        correct_count = 0
+        feedback = []
+
+        for question in questions:
+            question_id = question.get("id")
+            student_answer = responses.get(question_id)
+
+            credit = self._scorer_for(question).score(question, student_answer)
+            is_correct = credit >= 1.0
+            total_credit += credit
+            if is_correct:
+                correct_count += 1
+
+            feedback.append({
+                "question_id": question_id,
+                "question": question.get("text"),
+                "student_answer": student_answer,
+                "correct_answer": question.get("correct_answer"),
+                "is_correct": is_correct,
+                "credit": credit,
+                "explanation": question.get("explanation", "")
+            })
+
+        total_questions = len(questions)
+        return GradingResult(
+            score=total_credit / total_questions if total_questions > 0 else 0,
+            questions_correct=correct_count,
+            questions_total=total_questions,
+            feedback=feedback
+        )
+
+    def grade_many(self, submissions: Sequence[Tuple[Sequence[Dict[str, Any]], Sequence[Dict[str, Any]]]]) -> List[GradingResult]:
+        return [self.grade(questions, answers) for questions, answers in submissions]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    async def grade_batch(
+        self,
+        submissions: Sequence[Tuple[Sequence[Dict[str, Any]], Sequence[Dict[str, Any]]]],
+        min_parallel: int = 256
+    ) -> List[GradingResult]:
+        if self._max_workers <= 1 or len(submissions) < min_parallel:
+            return await asyncio.to_thread(self.grade_many, submissions)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunk_size = math.ceil(len(submissions) / (self._max_workers * 2))
+        chunks = [
+            list(submissions[i:i + chunk_size])
+            for i in range(0, len(submissions), chunk_size)
+        ]
+
+        graded = await asyncio.gather(*[
+            loop.run_in_executor(executor, self.grade_many, chunk)
+            for chunk in chunks
+        ])
+
+        logger.info(f"Graded {len(submissions)} submissions in {len(chunks)} chunks")
+        return [result for chunk in graded for result in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+
+grading_engine = GradingEngine()
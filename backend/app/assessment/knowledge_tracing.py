@@ -0,0 +1,189 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import math
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BKTParameters:
+    p_init: float
+    p_learn: float
+    p_slip: float
+    p_guess: float
+
+    @classmethod
+    def from_settings(cls) -> 'BKTParameters':
+        return cls(
+            p_init=settings.BKT_P_INIT,
+            p_learn=settings.BKT_P_LEARN,
+            p_slip=settings.BKT_P_SLIP,
+            p_guess=settings.BKT_P_GUESS
+        )
+
+
+@dataclass
+class PrerequisiteEvidence:
+    concept_id: str
+    strength: float
+    prior: Optional[float]
+    prior_confidence: Optional[float] = None
+
+
+@dataclass
+class ReplayResult:
+    student_index: np.ndarray
+    concept_index: np.ndarray
+    mastery: np.ndarray
+    observations: np.ndarray
+
+
+class KnowledgeTracer:
+
+    def __init__(self, params: Optional[BKTParameters] = None, propagation_weight: Optional[float] = None):
+        self._params = params or BKTParameters.from_settings()
+        self._propagation_weight = (
+            propagation_weight if propagation_weight is not None
+            else settings.BKT_PREREQ_PROPAGATION
+        )
+
+    @property
+    def params(self) -> BKTParameters:
+        return self._params
+
+    def _posterior(self, prior: np.ndarray, correct: np.ndarray) -> np.ndarray:
+        p = self._params
+        if_correct = prior * (1 - p.p_slip) / (prior * (1 - p.p_slip) + (1 - prior) * p.p_guess)
+        if_wrong = prior * p.p_slip / (prior * p.p_slip + (1 - prior) * (1 - p.p_guess))
+        posterior = np.where(correct, if_correct, if_wrong)
+        return posterior + (1 - posterior) * p.p_learn
+
+    def update(self, prior: Optional[float], responses: Sequence[bool]) -> float:
+        mastery = np.float64(self._params.p_init if prior is None else prior)
+        for correct in responses:
+            mastery = self._posterior(mastery, np.bool_(correct))
+        return float(np.clip(mastery, 0.0, 1.0))
+
+    def confidence(self, prior_confidence: Optional[float], num_responses: int) -> float:
+        remaining = 1.0 - (prior_confidence or 0.0)
+        return float(min(1.0 - remaining * math.exp(-num_responses / settings.BKT_CONFIDENCE_SCALE), 1.0))
+
+    def propagate(
+        self,
+        responses: Sequence[bool],
+        prerequisites: Sequence[PrerequisiteEvidence]
+    ) -> Dict[str, Tuple[float, float]]:
+        if not prerequisites or not responses:
+            return {}
+
+        updates = {}
+        for prereq in prerequisites:
+            prior = self._params.p_init if prereq.prior is None else prereq.prior
+            full_update = self.update(prior, responses)
+            weight = min(max(prereq.strength, 0.0), 1.0) * self._propagation_weight
+            if weight <= 0:
+                continue
+            mastery = prior + weight * (full_update - prior)
+            confidence = self.confidence(prereq.prior_confidence, int(round(len(responses) * weight)))
+            updates[prereq.concept_id] = (round(mastery, 6), round(confidence, 6))
+        return updates
+
+    def replay(
+        self,
+        student_index: np.ndarray,
+        concept_index: np.ndarray,
+        correct: np.ndarray,
+        timestamps: Optional[np.ndarray] = None
+    ) -> ReplayResult:
+        student_index = np.asarray(student_index)
+        concept_index = np.asarray(concept_index)
+        correct = np.asarray(correct, dtype=bool)
+        if timestamps is None:
+            timestamps = np.arange(student_index.shape[0])
+
+        if student_index.shape[0] == 0:
+            empty = np.array([], dtype=np.int64)
+            return ReplayResult(empty, empty, np.array([], dtype=np.float64), empty)
+
+        order = np.lexsort((timestamps, concept_index, student_index))
+        students = student_index[order]
+        concepts = concept_index[order]
+        outcomes = correct[order]
+
+        pair_start = np.empty(students.shape[0], dtype=bool)
+        pair_start[0] = True
+        pair_start[1:] = (students[1:] != students[:-1]) | (concepts[1:] != concepts[:-1])
+        pair_id = np.cumsum(pair_start) - 1
+        starts = np.flatnonzero(pair_start)
+        rank = np.arange(students.shape[0]) - starts[pair_id]
+
+        mastery = np.full(starts.shape[0], self._params.p_init, dtype=np.float64)
+
+        by_rank = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2))
+        for step in range(rank.max() + 1):
+            selected = by_rank[bounds[step]:bounds[step + 1]]
+            pairs = pair_id[selected]
+            mastery[pairs] = self._posterior(mastery[pairs], outcomes[selected])
+
+        return ReplayResult(
+            student_index=students[starts],
+            concept_index=concepts[starts],
+            mastery=np.clip(mastery, 0.0, 1.0),
+            observations=np.bincount(pair_id)
+        )
+
+    def replay_records(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        student_ids: Dict[str, int] = {}
+        concept_ids: Dict[str, int] = {}
+        students, concepts, outcomes, timestamps = [], [], [], []
+
+        for record in records:
+            students.append(student_ids.setdefault(record["student_id"], len(student_ids)))
+            concepts.append(concept_ids.setdefault(record["concept_id"], len(concept_ids)))
+            outcomes.append(bool(record["correct"]))
+            timestamps.append(record.get("timestamp", len(timestamps)))
+
+        result = self.replay(
+            np.array(students, dtype=np.int64),
+            np.array(concepts, dtype=np.int64),
+            np.array(outcomes, dtype=bool),
+            np.array(timestamps)
+        )
+
+        student_names = list(student_ids)
+        concept_names = list(concept_ids)
+        return [
+            {
+                "student_id": student_names[s],
+                "concept_id": concept_names[c],
+                "mastery_level": round(float(m), 6),
+                "confidence": round(self.confidence(None, int(n)), 6)
+            }
+            for s, c, m, n in zip(result.student_index, result.concept_index, result.mastery, result.observations)
+        ]
+
+
+def response_records(assessments: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-question outcomes of completed assessments, in the shape
+    ``KnowledgeTracer.replay_records`` takes."""
+    records = []
+    for assessment in assessments:
+        timestamp = datetime.fromisoformat(assessment["created_at"]).timestamp()
+        for correct in assessment.get("responses") or []:
+            records.append({
+                "student_id": assessment["student_id"],
+                "concept_id": assessment["concept_id"],
+                "correct": correct,
+                "timestamp": timestamp
+            })
+    return records
+
+
+knowledge_tracer = KnowledgeTracer()
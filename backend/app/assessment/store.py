@@ -0,0 +1,368 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import Request
+from datetime import datetime
+import asyncio
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+EXPIRY_INDEX_KEY = "assessments:expiry"
+
+
+def _expires_at(assessment: Dict[str, Any]) -> Optional[float]:
+    ttl = (
+        settings.ASSESSMENT_COMPLETED_TTL
+        if assessment.get("status") == "completed"
+        else settings.ASSESSMENT_PENDING_TTL
+    )
+    return time.time() + ttl if ttl > 0 else None
+
+
+def _history_entry(assessment: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "assessment_id": assessment["assessment_id"],
+        "concept_id": assessment["concept_id"],
+        "assessment_type": assessment["assessment_type"],
+        "score": assessment.get("score"),
+        "mastery_level": assessment.get("mastery_level"),
+        "created_at": assessment["created_at"],
+        "status": assessment["status"]
+    }
+
+
+class AssessmentStore(ABC):
+
+    @abstractmethod
+    async def put(self, assessment: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def history(self, student_id: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        ...
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    async def completed(self) -> List[Dict[str, Any]]:
+        """Every live completed assessment, for batch replay."""
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class _SQLiteShard:
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS assessments (
+        assessment_id TEXT PRIMARY KEY,
+        student_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        expires_at REAL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_assessments_student_created
+        ON assessments (student_id, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_assessments_expires
+        ON assessments (expires_at) WHERE expires_at IS NOT NULL;
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self.SCHEMA)
+
+    def put(self, assessment: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO assessments (assessment_id, student_id, status, created_at, expires_at, payload)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(assessment_id) DO UPDATE SET
+                    status = excluded.status,
+                    expires_at = excluded.expires_at,
+                    payload = excluded.payload
+                """,
+                (
+                    assessment["assessment_id"],
+                    assessment["student_id"],
+                    assessment["status"],
+                    assessment["created_at"],
+                    _expires_at(assessment),
+                    json.dumps(assessment)
+                )
+            )
+
+    def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT payload FROM assessments
+                WHERE assessment_id = ? AND (expires_at IS NULL OR expires_at > ?)
+                """,
+                (assessment_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, student_id: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT payload FROM assessments
+                WHERE student_id = ? AND (expires_at IS NULL OR expires_at > ?)
+                ORDER BY created_at DESC
+                LIMIT ?
+                """,
+                (student_id, now, limit)
+            ).fetchall()
+            total = self._conn.execute(
+                """
+                SELECT count(*) FROM assessments
+                WHERE student_id = ? AND (expires_at IS NULL OR expires_at > ?)
+                """,
+                (student_id, now)
+            ).fetchone()[0]
+        return [_history_entry(json.loads(row[0])) for row in rows], total
+
+    def completed(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT payload FROM assessments
+                WHERE status = 'completed' AND (expires_at IS NULL OR expires_at > ?)
+                """,
+                (time.time(),)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM assessments WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteAssessmentStore(AssessmentStore):
+
+    def __init__(self, path: Optional[str] = None, num_shards: Optional[int] = None):
+        self._path = path or settings.ASSESSMENT_STORE_PATH
+        self._num_shards = max(num_shards or settings.ASSESSMENT_STORE_SHARDS, 1)
+        os.makedirs(self._path, exist_ok=True)
+        self._shards = [
+            _SQLiteShard(os.path.join(self._path, f"assessments_{i}.db"))
+            for i in range(self._num_shards)
+        ]
+        logger.info(f"SQLite assessment store at {self._path} ({self._num_shards} shards)")
+
+    def _shard(self, assessment_id: str) -> _SQLiteShard:
+        return self._shards[zlib.crc32(assessment_id.encode()) % self._num_shards]
+
+    async def put(self, assessment: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._shard(assessment["assessment_id"]).put, assessment)
+
+    async def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._shard(assessment_id).get, assessment_id)
+
+    async def history(self, student_id: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        results = await asyncio.gather(*[
+            asyncio.to_thread(shard.history, student_id, limit)
+            for shard in self._shards
+        ])
+
+        merged = heapq.merge(
+            *[entries for entries, _ in results],
+            key=lambda entry: entry["created_at"],
+            reverse=True
+        )
+        entries = [entry for _, entry in zip(range(limit), merged)]
+        return entries, sum(total for _, total in results)
+
+    async def purge_expired(self) -> int:
+        purged = await asyncio.gather(*[
+            asyncio.to_thread(shard.purge_expired)
+            for shard in self._shards
+        ])
+        return sum(purged)
+
+    async def completed(self) -> List[Dict[str, Any]]:
+        results = await asyncio.gather(*[
+            asyncio.to_thread(shard.completed)
+            for shard in self._shards
+        ])
+        return [assessment for shard in results for assessment in shard]
+
+    async def close(self) -> None:
+        for shard in self._shards:
+            shard.close()
+
+
+class RedisAssessmentStore(AssessmentStore):
+
+    def __init__(self, url: Optional[str] = None):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("redis package is required for ASSESSMENT_STORE_BACKEND=redis")
+
+        self._redis = aioredis.from_url(url or settings.REDIS_URL, decode_responses=True)
+
+    @staticmethod
+    def _key(assessment_id: str) -> str:
+        return f"assessment:{assessment_id}"
+
+    @staticmethod
+    def _student_key(student_id: str) -> str:
+        return f"assessments:student:{{{student_id}}}"
+
+    @staticmethod
+    def _expiry_member(assessment: Dict[str, Any]) -> str:
+        return json.dumps([assessment["student_id"], assessment["assessment_id"]])
+
+    async def put(self, assessment: Dict[str, Any]) -> None:
+        expires_at = _expires_at(assessment)
+        created = datetime.fromisoformat(assessment["created_at"]).timestamp()
+
+        pipe = self._redis.pipeline(transaction=False)
+        # The expiry index lets purge_expired() find the student index
+        # entries whose payload Redis has expired.
+        if expires_at is not None:
+            pipe.set(self._key(assessment["assessment_id"]), json.dumps(assessment), exat=int(expires_at))
+            pipe.zadd(EXPIRY_INDEX_KEY, {self._expiry_member(assessment): expires_at})
+        else:
+            pipe.set(self._key(assessment["assessment_id"]), json.dumps(assessment))
+            pipe.zrem(EXPIRY_INDEX_KEY, self._expiry_member(assessment))
+        pipe.zadd(self._student_key(assessment["student_id"]), {assessment["assessment_id"]: created})
+        await pipe.execute()
+
+    async def get(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        payload = await self._redis.get(self._key(assessment_id))
+        return json.loads(payload) if payload else None
+
+    async def history(self, student_id: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        index_key = self._student_key(student_id)
+        entries = []
+        expired = []
+        start = 0
+        page_size = max(limit, 1)
+        # Page past index entries whose payload has already expired, so
+        # older live assessments still fill the page.
+        while len(entries) < limit:
+            assessment_ids = await self._redis.zrevrange(index_key, start, start + page_size - 1)
+            if not assessment_ids:
+                break
+            start += len(assessment_ids)
+            payloads = await self._redis.mget([self._key(aid) for aid in assessment_ids])
+            for aid, payload in zip(assessment_ids, payloads):
+                if payload is None:
+                    expired.append(aid)
+                elif len(entries) < limit:
+                    entries.append(_history_entry(json.loads(payload)))
+
+        # The rest of the index can hold expired ids too; drop them before
+        # counting so the total matches what paging can return.
+        batch = settings.ASSESSMENT_PURGE_BATCH_SIZE
+        while True:
+            assessment_ids = await self._redis.zrevrange(index_key, start, start + batch - 1)
+            if not assessment_ids:
+                break
+            start += len(assessment_ids)
+            pipe = self._redis.pipeline(transaction=False)
+            for aid in assessment_ids:
+                pipe.exists(self._key(aid))
+            live = await pipe.execute()
+            expired.extend(aid for aid, exists in zip(assessment_ids, live) if not exists)
+
+        if expired:
+            await self._redis.zrem(index_key, *expired)
+
+        total = await self._redis.zcard(index_key)
+        return entries, total
+
+    async def purge_expired(self) -> int:
+        # Payloads expire through Redis TTLs; this drops the index entries
+        # they leave behind.
+        purged = 0
+        while True:
+            members = await self._redis.zrangebyscore(
+                EXPIRY_INDEX_KEY, 0, time.time(), start=0, num=settings.ASSESSMENT_PURGE_BATCH_SIZE
+            )
+            if not members:
+                return purged
+            pipe = self._redis.pipeline(transaction=False)
+            for member in members:
+                student_id, assessment_id = json.loads(member)
+                pipe.zrem(self._student_key(student_id), assessment_id)
+            pipe.zrem(EXPIRY_INDEX_KEY, *members)
+            await pipe.execute()
+            purged += len(members)
+
+    async def completed(self) -> List[Dict[str, Any]]:
+        assessments = []
+        keys = []
+        async for key in self._redis.scan_iter(match=self._key("*"), count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                assessments.extend(await self._completed_payloads(keys))
+                keys = []
+        if keys:
+            assessments.extend(await self._completed_payloads(keys))
+        return assessments
+
+    async def _completed_payloads(self, keys: List[str]) -> List[Dict[str, Any]]:
+        payloads = [json.loads(p) for p in await self._redis.mget(keys) if p]
+        return [a for a in payloads if a.get("status") == "completed"]
+
+    async def close(self) -> None:
+        await self._redis.close()
+
+
+def create_assessment_store() -> AssessmentStore:
+    backend = settings.ASSESSMENT_STORE_BACKEND.lower()
+    if backend == "redis":
+        return RedisAssessmentStore()
+    if backend == "sqlite":
+        return SQLiteAssessmentStore()
+    raise ValueError(f"Unknown assessment store backend: {settings.ASSESSMENT_STORE_BACKEND}")
+
+
+async def run_expiry_loop(store: AssessmentStore) -> None:
+    while True:
+        await asyncio.sleep(settings.ASSESSMENT_PURGE_INTERVAL)
+        try:
+            purged = await store.purge_expired()
+            if purged:
+                logger.info(f"Purged {purged} expired assessments")
+        except Exception as e:
+            logger.error(f"Assessment expiry sweep failed: {str(e)}")
+
+
+def get_assessment_store(request: Request) -> AssessmentStore:
+    return request.app.state.assessment_store
@@ -20,11 +20,61 @@ class Settings(BaseSettings):
     GROQ_MODEL: str = Field(default="llama3-70b-8192", env="GROQ_MODEL")
     GROQ_MAX_TOKENS: int = Field(default=2048, env="GROQ_MAX_TOKENS")
     GROQ_TEMPERATURE: float = Field(default=0.1, env="GROQ_TEMPERATURE")
+    GROQ_EXTRACTION_RPM: int = Field(default=30, env="GROQ_EXTRACTION_RPM")
+    GROQ_EXTRACTION_TPM: int = Field(default=0, env="GROQ_EXTRACTION_TPM")
     
     SPARK_APP_NAME: str = "KAG_Analytics"
     SPARK_MASTER: str = Field(default="local[*]", env="SPARK_MASTER")
     SPARK_DRIVER_MEMORY: str = Field(default="4g", env="SPARK_DRIVER_MEMORY")
     
+    ANALYTICS_SNAPSHOT_DIR: str = Field(default="data/snapshots", env="ANALYTICS_SNAPSHOT_DIR")
+    ANALYTICS_EXPORT_PAGE_SIZE: int = Field(default=5000, env="ANALYTICS_EXPORT_PAGE_SIZE")
+    ANALYTICS_STUDENT_BUCKETS: int = Field(default=16, env="ANALYTICS_STUDENT_BUCKETS")
+    ANALYTICS_SESSION_SORT_PARTITIONS: int = Field(default=64, env="ANALYTICS_SESSION_SORT_PARTITIONS")
+    ANALYTICS_OUTPUT_DIR: str = Field(default="data/analytics", env="ANALYTICS_OUTPUT_DIR")
+    ANALYTICS_ENGINE: str = Field(default="auto", env="ANALYTICS_ENGINE")
+    ANALYTICS_ARROW_MAX_ROWS: int = Field(default=5_000_000, env="ANALYTICS_ARROW_MAX_ROWS")
+    
+    ANALYTICS_JOB_DB: str = Field(default="data/analytics/jobs.db", env="ANALYTICS_JOB_DB")
+    ANALYTICS_JOB_WORKERS: int = Field(default=1, env="ANALYTICS_JOB_WORKERS")
+    ANALYTICS_MAX_RUNNING_JOBS: int = Field(default=2, env="ANALYTICS_MAX_RUNNING_JOBS")
+    ANALYTICS_JOB_POLL_INTERVAL: float = Field(default=2.0, env="ANALYTICS_JOB_POLL_INTERVAL")
+    ANALYTICS_JOB_LEASE_SECONDS: int = Field(default=120, env="ANALYTICS_JOB_LEASE_SECONDS")
+    
+    PARTITION_MAX_IMBALANCE: float = Field(default=0.05, env="PARTITION_MAX_IMBALANCE")
+    PARTITION_MAX_ITERATIONS: int = Field(default=30, env="PARTITION_MAX_ITERATIONS")
+    
+    ANALYTICS_WRITEBACK_POLL_INTERVAL: int = Field(default=300, env="ANALYTICS_WRITEBACK_POLL_INTERVAL")
+    ANALYTICS_WRITEBACK_BATCH_SIZE: int = Field(default=1000, env="ANALYTICS_WRITEBACK_BATCH_SIZE")
+    
+    CALIBRATION_ENABLED: bool = Field(default=False, env="CALIBRATION_ENABLED")
+    CALIBRATION_INTERVAL: int = Field(default=86400, env="CALIBRATION_INTERVAL")
+    CALIBRATION_MIN_SAMPLES: int = Field(default=5, env="CALIBRATION_MIN_SAMPLES")
+    
+    SEQUENCE_FEEDBACK_ENABLED: bool = Field(default=False, env="SEQUENCE_FEEDBACK_ENABLED")
+    SEQUENCE_FEEDBACK_INTERVAL: int = Field(default=86400, env="SEQUENCE_FEEDBACK_INTERVAL")
+    SEQUENCE_MIN_SUPPORT: float = Field(default=0.01, env="SEQUENCE_MIN_SUPPORT")
+    SEQUENCE_MAX_PATTERN_LENGTH: int = Field(default=5, env="SEQUENCE_MAX_PATTERN_LENGTH")
+    SEQUENCE_MIN_TRANSITIONS: int = Field(default=10, env="SEQUENCE_MIN_TRANSITIONS")
+    SEQUENCE_STRENGTH_PRIOR: float = Field(default=10.0, env="SEQUENCE_STRENGTH_PRIOR")
+    SEQUENCE_MIN_EDGE_STRENGTH: float = Field(default=0.5, env="SEQUENCE_MIN_EDGE_STRENGTH")
+    
+    VIEW_REFRESH_ENABLED: bool = Field(default=True, env="VIEW_REFRESH_ENABLED")
+    VIEW_REFRESH_INTERVAL: int = Field(default=300, env="VIEW_REFRESH_INTERVAL")
+    VIEW_REFRESH_POLL_INTERVAL: int = Field(default=30, env="VIEW_REFRESH_POLL_INTERVAL")
+    VIEW_REFRESH_PAGE_SIZE: int = Field(default=500, env="VIEW_REFRESH_PAGE_SIZE")
+    VIEW_TOP_PATTERNS: int = Field(default=5, env="VIEW_TOP_PATTERNS")
+    
+    STREAM_STATS_ENABLED: bool = Field(default=False, env="STREAM_STATS_ENABLED")
+    STREAM_OUTPUT_DIR: str = Field(default="data/analytics/stream", env="STREAM_OUTPUT_DIR")
+    STREAM_CHECKPOINT_DIR: str = Field(default="data/analytics/stream_checkpoints", env="STREAM_CHECKPOINT_DIR")
+    STREAM_WINDOW: str = Field(default="5 minutes", env="STREAM_WINDOW")
+    STREAM_WATERMARK: str = Field(default="10 minutes", env="STREAM_WATERMARK")
+    STREAM_TRIGGER_INTERVAL: str = Field(default="30 seconds", env="STREAM_TRIGGER_INTERVAL")
+    STREAM_MAX_FILES_PER_TRIGGER: int = Field(default=100, env="STREAM_MAX_FILES_PER_TRIGGER")
+    STREAM_STATS_HORIZON_DAYS: int = Field(default=30, env="STREAM_STATS_HORIZON_DAYS")
+    STREAM_STATS_REFRESH_INTERVAL: float = Field(default=15.0, env="STREAM_STATS_REFRESH_INTERVAL")
+    
     API_HOST: str = Field(default="0.0.0.0", env="API_HOST")
     API_PORT: int = Field(default=8000, env="API_PORT")
     API_WORKERS: int = Field(default=4, env="API_WORKERS")
@@ -34,12 +84,87 @@ class Settings(BaseSettings):
         env="CORS_ORIGINS")
     
     MAX_DEPENDENCY_DEPTH: int = Field(default=10, env="MAX_DEPENDENCY_DEPTH")
+    TRAVERSAL_MAX_DEPTH: int = Field(default=16, env="TRAVERSAL_MAX_DEPTH")
+    TRAVERSAL_STRATEGY: str = Field(default="template", env="TRAVERSAL_STRATEGY")
+    QUERY_WARMUP_ENABLED: bool = Field(default=True, env="QUERY_WARMUP_ENABLED")
+    QUERY_WARMUP_STRICT: bool = Field(default=True, env="QUERY_WARMUP_STRICT")
+    QUERY_PROFILE_SAMPLE_RATE: float = Field(default=0.01, env="QUERY_PROFILE_SAMPLE_RATE")
+    SERVER_TIMING_ENABLED: bool = Field(default=True, env="SERVER_TIMING_ENABLED")
+    
+    TRACING_ENABLED: bool = Field(default=False, env="TRACING_ENABLED")
+    TRACING_EXPORTER: str = Field(default="file", env="TRACING_EXPORTER")
+    TRACING_FILE_PATH: str = Field(default="data/traces/spans.jsonl", env="TRACING_FILE_PATH")
+    TRACING_OTLP_ENDPOINT: str = Field(default="http://localhost:4318/v1/traces", env="TRACING_OTLP_ENDPOINT")
+    TRACING_SERVICE_NAME: str = Field(default="kag-api", env="TRACING_SERVICE_NAME")
+    TRACING_SAMPLE_RATE: float = Field(default=0.01, env="TRACING_SAMPLE_RATE")
+    TRACING_TAIL_LATENCY_MS: float = Field(default=2000.0, env="TRACING_TAIL_LATENCY_MS")
+    TRACING_MAX_SPANS_PER_TRACE: int = Field(default=256, env="TRACING_MAX_SPANS_PER_TRACE")
+    TRACING_MAX_PENDING_SPANS: int = Field(default=20000, env="TRACING_MAX_PENDING_SPANS")
+    TRACING_EXPORT_BATCH_SIZE: int = Field(default=512, env="TRACING_EXPORT_BATCH_SIZE")
+    TRACING_EXPORT_INTERVAL: float = Field(default=5.0, env="TRACING_EXPORT_INTERVAL")
+    TRACING_EXPORT_TIMEOUT: float = Field(default=10.0, env="TRACING_EXPORT_TIMEOUT")
     MIN_MASTERY_THRESHOLD: float = Field(default=0.7, env="MIN_MASTERY_THRESHOLD")
     GAP_SIGNIFICANCE_THRESHOLD: float = Field(default=0.3, env="GAP_SIGNIFICANCE_THRESHOLD")
     
     REDIS_URL: Optional[str] = Field(default=None, env="REDIS_URL")
     CACHE_TTL: int = Field(default=3600, env="CACHE_TTL")
     
+    MASTERY_CACHE_MAX_STUDENTS: int = Field(default=10000, env="MASTERY_CACHE_MAX_STUDENTS")
+    MASTERY_CACHE_TTL: int = Field(default=300, env="MASTERY_CACHE_TTL")
+    
+    RESOLVER_REFRESH_INTERVAL: int = Field(default=300, env="RESOLVER_REFRESH_INTERVAL")
+    RESOLVER_MIN_SCORE: float = Field(default=80.0, env="RESOLVER_MIN_SCORE")
+    CONCEPT_SEARCH_LIMIT: int = Field(default=10, env="CONCEPT_SEARCH_LIMIT")
+    CONCEPT_SEARCH_MIN_SCORE: float = Field(default=0.0, env="CONCEPT_SEARCH_MIN_SCORE")
+    
+    INGEST_WORKERS: int = Field(default=2, env="INGEST_WORKERS")
+    INGEST_QUEUE_MAX_SIZE: int = Field(default=1000, env="INGEST_QUEUE_MAX_SIZE")
+    INGEST_WAIT_SECONDS: float = Field(default=0.0, env="INGEST_WAIT_SECONDS")
+    INGEST_MAX_QUERY_LENGTH: int = Field(default=120, env="INGEST_MAX_QUERY_LENGTH")
+    INGEST_NEGATIVE_TTL: int = Field(default=3600, env="INGEST_NEGATIVE_TTL")
+    INGEST_NEGATIVE_CACHE_SIZE: int = Field(default=10000, env="INGEST_NEGATIVE_CACHE_SIZE")
+    INGEST_BATCH_MAX_CONCEPTS: int = Field(default=25, env="INGEST_BATCH_MAX_CONCEPTS")
+    INGEST_BATCH_MAX_TOKENS: int = Field(default=6000, env="INGEST_BATCH_MAX_TOKENS")
+    INGEST_BATCH_TOKENS_PER_CONCEPT: int = Field(default=160, env="INGEST_BATCH_TOKENS_PER_CONCEPT")
+    INGEST_BATCH_CONCURRENCY: int = Field(default=4, env="INGEST_BATCH_CONCURRENCY")
+    INGEST_BATCH_RETRIES: int = Field(default=1, env="INGEST_BATCH_RETRIES")
+    INGEST_BATCH_MAX_QUEUED_JOBS: int = Field(default=10, env="INGEST_BATCH_MAX_QUEUED_JOBS")
+    INGEST_BATCH_JOB_HISTORY: int = Field(default=100, env="INGEST_BATCH_JOB_HISTORY")
+    IDENTITY_MIGRATION_BATCH_SIZE: int = Field(default=500, env="IDENTITY_MIGRATION_BATCH_SIZE")
+    INGEST_EXPAND: bool = Field(default=True, env="INGEST_EXPAND")
+    EXPANSION_MAX_DEPTH: int = Field(default=2, env="EXPANSION_MAX_DEPTH")
+    EXPANSION_MAX_LLM_CALLS: int = Field(default=10, env="EXPANSION_MAX_LLM_CALLS")
+    EXPANSION_MATCH_SCORE: float = Field(default=92.0, env="EXPANSION_MATCH_SCORE")
+    
+    ASSESSMENT_STORE_BACKEND: str = Field(default="sqlite", env="ASSESSMENT_STORE_BACKEND")
+    ASSESSMENT_STORE_PATH: str = Field(default="data/assessments", env="ASSESSMENT_STORE_PATH")
+    ASSESSMENT_STORE_SHARDS: int = Field(default=4, env="ASSESSMENT_STORE_SHARDS")
+    ASSESSMENT_PENDING_TTL: int = Field(default=604800, env="ASSESSMENT_PENDING_TTL")
+    ASSESSMENT_COMPLETED_TTL: int = Field(default=2592000, env="ASSESSMENT_COMPLETED_TTL")
+    ASSESSMENT_PURGE_INTERVAL: int = Field(default=600, env="ASSESSMENT_PURGE_INTERVAL")
+    ASSESSMENT_PURGE_BATCH_SIZE: int = Field(default=1000, env="ASSESSMENT_PURGE_BATCH_SIZE")
+    GRADING_WORKERS: int = Field(default=4, env="GRADING_WORKERS")
+    
+    BKT_P_INIT: float = Field(default=0.2, env="BKT_P_INIT")
+    BKT_P_LEARN: float = Field(default=0.15, env="BKT_P_LEARN")
+    BKT_P_SLIP: float = Field(default=0.1, env="BKT_P_SLIP")
+    BKT_P_GUESS: float = Field(default=0.2, env="BKT_P_GUESS")
+    BKT_PREREQ_PROPAGATION: float = Field(default=0.5, env="BKT_PREREQ_PROPAGATION")
+    BKT_CONFIDENCE_SCALE: float = Field(default=5.0, env="BKT_CONFIDENCE_SCALE")
+    
+    EVENT_LOG_DIR: str = Field(default="data/events", env="EVENT_LOG_DIR")
+    EVENT_LOG_ARCHIVE_DIR: str = Field(default="data/events/archive", env="EVENT_LOG_ARCHIVE_DIR")
+    EVENT_LOG_SEGMENT_BYTES: int = Field(default=16777216, env="EVENT_LOG_SEGMENT_BYTES")
+    EVENT_LOG_SEGMENT_MAX_AGE: float = Field(default=60.0, env="EVENT_LOG_SEGMENT_MAX_AGE")
+    EVENT_LOG_FSYNC: bool = Field(default=True, env="EVENT_LOG_FSYNC")
+    EVENT_FLUSH_INTERVAL: float = Field(default=0.2, env="EVENT_FLUSH_INTERVAL")
+    EVENT_BATCH_SIZE: int = Field(default=500, env="EVENT_BATCH_SIZE")
+    EVENT_RECOVERY_INTERVAL: int = Field(default=60, env="EVENT_RECOVERY_INTERVAL")
+    EVENT_SHUTDOWN_TIMEOUT: float = Field(default=10.0, env="EVENT_SHUTDOWN_TIMEOUT")
+    
+    STRUGGLE_RECENT_PATTERNS: int = Field(default=10, env="STRUGGLE_RECENT_PATTERNS")
+    STRUGGLE_PATTERN_BUCKETS: int = Field(default=20, env="STRUGGLE_PATTERN_BUCKETS")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,309 @@
+from typing import Dict, Any, List, Tuple, Callable, Iterable, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import bisect
+import math
+import threading
+import time
+
+from app.core.config import settings
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; suits both sub-millisecond cache lookups and multi-second LLM calls.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_RESOLVE = "resolve"
+STAGE_AUTO_INGEST = "auto_ingest"
+STAGE_TRAVERSE = "traverse"
+STAGE_GAP_ANALYSIS = "gap_analysis"
+STAGE_CONTEXT_BUILD = "context_build"
+STAGE_LLM = "llm"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+@dataclass
+class MetricFamily:
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[str, Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels) -> None:
+        self.samples.append((self.name + suffix, labels, value))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in self.samples)
+        return lines
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                family.add(value, **self._labels(key))
+        return family
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                family.add(value, **self._labels(key))
+        return family
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one unbounded) and the sum.
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in series:
+            add_histogram(family, self._labels(key), self.buckets, counts, total)
+        return family
+
+
+def add_histogram(
+    family: MetricFamily,
+    labels: Dict[str, str],
+    bounds: Iterable[float],
+    counts: List[int],
+    total: float
+) -> None:
+    """Adds one histogram series from non-cumulative ``counts``, whose last
+    entry is the unbounded bucket."""
+    cumulative = 0
+    for bound, n in zip(list(bounds) + [math.inf], counts):
+        cumulative += n
+        family.add(cumulative, "_bucket", **labels, le=_format_value(float(bound)))
+    family.add(total, "_sum", **labels)
+    family.add(cumulative, "_count", **labels)
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format.
+
+    Metrics that are updated as work happens live here directly; numbers
+    other components already keep (cache counters, pool usage, query
+    histograms) are read through collectors at scrape time instead of being
+    mirrored on every update.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        self._collectors.append(collector)
+
+    def clear_collectors(self) -> None:
+        self._collectors = []
+
+    def render(self) -> str:
+        families = [metric.collect() for metric in self._metrics.values()]
+        for collector in self._collectors:
+            families.extend(collector())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_duration = metrics.histogram(
+    "kag_stage_duration_seconds", "Time spent in each stage of the KAG pipeline.", ("stage",)
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "LLM tokens used, by response type and token kind.", ("response_type", "kind")
+)
+llm_requests = metrics.counter(
+    "llm_requests_total", "LLM completions, by response type.", ("response_type",)
+)
+kag_responses = metrics.counter(
+    "kag_responses_total", "Answers returned by /ask, by response type.", ("response_type",)
+)
+
+
+# Stage timings of the request being served, for its Server-Timing header.
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Times a pipeline stage into ``kag_stage_duration_seconds`` and the
+    current request's ``Server-Timing`` header."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def record_llm_usage(response_type: str, usage: Optional[Dict[str, int]]) -> None:
+    llm_requests.inc(response_type=response_type)
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(usage[kind], response_type=response_type, kind=kind[:-len("_tokens")])
+
+
+def server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    entries = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """Adds a ``Server-Timing`` header listing the stages timed while the
+    request was served, plus the total.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware``, so the stages run in this
+    request's context and the response is not re-buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing(timings, time.perf_counter() - started)
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+
+
+def cache_families(caches: Dict[str, Tuple[int, int]]) -> List[MetricFamily]:
+    """Hit, miss and hit-ratio families from ``{cache: (hits, misses)}``."""
+    hits = MetricFamily("kag_cache_hits_total", "counter", "Cache lookups that hit.")
+    misses = MetricFamily("kag_cache_misses_total", "counter", "Cache lookups that missed.")
+    ratio = MetricFamily("kag_cache_hit_ratio", "gauge", "Share of cache lookups that hit since startup.")
+    for cache, (h, m) in sorted(caches.items()):
+        hits.add(h, cache=cache)
+        misses.add(m, cache=cache)
+        ratio.add(round(h / (h + m), 4) if h + m else 0.0, cache=cache)
+    return [hits, misses, ratio]
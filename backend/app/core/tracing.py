@@ -0,0 +1,371 @@
+from typing import Dict, Any, List, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# OTLP span kinds.
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: int
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status_code: int = STATUS_UNSET
+    status_message: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)[:500]
+        self.attributes["exception.type"] = type(error).__name__
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    return {"resourceSpans": [{
+        "resource": {"attributes": _otlp_attributes({"service.name": settings.TRACING_SERVICE_NAME})},
+        "scopeSpans": [{"scope": {"name": "app"}, "spans": [s.to_otlp() for s in spans]}]
+    }]}
+
+
+def _new_id(n_bytes: int) -> str:
+    return f"{random.getrandbits(n_bytes * 8):0{n_bytes * 2}x}"
+
+
+def parse_traceparent(header: Optional[str]):
+    """``(trace_id, parent_span_id, sampled)`` from a W3C ``traceparent``
+    header, or ``None`` if it is missing or malformed."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class _Trace:
+    __slots__ = ("spans", "sampled", "dropped_spans")
+
+    def __init__(self, sampled: bool):
+        self.spans: List[Span] = []
+        self.sampled = sampled
+        self.dropped_spans = 0
+
+
+_current_trace: ContextVar[Optional[_Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class FileSpanExporter:
+    """Appends each batch as one OTLP/JSON ``resourceSpans`` line."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path or settings.TRACING_FILE_PATH
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+
+    def _write(self, line: str) -> None:
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def export(self, spans: List[Span]) -> None:
+        await asyncio.to_thread(self._write, json.dumps(otlp_payload(spans)))
+
+    async def close(self) -> None:
+        pass
+
+
+class OTLPSpanExporter:
+    """Posts batches to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: Optional[str] = None):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError("httpx package is required for TRACING_EXPORTER=otlp")
+
+        self._endpoint = endpoint or settings.TRACING_OTLP_ENDPOINT
+        self._client = httpx.AsyncClient(timeout=settings.TRACING_EXPORT_TIMEOUT)
+
+    async def export(self, spans: List[Span]) -> None:
+        response = await self._client.post(self._endpoint, json=otlp_payload(spans))
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_span_exporter():
+    exporter = settings.TRACING_EXPORTER.lower()
+    if exporter == "file":
+        return FileSpanExporter()
+    if exporter == "otlp":
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {settings.TRACING_EXPORTER}")
+
+
+class Tracer:
+    """Request-scoped tracing with head and tail sampling.
+
+    A trace starts at the HTTP middleware; spans opened outside one are
+    no-ops, so background workers and a disabled tracer cost one context
+    variable read per span. Every span of a live trace is kept in memory
+    until the root ends, which is what lets the tail decision keep slow or
+    failed requests that head sampling (``TRACING_SAMPLE_RATE``, or the
+    caller's ``traceparent`` flag) passed over. Kept traces are exported in
+    batches off the request path.
+    """
+
+    def __init__(self):
+        self.enabled = settings.TRACING_ENABLED
+        self._exporter = None
+        self._ready: deque = deque(maxlen=settings.TRACING_MAX_PENDING_SPANS)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._traces = 0
+        self._head_kept = 0
+        self._tail_kept = 0
+        self._exported = 0
+        self._export_failures = 0
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        self._exporter = create_span_exporter()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Tracing to {settings.TRACING_EXPORTER} exporter "
+            f"(head rate {settings.TRACING_SAMPLE_RATE}, tail {settings.TRACING_TAIL_LATENCY_MS}ms)"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._flush()
+        await self._exporter.close()
+
+    async def _flush(self) -> None:
+        while self._ready:
+            batch = [self._ready.popleft() for _ in range(min(len(self._ready), settings.TRACING_EXPORT_BATCH_SIZE))]
+            try:
+                await self._exporter.export(batch)
+                self._exported += len(batch)
+            except Exception as e:
+                self._export_failures += 1
+                logger.warning(f"Exporting {len(batch)} spans failed: {str(e)}")
+                return
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(settings.TRACING_EXPORT_INTERVAL)
+            await self._flush()
+
+    def _open(self, trace: _Trace, trace_id: str, parent_id: Optional[str], name: str, kind: int, attributes):
+        span = Span(trace_id, _new_id(8), parent_id, name, kind, time.time_ns(), attributes=dict(attributes or {}))
+        if len(trace.spans) < settings.TRACING_MAX_SPANS_PER_TRACE:
+            trace.spans.append(span)
+        else:
+            trace.dropped_spans += 1
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        trace = _current_trace.get()
+        if trace is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        span = self._open(trace, parent.trace_id, parent.span_id, name, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+
+    @contextmanager
+    def trace(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_SERVER,
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None
+    ):
+        if not self.enabled or _current_trace.get() is not None:
+            with self.span(name, kind, attributes) as span:
+                yield span
+            return
+
+        incoming = parse_traceparent(traceparent)
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = _new_id(16), None
+            sampled = random.random() < settings.TRACING_SAMPLE_RATE
+
+        trace = _Trace(sampled)
+        root = self._open(trace, trace_id, parent_id, name, kind, attributes)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.record_error(e)
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            self._finish(trace, root)
+
+    def _finish(self, trace: _Trace, root: Span) -> None:
+        self._traces += 1
+        if trace.sampled:
+            self._head_kept += 1
+        elif (
+            any(s.status_code == STATUS_ERROR for s in trace.spans)
+            or (root.end_ns - root.start_ns) / 1e6 >= settings.TRACING_TAIL_LATENCY_MS
+        ):
+            self._tail_kept += 1
+        else:
+            return
+        if trace.dropped_spans:
+            root.set_attribute("trace.dropped_spans", trace.dropped_spans)
+        self._ready.extend(trace.spans)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "exporter": settings.TRACING_EXPORTER if self.enabled else None,
+            "traces": self._traces,
+            "head_sampled": self._head_kept,
+            "tail_sampled": self._tail_kept,
+            "pending_spans": len(self._ready),
+            "exported_spans": self._exported,
+            "export_failures": self._export_failures
+        }
+
+
+tracer = Tracer()
+
+
+class TracingMiddleware:
+    """Opens the root span of every HTTP request; plain ASGI, like
+    ``ServerTimingMiddleware``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.trace(
+            f"{scope['method']} {scope['path']}",
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+            traceparent=traceparent
+        ) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.status_code = STATUS_ERROR
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    span.name = f"{scope['method']} {route.path}"
+                    span.set_attribute("http.route", route.path)
@@ -627,28 +627,31 @@ async def load_sample_curriculum(neo4j):
     queries = [
 
         """
-        CREATE (:Concept {id:'limits', name:'Limits', domain:'Mathematics',
-        description:'Understanding approaching values'})
+        MERGE (c:Concept {id:'limits'})
+        SET c.name = 'Limits', c.normalized_name = 'limits', c.domain = 'Mathematics',
+        c.description = 'Understanding approaching values'
         """,
 
         """
-        CREATE (:Concept {id:'derivatives', name:'Derivatives', domain:'Mathematics',
-        description:'Rate of change'})
+        MERGE (c:Concept {id:'derivatives'})
+        SET c.name = 'Derivatives', c.normalized_name = 'derivatives', c.domain = 'Mathematics',
+        c.description = 'Rate of change'
         """,
 
         """
-        CREATE (:Concept {id:'integration', name:'Integration', domain:'Mathematics',
-        description:'Accumulation and area under curve'})
+        MERGE (c:Concept {id:'integration'})
+        SET c.name = 'Integration', c.normalized_name = 'integration', c.domain = 'Mathematics',
+        c.description = 'Accumulation and area under curve'
         """,
 
         """
         MATCH (a:Concept {id:'derivatives'}),(b:Concept {id:'limits'})
-        CREATE (a)-[:REQUIRES]->(b)
+        MERGE (a)-[:REQUIRES]->(b)
         """,
 
         """
         MATCH (a:Concept {id:'integration'}),(b:Concept {id:'derivatives'})
-        CREATE (a)-[:REQUIRES]->(b)
+        MERGE (a)-[:REQUIRES]->(b)
         """
     ]
 
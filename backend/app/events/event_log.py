@@ -0,0 +1,161 @@
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from datetime import datetime
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+OPEN_SUFFIX = ".open"
+SEALED_SUFFIX = ".jsonl"
+
+# Where a mastery event came from. Only assessment-graded events count as
+# assessments in the stream stats; replayed ones do not bump assessment_count.
+ASSESSMENT_SOURCE = "assessment"
+MANUAL_SOURCE = "manual"
+REPLAY_SOURCE = "replay"
+
+
+def new_event(event_type: str, student_id: str, concept_id: str, **payload: Any) -> Dict[str, Any]:
+    return {
+        "event_id": uuid.uuid4().hex,
+        "seq": time.time_ns(),
+        "type": event_type,
+        "student_id": student_id,
+        "concept_id": concept_id,
+        "recorded_at": datetime.utcnow().isoformat(),
+        **payload
+    }
+
+
+def read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact.
+                logger.warning(f"Skipping truncated event in {path}")
+
+
+def try_lock(path: str) -> Optional[int]:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def unlock(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+class EventLog:
+
+    def __init__(self, log_dir: Optional[str] = None, segment_bytes: Optional[int] = None, fsync: Optional[bool] = None):
+        self._dir = log_dir or settings.EVENT_LOG_DIR
+        self._segment_bytes = segment_bytes or settings.EVENT_LOG_SEGMENT_BYTES
+        self._fsync = settings.EVENT_LOG_FSYNC if fsync is None else fsync
+        self._writer_id = f"{socket.gethostname()}-{os.getpid()}-{time.time_ns()}"
+        self._segment_index = 0
+        self._file = None
+        self._path: Optional[str] = None
+        self._opened_at = 0.0
+        self._sealed_files: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        os.makedirs(self._dir, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._dir
+
+    @property
+    def active_segment(self) -> Optional[str]:
+        return self._path
+
+    def _open_segment(self) -> None:
+        self._segment_index += 1
+        self._path = os.path.join(
+            self._dir, f"events-{self._writer_id}-{self._segment_index:06d}{OPEN_SUFFIX}"
+        )
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+        # Held for the writer's lifetime so recovery can tell live segments from orphans.
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _seal_segment(self) -> Optional[str]:
+        if self._file is None:
+            return None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        sealed = self._path[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX
+        os.rename(self._path, sealed)
+        # The lock follows the file across the rename; keeping it open until
+        # release() stops recovery from replaying a sealed segment whose
+        # owner has not archived it yet.
+        self._sealed_files[sealed] = self._file
+        self._file = None
+        self._path = None
+        return sealed
+
+    async def append(self, events: List[Dict[str, Any]]) -> Tuple[str, Optional[str]]:
+        async with self._lock:
+            if self._file is None:
+                self._open_segment()
+
+            segment = self._path
+            for event in events:
+                self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self._file.flush()
+            if self._fsync:
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+
+            sealed = None
+            if self._file.tell() >= self._segment_bytes:
+                sealed = self._seal_segment()
+            return segment, sealed
+
+    async def seal_if_older(self, max_age: float) -> Optional[str]:
+        # Segments also seal on age so quiet periods still reach the archive,
+        # which downstream consumers read as a stream of immutable files.
+        async with self._lock:
+            if self._file is None or time.monotonic() - self._opened_at < max_age:
+                return None
+            return self._seal_segment()
+
+    async def close(self) -> Optional[str]:
+        async with self._lock:
+            return self._seal_segment()
+
+    def release(self, sealed: str) -> None:
+        """Drops the lock on a sealed segment once it is archived, or when
+        handing it over to recovery on shutdown."""
+        f = self._sealed_files.pop(sealed, None)
+        if f is not None:
+            f.close()
+
+    def orphaned_segments(self) -> List[str]:
+        own = self._path
+        return sorted(
+            path for path in
+            glob.glob(os.path.join(self._dir, f"*{OPEN_SUFFIX}")) + glob.glob(os.path.join(self._dir, f"*{SEALED_SUFFIX}"))
+            if path != own
+        )
@@ -0,0 +1,296 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from fastapi import Request
+import asyncio
+import logging
+import os
+import time
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.kag.mastery_cache import MasteryCache
+from app.kag.struggle_patterns import canonicalize_pattern, struggle_query_params, add_to_buckets
+from app.events.event_log import (
+    EventLog, new_event, read_segment, try_lock, unlock,
+    OPEN_SUFFIX, SEALED_SUFFIX, MANUAL_SOURCE
+)
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+EVENT_APPLIERS = {
+    "mastery": queries.APPLY_MASTERY_EVENTS,
+    "inferred_mastery": queries.APPLY_INFERRED_MASTERY_EVENTS,
+    "struggle": queries.APPLY_STRUGGLE_EVENTS,
+}
+
+
+class EventPipeline:
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        mastery_cache: Optional[MasteryCache] = None,
+        event_log: Optional[EventLog] = None,
+        archive_dir: Optional[str] = None
+    ):
+        self._client = neo4j_client
+        self._mastery_cache = mastery_cache
+        self._log = event_log or EventLog()
+        self._archive_dir = archive_dir or settings.EVENT_LOG_ARCHIVE_DIR
+        self._queue: "deque[Tuple[str, Dict[str, Any]]]" = deque()
+        self._pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._sealed: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_recovery = 0.0
+        self._stopping = False
+        self._applied = 0
+        self._failures = 0
+        os.makedirs(self._archive_dir, exist_ok=True)
+
+        if mastery_cache is not None:
+            mastery_cache.attach_overlay(self.pending_events)
+
+    async def start(self) -> None:
+        await self._recover()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Event pipeline started, logging to {self._log.directory}")
+
+    async def stop(self) -> None:
+        # cancel() alone is not enough on 3.11: wait_for can swallow a
+        # cancellation that races with the wakeup event.
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await asyncio.wait_for(self._drain(), timeout=settings.EVENT_SHUTDOWN_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Event pipeline stopped with {len(self._queue)} unapplied events: {str(e)}")
+
+        sealed = await self._log.close()
+        if sealed:
+            self._sealed.append(sealed)
+        self._archive_completed()
+        # Whatever is still unapplied is left for another worker's recovery.
+        for sealed in self._sealed:
+            self._log.release(sealed)
+
+    async def publish(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+
+        segment, sealed = await self._log.append(events)
+        for event in events:
+            self._queue.append((segment, event))
+            self._pending.setdefault(event["student_id"], {})[event["event_id"]] = event
+        if sealed:
+            self._sealed.append(sealed)
+        self._wakeup.set()
+
+    async def record_mastery(
+        self,
+        student_id: str,
+        concept_id: str,
+        mastery_level: float,
+        confidence: Optional[float],
+        concept_name: Optional[str] = None,
+        source: str = MANUAL_SOURCE
+    ) -> None:
+        await self.publish([new_event(
+            "mastery", student_id, concept_id,
+            mastery_level=mastery_level,
+            confidence=confidence,
+            concept_name=concept_name,
+            source=source
+        )])
+        if self._mastery_cache is not None:
+            self._mastery_cache.record_mastery(student_id, concept_id, mastery_level, confidence, concept_name)
+
+    async def record_inferred_mastery(self, student_id: str, updates: Dict[str, Tuple[float, float]]) -> None:
+        threshold = settings.MIN_MASTERY_THRESHOLD
+        await self.publish([
+            new_event(
+                "inferred_mastery", student_id, concept_id,
+                mastery_level=level,
+                confidence=confidence,
+                threshold=threshold
+            )
+            for concept_id, (level, confidence) in updates.items()
+        ])
+        if self._mastery_cache is not None:
+            for concept_id, (level, confidence) in updates.items():
+                self._mastery_cache.record_inferred_mastery(student_id, concept_id, level, confidence, threshold)
+
+    async def record_struggles(self, student_id: str, concept_id: str, error_patterns: List[str]) -> None:
+        await self.publish([
+            new_event(
+                "struggle", student_id, concept_id,
+                error_pattern=pattern,
+                signature=canonicalize_pattern(pattern)
+            )
+            for pattern in error_patterns
+        ])
+
+    def pending_events(self, student_id: str) -> List[Dict[str, Any]]:
+        pending = self._pending.get(student_id)
+        if not pending:
+            return []
+        return sorted(pending.values(), key=lambda e: e["seq"])
+
+    def merge_struggles(self, student_id: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        pending = [e for e in self.pending_events(student_id) if e["type"] == "struggle"]
+        if not pending:
+            return records
+
+        merged = {r["concept_id"]: dict(r) for r in records}
+        for event in pending:
+            record = merged.get(event["concept_id"])
+            if record is None:
+                record = merged[event["concept_id"]] = {
+                    "concept_id": event["concept_id"],
+                    "concept_name": self._concept_name(event["concept_id"]),
+                    "struggle_count": 0,
+                    "error_patterns": [],
+                    "pattern_buckets": []
+                }
+            record["struggle_count"] = (record.get("struggle_count") or 0) + 1
+            record["error_patterns"] = (
+                (record.get("error_patterns") or []) + [event["error_pattern"]]
+            )[-settings.STRUGGLE_RECENT_PATTERNS:]
+            record["pattern_buckets"] = add_to_buckets(record.get("pattern_buckets") or [], event["signature"])
+
+        return sorted(merged.values(), key=lambda r: r.get("struggle_count") or 0, reverse=True)
+
+    def _concept_name(self, concept_id: str) -> Optional[str]:
+        if self._mastery_cache is None:
+            return None
+        idx = self._mastery_cache.interner.lookup(concept_id)
+        return self._mastery_cache.interner.name(idx) if idx is not None else None
+
+    async def _apply(self, events: List[Dict[str, Any]]) -> None:
+        by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for event in events:
+            if event["type"] in EVENT_APPLIERS:
+                by_type.setdefault(event["type"], []).append(event)
+
+        for event_type, query in EVENT_APPLIERS.items():
+            batch = by_type.get(event_type)
+            if batch:
+                await self._client.execute_write(query, {"events": batch, **struggle_query_params()})
+
+    async def _drain(self) -> None:
+        while self._queue:
+            batch = [item for _, item in zip(range(settings.EVENT_BATCH_SIZE), self._queue)]
+            await self._apply([event for _, event in batch])
+
+            for _ in batch:
+                _, event = self._queue.popleft()
+                pending = self._pending.get(event["student_id"])
+                if pending is not None:
+                    pending.pop(event["event_id"], None)
+                    if not pending:
+                        del self._pending[event["student_id"]]
+            self._applied += len(batch)
+            self._archive_completed()
+
+    def _archive_completed(self) -> None:
+        if not self._sealed:
+            return
+        live_segments = {segment for segment, _ in self._queue}
+        remaining = []
+        for sealed in self._sealed:
+            open_name = sealed[:-len(SEALED_SUFFIX)] + OPEN_SUFFIX
+            if open_name in live_segments:
+                remaining.append(sealed)
+                continue
+            try:
+                os.replace(sealed, os.path.join(self._archive_dir, os.path.basename(sealed)))
+            except FileNotFoundError:
+                logger.warning(f"Sealed segment {sealed} was already archived")
+            self._log.release(sealed)
+        self._sealed = remaining
+
+    async def _recover(self) -> None:
+        self._last_recovery = time.monotonic()
+        own = set(self._sealed)
+
+        # Live writers hold a lock on their open and sealed-but-unarchived
+        # segments, so only a dead writer's segments can be locked here.
+        for path in self._log.orphaned_segments():
+            if path in own:
+                continue
+
+            fd = try_lock(path)
+            if fd is None:
+                continue
+            try:
+                if not os.path.exists(path):
+                    # Archived by its owner between the listing and the lock.
+                    continue
+                events = list(read_segment(path))
+                for i in range(0, len(events), settings.EVENT_BATCH_SIZE):
+                    await self._apply(events[i:i + settings.EVENT_BATCH_SIZE])
+
+                name = os.path.basename(path)
+                if name.endswith(OPEN_SUFFIX):
+                    name = name[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX
+                try:
+                    os.replace(path, os.path.join(self._archive_dir, name))
+                except FileNotFoundError:
+                    logger.warning(f"Recovered segment {path} was already archived")
+                logger.info(f"Recovered {len(events)} events from {path}")
+            except Exception as e:
+                logger.error(f"Event recovery failed for {path}: {str(e)}")
+            finally:
+                unlock(fd)
+
+    async def _run(self) -> None:
+        backoff = settings.EVENT_FLUSH_INTERVAL
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.EVENT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+
+            try:
+                await self._drain()
+                sealed = await self._log.seal_if_older(settings.EVENT_LOG_SEGMENT_MAX_AGE)
+                if sealed:
+                    self._sealed.append(sealed)
+                    self._archive_completed()
+                backoff = settings.EVENT_FLUSH_INTERVAL
+                if time.monotonic() - self._last_recovery > settings.EVENT_RECOVERY_INTERVAL:
+                    await self._recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                backoff = min(backoff * 2, 30.0)
+                logger.error(f"Applying events failed ({len(self._queue)} pending), retrying in {backoff:.1f}s: {str(e)}")
+                await asyncio.sleep(backoff)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_events": len(self._queue),
+            "pending_students": len(self._pending),
+            "applied_events": self._applied,
+            "apply_failures": self._failures,
+            "sealed_segments_pending": len(self._sealed),
+            "active_segment": self._log.active_segment
+        }
+
+
+def get_event_pipeline(request: Request) -> EventPipeline:
+    return request.app.state.event_pipeline
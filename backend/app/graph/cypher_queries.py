@@ -1,6 +1,9 @@
 from typing import Dict, Any, List
 
+from app.graph.query_registry import query_registry
 
+
+@query_registry.register_class
 class CypherQueries:
     
     CREATE_CONCEPT = """
@@ -13,6 +16,7 @@ class CypherQueries:
         c.keywords = $keywords,
         c.curriculum_code = $curriculum_code,
         c.estimated_time_minutes = $estimated_time_minutes,
+        c.normalized_name = $normalized_name,
         c.created_at = datetime(),
         c.updated_at = datetime()
     RETURN c
@@ -24,17 +28,122 @@ class CypherQueries:
     """
     
     GET_CONCEPT_BY_NAME = """
+    CALL db.index.fulltext.queryNodes($index, $search, {limit: $limit})
+    YIELD node AS c, score
+    WHERE c:Concept AND score >= $min_score
+    RETURN c, score
+    ORDER BY score DESC
+    """
+    
+    GET_CONCEPT_NAMES = """
     MATCH (c:Concept)
-    WHERE toLower(c.name) CONTAINS toLower($name)
-    RETURN c
-    LIMIT 10
+    RETURN c.id AS id, c.name AS name
+    """
+    
+    GET_CONCEPT_IDS_BY_NORMALIZED_NAME = """
+    UNWIND $names AS normalized_name
+    MATCH (c:Concept {normalized_name: normalized_name})
+    WHERE c.id IS NOT NULL
+    RETURN normalized_name, c.id AS id
+    """
+
+    GET_EXPANSION_PENDING_NAMES = """
+    UNWIND $names AS normalized_name
+    MATCH (c:Concept {normalized_name: normalized_name})
+    WHERE c.expansion_pending
+    RETURN normalized_name, c.name AS name
+    """
+
+    UPSERT_CONCEPT = """
+    MERGE (c:Concept {id: $id})
+    ON CREATE SET c.created_at = datetime()
+    SET c.name = $name,
+        c.normalized_name = $normalized_name,
+        c.description = coalesce($description, c.description),
+        c.domain = coalesce($domain, c.domain),
+        c.difficulty = coalesce($difficulty, c.difficulty),
+        c.updated_at = datetime()
+    REMOVE c.expansion_pending
+    RETURN c.id AS id
+    """
+
+    MERGE_INGESTED_CONCEPTS = """
+    UNWIND $concepts AS row
+    MERGE (c:Concept {normalized_name: row.normalized_name})
+    ON CREATE SET c.id = row.id,
+        c.name = row.name,
+        c.created_at = datetime()
+    SET c.id = coalesce(c.id, row.id),
+        c.description = coalesce(c.description, row.description),
+        c.domain = coalesce(c.domain, row.domain),
+        c.updated_at = datetime()
+    REMOVE c.expansion_pending
+    FOREACH (prereq IN row.prerequisites |
+        MERGE (p:Concept {normalized_name: prereq.normalized_name})
+        ON CREATE SET p.id = prereq.id,
+            p.name = prereq.name,
+            p.expansion_pending = true,
+            p.created_at = datetime()
+        MERGE (c)-[r:REQUIRES]->(p)
+        ON CREATE SET r.strength = 1.0,
+            r.created_at = datetime()
+    )
+    """
+    
+    GET_CONCEPT_IDENTITY_PAGE = """
+    MATCH (c:Concept)
+    WHERE elementId(c) > $after
+    WITH c
+    ORDER BY elementId(c)
+    LIMIT $limit
+    RETURN elementId(c) AS node_id, c.id AS id, c.name AS name,
+           c.normalized_name AS normalized_name,
+           c.expansion_pending AS pending,
+           COUNT { (c)--() } AS degree
+    """
+    
+    MERGE_DUPLICATE_CONCEPTS = """
+    UNWIND $merges AS m
+    MATCH (s:Concept) WHERE elementId(s) = m.survivor
+    MATCH (d:Concept) WHERE elementId(d) IN m.duplicates
+    WITH s, collect(d) AS dups
+    SET s += apoc.map.removeKeys(
+        apoc.map.merge(reduce(acc = {}, d IN dups | apoc.map.merge(properties(d), acc)), properties(s)),
+        ['id', 'normalized_name', 'expansion_pending']
+    )
+    WITH s, dups
+    CALL apoc.refactor.mergeNodes([s] + dups, {properties: 'discard', mergeRels: true}) YIELD node
+    RETURN count(node) AS merged
+    """
+    
+    SET_CONCEPT_IDENTITY = """
+    UNWIND $rows AS row
+    MATCH (c:Concept) WHERE elementId(c) = row.node_id
+    SET c.id = coalesce(c.id, row.id),
+        c.normalized_name = row.normalized_name
+    """
+    
+    CONVERT_PREREQUISITE_EDGES = """
+    MATCH (p:Concept)-[old:PREREQUISITE_OF]->(c:Concept)
+    WITH p, old, c
+    LIMIT $limit
+    MERGE (c)-[r:REQUIRES]->(p)
+    ON CREATE SET r.strength = 1.0,
+        r.created_at = datetime()
+    DELETE old
+    RETURN count(*) AS converted
+    """
+    
+    DELETE_REQUIRES_SELF_LOOPS = """
+    MATCH (c:Concept)-[r:REQUIRES]->(c)
+    DELETE r
     """
     
     GET_CONCEPTS_BY_DOMAIN = """
     MATCH (c:Concept)
     WHERE c.domain = $domain AND c.grade_level = $grade_level
     RETURN c
-    ORDER BY c.difficulty
+    ORDER BY coalesce(c.difficulty_calibrated, c.difficulty)
     """
     
     GET_ALL_DOMAINS = """
@@ -79,27 +188,17 @@ class CypherQueries:
     RETURN formula
     """
     
-    GET_PREREQUISITES = """
-    MATCH (c:Concept {id: $concept_id})-[:REQUIRES*1..{max_depth}]->(prereq:Concept)
-    RETURN DISTINCT prereq
-    ORDER BY prereq.difficulty
-    """
-    
-    GET_DEPENDENCY_CHAIN = """
-    MATCH path = (c:Concept {id: $concept_id})-[:REQUIRES*]->(prereq:Concept)
-    RETURN 
-        [node in nodes(path) | node.id] AS concept_ids,
-        [node in nodes(path) | node.name] AS concept_names,
-        length(path) AS depth
-    ORDER BY depth
-    """
-    
     GET_ALL_PREREQUISITES_TRANSITIVE = """
     MATCH (c:Concept {id: $concept_id})
-    CALL apoc.transitive.closure(c, 'REQUIRES') YIELD node
+    CALL apoc.path.subgraphNodes(c, {relationshipFilter: 'REQUIRES>', minLevel: 1}) YIELD node
     RETURN node AS prerequisite
     """
     
+    GET_DIRECT_PREREQUISITES = """
+    MATCH (c:Concept {id: $concept_id})-[r:REQUIRES]->(prereq:Concept)
+    RETURN prereq.id AS concept_id, coalesce(r.strength, 1.0) AS strength
+    """
+    
     GET_CONCEPTS_THAT_REQUIRE = """
     MATCH (c:Concept)-[:REQUIRES]->(prereq:Concept {id: $concept_id})
     RETURN c
@@ -126,25 +225,76 @@ class CypherQueries:
     RETURN s
     """
     
-    UPDATE_MASTERY = """
-    MATCH (s:Student {id: $student_id})
-    MATCH (c:Concept {id: $concept_id})
+    APPLY_MASTERY_EVENTS = """
+    UNWIND $events AS e
+    MATCH (s:Student {id: e.student_id})
+    MATCH (c:Concept {id: e.concept_id})
     MERGE (s)-[r:MASTERS]->(c)
-    SET r.mastery_level = $mastery_level,
-        r.confidence = $confidence,
-        r.assessed_at = datetime(),
-        r.assessment_count = coalesce(r.assessment_count, 0) + 1
-    RETURN r
+    WITH r, e
+    WHERE coalesce(r.last_event_seq, 0) < e.seq
+    SET r.mastery_level = e.mastery_level,
+        r.confidence = e.confidence,
+        r.assessed_at = datetime(e.recorded_at),
+        r.assessment_count = coalesce(r.assessment_count, 0) + CASE WHEN e.source = 'replay' THEN 0 ELSE 1 END,
+        r.last_event_seq = e.seq
+    """
+
+    GET_MASTERY_ASSESSMENT_COUNTS = """
+    UNWIND $pairs AS p
+    MATCH (:Student {id: p.student_id})-[r:MASTERS]->(:Concept {id: p.concept_id})
+    RETURN p.student_id AS student_id, p.concept_id AS concept_id,
+           coalesce(r.assessment_count, 0) AS assessment_count
     """
     
-    RECORD_STRUGGLE = """
-    MATCH (s:Student {id: $student_id})
-    MATCH (c:Concept {id: $concept_id})
+    APPLY_INFERRED_MASTERY_EVENTS = """
+    UNWIND $events AS e
+    MATCH (s:Student {id: e.student_id})
+    MATCH (c:Concept {id: e.concept_id})
+    OPTIONAL MATCH (s)-[existing:MASTERS]->(c)
+    WITH s, c, e, existing
+    WHERE existing IS NOT NULL OR e.mastery_level >= e.threshold
+    MERGE (s)-[r:MASTERS]->(c)
+    WITH r, e
+    WHERE coalesce(r.last_event_seq, 0) < e.seq
+    SET r.mastery_level = e.mastery_level,
+        r.confidence = e.confidence,
+        r.inferred_at = datetime(e.recorded_at),
+        r.last_event_seq = e.seq
+    """
+    
+    APPLY_STRUGGLE_EVENTS = """
+    UNWIND $events AS e
+    WITH e ORDER BY e.seq
+    WITH e.student_id AS student_id, e.concept_id AS concept_id, collect(e) AS batch
+    MATCH (s:Student {id: student_id})
+    MATCH (c:Concept {id: concept_id})
     MERGE (s)-[r:STRUGGLES_WITH]->(c)
-    SET r.struggle_count = coalesce(r.struggle_count, 0) + 1,
-        r.last_struggled = datetime(),
-        r.error_patterns = coalesce(r.error_patterns, []) + $error_pattern
-    RETURN r
+    WITH r, [i IN range(0, size(batch) - 1)
+             WHERE batch[i].seq > coalesce(r.last_event_seq, 0)
+               AND (i = 0 OR batch[i].seq <> batch[i - 1].seq) | batch[i]] AS fresh
+    WHERE size(fresh) > 0
+    WITH r, fresh, reduce(
+        acc = {signatures: coalesce(r.pattern_signatures, []), counts: coalesce(r.pattern_counts, [])},
+        e IN fresh |
+        reduce(step = acc, bucket IN [CASE
+            WHEN e.signature IN acc.signatures THEN e.signature
+            WHEN size(acc.signatures) < $max_pattern_buckets THEN e.signature
+            ELSE $other_bucket
+        END] |
+            CASE WHEN bucket IN step.signatures
+                THEN {signatures: step.signatures, counts: [i IN range(0, size(step.signatures) - 1) |
+                    coalesce(step.counts[i], 0) + CASE WHEN step.signatures[i] = bucket THEN 1 ELSE 0 END]}
+                ELSE {signatures: step.signatures + bucket, counts: step.counts + 1}
+            END
+        )
+    ) AS buckets
+    SET r.struggle_count = coalesce(r.struggle_count, 0) + size(fresh),
+        r.last_struggled = datetime(fresh[-1].recorded_at),
+        r.recent_patterns = (coalesce(r.recent_patterns, r.error_patterns, []) + [e IN fresh | e.error_pattern])[-$max_recent_patterns..],
+        r.pattern_signatures = buckets.signatures,
+        r.pattern_counts = buckets.counts,
+        r.last_event_seq = fresh[-1].seq
+    REMOVE r.error_patterns, r.applied_event_ids
     """
     
     GET_STUDENT_MASTERY = """
@@ -157,7 +307,10 @@ class CypherQueries:
     GET_STUDENT_STRUGGLES = """
     MATCH (s:Student {id: $student_id})-[r:STRUGGLES_WITH]->(c:Concept)
     RETURN c.id AS concept_id, c.name AS concept_name,
-           r.struggle_count AS struggle_count, r.error_patterns AS error_patterns
+           r.struggle_count AS struggle_count,
+           coalesce(r.recent_patterns, r.error_patterns, []) AS error_patterns,
+           [i IN range(0, size(coalesce(r.pattern_signatures, [])) - 1) |
+               {signature: r.pattern_signatures[i], count: r.pattern_counts[i]}] AS pattern_buckets
     ORDER BY r.struggle_count DESC
     """
     
@@ -171,18 +324,6 @@ class CypherQueries:
         collect(DISTINCT {concept: struggled, struggle: st}) AS struggled_concepts
     """
     
-    FIND_KNOWLEDGE_GAPS = """
-    MATCH (s:Student {id: $student_id})
-    MATCH (target:Concept {id: $concept_id})
-    MATCH (target)-[:REQUIRES*]->(prereq:Concept)
-    WHERE NOT EXISTS {
-        MATCH (s)-[m:MASTERS]->(prereq)
-        WHERE m.mastery_level >= $threshold
-    }
-    RETURN prereq AS gap_concept
-    ORDER BY prereq.difficulty
-    """
-    
     GET_CRITICAL_GAPS = """
     MATCH (s:Student {id: $student_id})
     MATCH (target:Concept {id: $concept_id})
@@ -220,14 +361,100 @@ class CypherQueries:
     ORDER BY difficulty_score DESC
     """
     
+    REFRESH_CONCEPT_STATS_PAGE = """
+    MATCH (c:Concept)
+    WHERE c.id > $after
+    WITH c ORDER BY c.id LIMIT $limit
+    OPTIONAL MATCH (:Student)-[m:MASTERS]->(c)
+    WITH c, avg(m.mastery_level) AS avg_mastery, count(m) AS student_count
+    OPTIONAL MATCH (:Student)-[r:STRUGGLES_WITH]->(c)
+    WITH c, avg_mastery, student_count, count(r) AS struggle_count, collect(r) AS struggles
+    CALL {
+        WITH struggles
+        UNWIND struggles AS r
+        UNWIND range(0, size(coalesce(r.pattern_signatures, [])) - 1) AS i
+        WITH r.pattern_signatures[i] AS signature, sum(coalesce(r.pattern_counts[i], 0)) AS occurrences
+        ORDER BY occurrences DESC
+        LIMIT $top_patterns
+        RETURN collect(signature) AS signatures, collect(occurrences) AS pattern_counts
+    }
+    MERGE (v:ConceptStats {concept_id: c.id})
+    SET v.concept_name = c.name,
+        v.avg_mastery = avg_mastery,
+        v.student_count = student_count,
+        v.difficulty_score = CASE WHEN avg_mastery IS NULL THEN null ELSE 1 - avg_mastery END,
+        v.struggle_count = struggle_count,
+        v.pattern_signatures = signatures,
+        v.pattern_counts = pattern_counts,
+        v.refresh_run = $run_id
+    RETURN max(c.id) AS cursor, count(c) AS refreshed
+    """
+
+    DELETE_STALE_CONCEPT_STATS = """
+    MATCH (v:ConceptStats)
+    WHERE v.refresh_run <> $run_id
+    DETACH DELETE v
+    """
+
+    COMPLETE_VIEW_REFRESH = """
+    MATCH (s:ConceptStats)
+    WITH count(CASE WHEN s.student_count > 0 THEN 1 END) AS assessed_concepts,
+         count(CASE WHEN s.struggle_count > 0 THEN 1 END) AS struggled_concepts
+    MERGE (v:AnalyticsView {name: $name})
+    SET v.refreshed_at = datetime(),
+        v.run_id = $run_id,
+        v.duration_ms = $duration_ms,
+        v.assessed_concepts = assessed_concepts,
+        v.struggled_concepts = struggled_concepts
+    """
+
+    GET_VIEW_STATE = """
+    MATCH (v:AnalyticsView {name: $name})
+    RETURN toString(v.refreshed_at) AS refreshed_at,
+           duration.inSeconds(v.refreshed_at, datetime()).seconds AS age_seconds,
+           v.run_id AS run_id, v.duration_ms AS duration_ms,
+           v.assessed_concepts AS assessed_concepts,
+           v.struggled_concepts AS struggled_concepts
+    """
+
+    GET_CONCEPT_STATS_BY_DIFFICULTY = """
+    MATCH (v:ConceptStats)
+    WHERE v.student_count > 0
+    RETURN v.concept_id AS concept_id, v.concept_name AS concept_name,
+           v.avg_mastery AS avg_mastery, v.student_count AS student_count,
+           v.difficulty_score AS difficulty_score
+    ORDER BY v.difficulty_score DESC, v.concept_id
+    SKIP $offset LIMIT $limit
+    """
+
+    GET_CONCEPT_STATS_BY_STRUGGLES = """
+    MATCH (v:ConceptStats)
+    WHERE v.struggle_count > 0
+    RETURN v.concept_id AS concept_id, v.concept_name AS concept_name,
+           v.struggle_count AS struggle_count,
+           [i IN range(0, size(v.pattern_signatures) - 1) |
+               {signature: v.pattern_signatures[i], count: v.pattern_counts[i]}] AS all_patterns
+    ORDER BY v.struggle_count DESC, v.concept_id
+    SKIP $offset LIMIT $limit
+    """
+
     GET_COMMON_STRUGGLE_PATTERNS = """
     MATCH (s:Student)-[r:STRUGGLES_WITH]->(c:Concept)
-    WITH c, count(s) AS struggle_count, 
-         collect(DISTINCT r.error_patterns) AS all_patterns
+    WITH c, count(s) AS struggle_count, collect(r) AS struggles
+    ORDER BY struggle_count DESC
+    LIMIT 20
+    UNWIND struggles AS r
+    UNWIND CASE
+        WHEN size(coalesce(r.pattern_signatures, [])) = 0 THEN [null]
+        ELSE range(0, size(r.pattern_signatures) - 1)
+    END AS i
+    WITH c, struggle_count, r.pattern_signatures[i] AS signature, sum(coalesce(r.pattern_counts[i], 0)) AS occurrences
+    ORDER BY occurrences DESC
+    WITH c, struggle_count,
+         [p IN collect({signature: signature, count: occurrences}) WHERE p.signature IS NOT NULL] AS all_patterns
     RETURN c.id AS concept_id, c.name AS concept_name,
            struggle_count, all_patterns
     ORDER BY struggle_count DESC
-    LIMIT 20
     """
     
     GET_LEARNING_PROGRESS = """
@@ -257,10 +484,105 @@ class CypherQueries:
         WHERE m.mastery_level >= $threshold
     })
     RETURN potential
-    ORDER BY potential.difficulty
+    ORDER BY coalesce(potential.difficulty_calibrated, potential.difficulty)
     LIMIT 10
     """
     
+    APPLY_CALIBRATED_DIFFICULTY = """
+    UNWIND $rows AS row
+    MATCH (c:Concept {id: row.concept_id})
+    SET c.difficulty_calibrated = row.calibrated_difficulty,
+        c.difficulty_sample_size = row.student_count,
+        c.difficulty_calibrated_at = datetime(),
+        c.difficulty_calibration_run = $run_id
+    RETURN count(c) AS updated
+    """
+
+    APPLY_BUILDS_ON_EVIDENCE = """
+    UNWIND $rows AS row
+    MATCH (later:Concept {id: row.to_concept_id})-[r:BUILDS_ON]->(earlier:Concept {id: row.from_concept_id})
+    SET r.empirical_strength = row.empirical_strength,
+        r.empirical_gain_lift = row.gain_lift,
+        r.empirical_support = row.transition_count,
+        r.empirical_updated_at = datetime(),
+        r.empirical_run = $run_id
+    RETURN count(r) AS updated
+    """
+
+    GET_BUILDS_ON_EVIDENCE = """
+    MATCH (later:Concept)-[r:BUILDS_ON]->(earlier:Concept)
+    WHERE later.id IN $concept_ids AND earlier.id IN $concept_ids
+      AND r.empirical_support >= $min_support
+      AND r.empirical_strength >= $min_strength
+    RETURN later.id AS later_id, earlier.id AS earlier_id
+    """
+
+    CLEAR_STALE_BUILDS_ON_EVIDENCE = """
+    MATCH (:Concept)-[r:BUILDS_ON]->(:Concept)
+    WHERE r.empirical_support IS NOT NULL
+      AND coalesce(r.empirical_run, '') <> $run_id
+    REMOVE r.empirical_strength, r.empirical_gain_lift, r.empirical_support,
+           r.empirical_updated_at, r.empirical_run
+    RETURN count(r) AS cleared
+    """
+
+    APPLY_ORDER_HINTS = """
+    UNWIND $rows AS row
+    MATCH (c:Concept {id: row.concept_id})
+    SET c.order_hint = row.order_hint,
+        c.order_hint_support = row.order_support,
+        c.order_hint_run = $run_id
+    RETURN count(c) AS updated
+    """
+
+    CLEAR_STALE_ORDER_HINTS = """
+    MATCH (c:Concept)
+    WHERE c.order_hint IS NOT NULL
+      AND coalesce(c.order_hint_run, '') <> $run_id
+    REMOVE c.order_hint, c.order_hint_support, c.order_hint_run
+    RETURN count(c) AS cleared
+    """
+
+    EXPORT_CONCEPTS_PAGE = """
+    MATCH (c:Concept)
+    WHERE c.id > $after
+    RETURN c.id AS id, c.name AS name, c.description AS description,
+           c.domain AS domain, c.grade_level AS grade_level,
+           c.difficulty AS difficulty, c.keywords AS keywords,
+           c.curriculum_code AS curriculum_code,
+           c.estimated_time_minutes AS estimated_time_minutes
+    ORDER BY c.id
+    LIMIT $page_size
+    """
+    
+    EXPORT_RELATIONSHIPS_PAGE = """
+    MATCH (source:Concept)
+    WHERE source.id > $after
+    WITH source ORDER BY source.id LIMIT $page_size
+    OPTIONAL MATCH (source)-[r:REQUIRES|BUILDS_ON]->(target:Concept)
+    RETURN source.id AS cursor,
+           [row IN collect(CASE WHEN r IS NULL THEN null ELSE {
+               source_id: source.id, target_id: target.id,
+               relationship_type: type(r), strength: r.strength
+           } END) WHERE row IS NOT NULL] AS rows
+    ORDER BY cursor
+    """
+    
+    EXPORT_MASTERY_PAGE = """
+    MATCH (s:Student)
+    WHERE s.id > $after
+    WITH s ORDER BY s.id LIMIT $page_size
+    OPTIONAL MATCH (s)-[m:MASTERS]->(c:Concept)
+    RETURN s.id AS cursor,
+           [row IN collect(CASE WHEN m IS NULL THEN null ELSE {
+               student_id: s.id, concept_id: c.id,
+               mastery_level: m.mastery_level,
+               attempts: m.assessment_count,
+               assessment_score: m.mastery_level
+           } END) WHERE row IS NOT NULL] AS rows
+    ORDER BY cursor
+    """
+    
     GET_DOMAIN_TAXONOMY = """
     MATCH (c:Concept)
     WITH c.domain AS domain, c.grade_level AS grade, collect(c) AS concepts
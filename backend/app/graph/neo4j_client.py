@@ -2,9 +2,16 @@ from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession
 from neo4j.exceptions import ServiceUnavailable, AuthError
 from typing import Optional, List, Dict, Any
 import logging
+import random
+import time
 from contextlib import asynccontextmanager
 from fastapi import Request
 from app.core.config import settings
+from app.core.metrics import MetricFamily, add_histogram
+from app.core.tracing import tracer, SPAN_KIND_CLIENT
+from app.graph.query_registry import (
+    query_registry, query_name, missing_parameters, profile_db_hits, UNREGISTERED, LATENCY_BUCKETS_MS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,8 @@ class Neo4jClient:
         self._user = settings.NEO4J_USER
         self._password = settings.NEO4J_PASSWORD
         self._database = settings.NEO4J_DATABASE
+        self._sessions_in_use = 0
+        self._peak_sessions_in_use = 0
     
     async def connect(self) -> None:
         try:
@@ -44,34 +53,66 @@ class Neo4jClient:
         if not self._driver:
             raise RuntimeError("Neo4j driver not initialized. Call connect() first.")
         
-        async with self._driver.session(database=self._database) as session:
-            yield session
+        # Each open session holds at most one pooled connection, so this
+        # bounds pool usage without reaching into driver internals.
+        self._sessions_in_use += 1
+        self._peak_sessions_in_use = max(self._peak_sessions_in_use, self._sessions_in_use)
+        try:
+            async with self._driver.session(database=self._database) as session:
+                yield session
+        finally:
+            self._sessions_in_use -= 1
     
+    async def _run(self, query: str, parameters: Optional[Dict[str, Any]], fetch: bool):
+        name = query_name(query)
+        missing = missing_parameters(query, parameters)
+        if missing:
+            raise ValueError(f"Query {name} is missing parameters: {', '.join(missing)}")
+
+        # Only registered queries are sampled; schema commands and the like
+        # cannot be profiled.
+        profiled = name != UNREGISTERED and random.random() < settings.QUERY_PROFILE_SAMPLE_RATE
+        started = time.perf_counter()
+        records = []
+        with tracer.span(f"neo4j {name}", SPAN_KIND_CLIENT, {"db.system": "neo4j", "db.query.name": name}) as span:
+            try:
+                async with self.session() as session:
+                    result = await session.run(f"PROFILE {query}" if profiled else query, parameters or {})
+                    if fetch:
+                        records = await result.data()
+                    summary = await result.consume()
+            except Exception:
+                query_registry.record(name, (time.perf_counter() - started) * 1000, error=True)
+                raise
+            query_registry.record(name, (time.perf_counter() - started) * 1000, rows=len(records))
+            span.set_attribute("db.response.returned_rows", len(records))
+            if profiled:
+                db_hits = profile_db_hits(summary.profile)
+                query_registry.record_profile(name, db_hits)
+                span.set_attribute("db.neo4j.db_hits", db_hits)
+        return records, summary
+
     async def execute_query(
         self, 
         query: str, 
         parameters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        async with self.session() as session:
-            result = await session.run(query, parameters or {})
-            records = await result.data()
-            return records
+        records, _ = await self._run(query, parameters, fetch=True)
+        return records
     
     async def execute_write(
         self, 
         query: str, 
         parameters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        async with self.session() as session:
-            result = await session.run(query, parameters or {})
-            summary = await result.consume()
-            return {
-                "nodes_created": summary.counters.nodes_created,
-                "nodes_deleted": summary.counters.nodes_deleted,
-                "relationships_created": summary.counters.relationships_created,
-                "relationships_deleted": summary.counters.relationships_deleted,
-                "properties_set": summary.counters.properties_set
-            }
+        _, summary = await self._run(query, parameters, fetch=False)
+        return {
+            "nodes_created": summary.counters.nodes_created,
+            "nodes_deleted": summary.counters.nodes_deleted,
+            "relationships_created": summary.counters.relationships_created,
+            "relationships_deleted": summary.counters.relationships_deleted,
+            "properties_set": summary.counters.properties_set
+        }
     
     async def create_constraint(self, label: str, property_name: str) -> None:
         query = f"""
@@ -89,6 +130,47 @@ class Neo4jClient:
         await self.execute_query(query)
         logger.info(f"Created index on {label}.{property_name}")
     
+    async def create_fulltext_index(self, name: str, label: str, property_names: List[str]) -> None:
+        properties = ", ".join(f"n.{p}" for p in property_names)
+        query = f"""
+        CREATE FULLTEXT INDEX {name} IF NOT EXISTS
+        FOR (n:{label}) ON EACH [{properties}]
+        """
+        await self.execute_query(query)
+        logger.info(f"Created full-text index {name} on {label}({', '.join(property_names)})")
+    
+    async def warm_up_queries(self) -> Dict[str, Any]:
+        return await query_registry.warm_up(self)
+    
+    def query_stats(self) -> Dict[str, Any]:
+        return query_registry.stats()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions_in_use": self._sessions_in_use,
+            "peak_sessions_in_use": self._peak_sessions_in_use,
+            "max_pool_size": settings.NEO4J_MAX_CONNECTION_POOL_SIZE
+        }
+    
+    def metric_families(self) -> List[MetricFamily]:
+        pool = self.pool_stats()
+        in_use = MetricFamily("neo4j_pool_sessions_in_use", "gauge", "Open Neo4j sessions, each holding at most one pooled connection.")
+        in_use.add(pool["sessions_in_use"])
+        peak = MetricFamily("neo4j_pool_sessions_in_use_peak", "gauge", "Most Neo4j sessions open at once since startup.")
+        peak.add(pool["peak_sessions_in_use"])
+        size = MetricFamily("neo4j_pool_max_size", "gauge", "Configured Neo4j connection pool size.")
+        size.add(pool["max_pool_size"])
+
+        latency = MetricFamily("neo4j_query_duration_seconds", "histogram", "Cypher query latency by registered query name.")
+        rows = MetricFamily("neo4j_query_rows_total", "counter", "Rows returned by registered query name.")
+        errors = MetricFamily("neo4j_query_errors_total", "counter", "Failed Cypher queries by registered query name.")
+        bounds = [b / 1000 for b in LATENCY_BUCKETS_MS]
+        for name, s in query_registry.snapshot():
+            add_histogram(latency, {"query": name}, bounds, s.buckets, s.total_ms / 1000)
+            rows.add(s.rows, query=name)
+            errors.add(s.errors, query=name)
+        return [in_use, peak, size, latency, rows, errors]
+    
     async def clear_database(self) -> None:
         query = "MATCH (n) DETACH DELETE n"
         await self.execute_query(query)
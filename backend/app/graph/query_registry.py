@@ -0,0 +1,221 @@
+from typing import Dict, Any, List, Optional, Tuple
+import bisect
+import copy
+import logging
+import re
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+UNREGISTERED = "unregistered"
+
+# Upper bounds, in milliseconds, of the latency histogram buckets; the last
+# bucket is unbounded.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Plans are cached per query text and parameter types, so warm-up binds each
+# parameter to a value of the type callers actually send.
+_INT_PARAMETERS = {
+    "limit", "offset", "page_size", "max_depth", "top_patterns", "max_recent_patterns",
+    "max_pattern_buckets", "grade_level", "estimated_time_minutes", "duration_ms", "min_support"
+}
+_FLOAT_PARAMETERS = {
+    "threshold", "min_score", "mastery_level", "confidence", "difficulty", "strength", "min_strength"
+}
+_LIST_PARAMETERS = {
+    "rows", "events", "concept_ids", "merges", "concepts", "keywords", "variables", "names", "pairs"
+}
+
+_PARAMETER_PATTERN = re.compile(r"\$(\w+)")
+
+
+class NamedQuery(str):
+    """A Cypher query text that also carries its registry name and the
+    parameters it declares.
+
+    It is still a plain ``str``, so it can be passed anywhere a query is.
+    """
+
+    query_name: str
+    parameters: Tuple[str, ...]
+
+    def __new__(cls, name: str, text: str):
+        query = super().__new__(cls, text)
+        query.query_name = name
+        query.parameters = tuple(sorted(set(_PARAMETER_PATTERN.findall(text))))
+        return query
+
+
+def sample_parameter(name: str) -> Any:
+    if name in _INT_PARAMETERS:
+        return 1
+    if name in _FLOAT_PARAMETERS:
+        return 0.5
+    if name in _LIST_PARAMETERS:
+        return []
+    return ""
+
+
+def query_name(query: str) -> str:
+    return getattr(query, "query_name", UNREGISTERED)
+
+
+def missing_parameters(query: str, parameters: Optional[Dict[str, Any]]) -> List[str]:
+    declared = getattr(query, "parameters", ())
+    return [p for p in declared if p not in (parameters or {})]
+
+
+class QueryStats:
+    """Latency histogram, row counts and sampled db hits for one query."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.profiled = 0
+        self.db_hits = 0
+        self.last_db_hits: Optional[int] = None
+
+    def record(self, elapsed_ms: float, rows: int, error: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def record_profile(self, db_hits: int) -> None:
+        self.profiled += 1
+        self.db_hits += db_hits
+        self.last_db_hits = db_hits
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                bound = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 2)
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        histogram = {f"le_{bound}": n for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram["le_inf"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.count, 2) if self.count else None,
+            "profiled": self.profiled,
+            "avg_db_hits": round(self.db_hits / self.profiled, 1) if self.profiled else None,
+            "last_db_hits": self.last_db_hits,
+            "histogram_ms": histogram
+        }
+
+
+def profile_db_hits(profile: Optional[Dict[str, Any]]) -> int:
+    if not profile:
+        return 0
+    return profile.get("dbHits", 0) + sum(profile_db_hits(child) for child in profile.get("children", []))
+
+
+class QueryWarmupError(RuntimeError):
+    pass
+
+
+class QueryRegistry:
+    """Every Cypher query the app runs, by name.
+
+    Registered queries are ``EXPLAIN``ed at startup, which fills the plan
+    cache before the first request and fails fast on a query Neo4j cannot
+    plan. ``Neo4jClient`` records per-name runtime stats against the same
+    names; inline queries are pooled under ``unregistered``.
+    """
+
+    def __init__(self):
+        self._queries: Dict[str, NamedQuery] = {}
+        self._stats: Dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, text: str) -> NamedQuery:
+        existing = self._queries.get(name)
+        if existing is not None:
+            if existing != text:
+                raise ValueError(f"Query {name} is already registered with a different text")
+            return existing
+        query = NamedQuery(name, text)
+        self._queries[name] = query
+        return query
+
+    def register_class(self, cls: type) -> type:
+        """Registers every upper-case string attribute of ``cls`` under its
+        attribute name and swaps it for the ``NamedQuery``."""
+        for attr, value in list(vars(cls).items()):
+            if attr.isupper() and isinstance(value, str):
+                setattr(cls, attr, self.register(attr, value))
+        return cls
+
+    def get(self, name: str) -> NamedQuery:
+        return self._queries[name]
+
+    def names(self) -> List[str]:
+        return sorted(self._queries)
+
+    def record(self, name: str, elapsed_ms: float, rows: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self._stats.setdefault(name, QueryStats()).record(elapsed_ms, rows, error)
+
+    def record_profile(self, name: str, db_hits: int) -> None:
+        with self._lock:
+            self._stats.setdefault(name, QueryStats()).record_profile(db_hits)
+
+    def snapshot(self) -> List[Tuple[str, QueryStats]]:
+        with self._lock:
+            return [(name, copy.deepcopy(s)) for name, s in sorted(self._stats.items())]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_query = {name: s.to_dict() for name, s in sorted(self._stats.items())}
+        return {
+            "registered": len(self._queries),
+            "profile_sample_rate": settings.QUERY_PROFILE_SAMPLE_RATE,
+            "queries": {
+                name: {"parameters": list(self._queries[name].parameters) if name in self._queries else [], **s}
+                for name, s in per_query.items()
+            }
+        }
+
+    async def warm_up(self, client) -> Dict[str, Any]:
+        failures = {}
+        for name, query in sorted(self._queries.items()):
+            params = {p: sample_parameter(p) for p in query.parameters}
+            try:
+                async with client.session() as session:
+                    result = await session.run(f"EXPLAIN {query}", params)
+                    await result.consume()
+            except Exception as e:
+                failures[name] = str(e)
+                logger.error(f"EXPLAIN {name} failed: {str(e)}")
+
+        logger.info(f"Warmed {len(self._queries) - len(failures)}/{len(self._queries)} query plans")
+        if failures and settings.QUERY_WARMUP_STRICT:
+            raise QueryWarmupError(f"{len(failures)} registered queries failed to plan: {', '.join(sorted(failures))}")
+        return {"warmed": len(self._queries) - len(failures), "failed": failures}
+
+
+query_registry = QueryRegistry()
@@ -0,0 +1,40 @@
+from typing import Dict, Any, Optional
+import re
+
+from app.core.config import settings
+
+
+CONCEPT_SEARCH_INDEX = "concept_search"
+CONCEPT_SEARCH_PROPERTIES = ["name", "keywords", "description"]
+
+
+def concept_search_query(text: str) -> Optional[str]:
+    """Lucene query for the concept full-text index.
+
+    Only word characters reach the query, so user input can never carry
+    Lucene syntax. A concept must match on its name or keywords: a phrase
+    match on the name ranks highest, then every term in the name (allowing
+    a typo in longer words), then keywords. The description only adds to
+    the score, since on its own it matches any shared word.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    phrase = " ".join(terms)
+    fuzzy_terms = " AND ".join(f"{t}~1" if len(t) >= 5 else t for t in terms)
+    return (
+        f'+(name:"{phrase}"^4 OR name:({fuzzy_terms})^2 OR keywords:({phrase})^1.5) '
+        f'description:({phrase})'
+    )
+
+
+def concept_search_params(text: str, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    search = concept_search_query(text)
+    if search is None:
+        return None
+    return {
+        "index": CONCEPT_SEARCH_INDEX,
+        "search": search,
+        "limit": limit or settings.CONCEPT_SEARCH_LIMIT,
+        "min_score": settings.CONCEPT_SEARCH_MIN_SCORE
+    }
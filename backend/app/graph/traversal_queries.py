@@ -0,0 +1,138 @@
+from typing import Dict, Any, List, Tuple, Iterable
+
+from app.core.config import settings
+from app.graph.query_registry import query_registry
+
+
+TRAVERSAL_STRATEGIES = ("template", "apoc")
+
+_PREREQUISITES_TEMPLATE = """
+MATCH (c:Concept {{id: $concept_id}})-[:REQUIRES*1..{depth}]->(prereq:Concept)
+RETURN DISTINCT prereq
+ORDER BY coalesce(prereq.difficulty_calibrated, prereq.difficulty)
+"""
+
+_KNOWLEDGE_GAPS_TEMPLATE = """
+MATCH (s:Student {{id: $student_id}})
+MATCH (target:Concept {{id: $concept_id}})-[:REQUIRES*1..{depth}]->(prereq:Concept)
+WITH DISTINCT s, prereq
+WHERE NOT EXISTS {{
+    MATCH (s)-[m:MASTERS]->(prereq)
+    WHERE m.mastery_level >= $threshold
+}}
+RETURN prereq AS gap_concept
+ORDER BY coalesce(prereq.difficulty_calibrated, prereq.difficulty)
+"""
+
+PREREQUISITES_APOC = query_registry.register("PREREQUISITES_APOC", """
+MATCH (c:Concept {id: $concept_id})
+CALL apoc.path.subgraphNodes(c, {
+    relationshipFilter: 'REQUIRES>',
+    labelFilter: '+Concept',
+    minLevel: 1,
+    maxLevel: $max_depth
+}) YIELD node AS prereq
+RETURN prereq
+ORDER BY coalesce(prereq.difficulty_calibrated, prereq.difficulty)
+""")
+
+KNOWLEDGE_GAPS_APOC = query_registry.register("KNOWLEDGE_GAPS_APOC", """
+MATCH (s:Student {id: $student_id})
+MATCH (target:Concept {id: $concept_id})
+CALL apoc.path.subgraphNodes(target, {
+    relationshipFilter: 'REQUIRES>',
+    labelFilter: '+Concept',
+    minLevel: 1,
+    maxLevel: $max_depth
+}) YIELD node AS prereq
+WITH s, prereq
+WHERE NOT EXISTS {
+    MATCH (s)-[m:MASTERS]->(prereq)
+    WHERE m.mastery_level >= $threshold
+}
+RETURN prereq AS gap_concept
+ORDER BY coalesce(prereq.difficulty_calibrated, prereq.difficulty)
+""")
+
+GET_CHAIN_EDGES = query_registry.register("GET_CHAIN_EDGES", """
+MATCH (a:Concept)-[:REQUIRES]->(b:Concept)
+WHERE a.id IN $concept_ids AND b.id IN $concept_ids
+RETURN a.id AS source_id, b.id AS target_id
+""")
+
+# One registered query per template and depth, so warm-up plans every text
+# the template strategy can produce.
+_DEPTH_QUERIES = {
+    (template, depth): query_registry.register(f"{name}_DEPTH_{depth}", template.format(depth=depth))
+    for name, template in (("PREREQUISITES", _PREREQUISITES_TEMPLATE), ("KNOWLEDGE_GAPS", _KNOWLEDGE_GAPS_TEMPLATE))
+    for depth in range(1, settings.TRAVERSAL_MAX_DEPTH + 1)
+}
+
+
+def _depth_query(template: str, depth: int) -> str:
+    return _DEPTH_QUERIES[(template, depth)]
+
+
+def clamp_depth(depth: int) -> int:
+    return max(1, min(depth, settings.TRAVERSAL_MAX_DEPTH))
+
+
+class TraversalQueries:
+    """Depth-bounded prerequisite traversals.
+
+    Cypher cannot take a variable-length bound as a parameter, so the
+    ``template`` strategy keeps one query text per depth from 1 to
+    ``TRAVERSAL_MAX_DEPTH``. That small fixed set is all the plan cache
+    ever sees, and each plain ``RETURN DISTINCT`` expansion is eligible for
+    Neo4j's pruning var-length expand. The ``apoc`` strategy runs a
+    breadth-first ``apoc.path.subgraphNodes`` with ``maxLevel`` as an
+    ordinary parameter instead.
+    """
+
+    def __init__(self, strategy: str = None):
+        self.strategy = strategy or settings.TRAVERSAL_STRATEGY
+        if self.strategy not in TRAVERSAL_STRATEGIES:
+            raise ValueError(f"Unknown traversal strategy: {self.strategy}")
+
+    def prerequisites(self, concept_id: str, depth: int) -> Tuple[str, Dict[str, Any]]:
+        depth = clamp_depth(depth)
+        if self.strategy == "apoc":
+            return PREREQUISITES_APOC, {"concept_id": concept_id, "max_depth": depth}
+        return _depth_query(_PREREQUISITES_TEMPLATE, depth), {"concept_id": concept_id}
+
+    def knowledge_gaps(self, student_id: str, concept_id: str, threshold: float, depth: int) -> Tuple[str, Dict[str, Any]]:
+        depth = clamp_depth(depth)
+        params = {"student_id": student_id, "concept_id": concept_id, "threshold": threshold}
+        if self.strategy == "apoc":
+            return KNOWLEDGE_GAPS_APOC, {**params, "max_depth": depth}
+        return _depth_query(_KNOWLEDGE_GAPS_TEMPLATE, depth), params
+
+
+def chain_depth(root_id: str, edges: Iterable[Tuple[str, str]]) -> int:
+    """Length of the longest REQUIRES chain below ``root_id``.
+
+    Computed over the already depth-bounded prerequisite set, which avoids
+    asking Neo4j to enumerate every path just to take the longest one.
+    """
+    children: Dict[str, List[str]] = {}
+    for source, target in edges:
+        children.setdefault(source, []).append(target)
+
+    longest: Dict[str, int] = {}
+    on_stack = set()
+    stack = [(root_id, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            on_stack.discard(node)
+            longest[node] = max(
+                (longest.get(child, 0) + 1 for child in children.get(node, []) if child not in on_stack),
+                default=0
+            )
+            continue
+        if node in longest or node in on_stack:
+            continue
+        on_stack.add(node)
+        stack.append((node, True))
+        stack.extend((child, False) for child in children.get(node, []) if child not in longest)
+    return longest.get(root_id, 0)
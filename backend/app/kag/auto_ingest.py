@@ -1,15 +1,110 @@
+from typing import Dict, Any, List, Optional
+import asyncio
 import logging
-import json
+
+from app.graph.cypher_queries import queries
+from app.kag.concept_resolver import ConceptResolver
+from app.kag.concept_identity import concept_id, concept_identity, normalize_concept_name
+from app.llm.json_stream import JSONObjectStream, parse_json_objects
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+class NotAConceptError(ValueError):
+    """The extraction model judged the query not to name an academic concept."""
+
+
+def _concept_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    prerequisites = data.get("prerequisites") or []
+    return {
+        **concept_identity(data["name"]),
+        "description": data.get("description") or "",
+        "domain": data.get("domain") or "General",
+        "prerequisites": [p.strip() for p in prerequisites if isinstance(p, str) and p.strip()]
+    }
+
+
 class AutoIngestor:
-    def __init__(self, neo4j, groq):
+    """Extracts concepts with the LLM and writes them to the graph.
+
+    Prerequisites are matched against existing concepts (and concepts
+    extracted earlier in the same job) before anything is created, so a
+    prerequisite the graph already holds gets an edge rather than a
+    duplicate node.
+    """
+
+    def __init__(self, neo4j, groq, resolver: Optional[ConceptResolver] = None):
         self.neo4j = neo4j
         self.groq = groq
+        self._resolver = resolver
+        self._ingested = 0
+        self._failures = 0
+        self._llm_calls = 0
+        self._batch_calls = 0
+
+    async def _link(self, rows: List[Dict[str, Any]], seen: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Replaces each row's prerequisite names with concept identities
+        and returns the names still to be extracted: those that matched
+        nothing and those that matched a placeholder awaiting expansion."""
+        new_names, matched = [], []
+        for row in rows:
+            own_key = normalize_concept_name(row["name"])
+            refs, linked = [], set()
+            for prereq in row["prerequisites"]:
+                key = normalize_concept_name(prereq)
+                ref = seen.get(key)
+                if ref is None:
+                    match = None
+                    if self._resolver is not None:
+                        match = await self._resolver.lookup(prereq, settings.EXPANSION_MATCH_SCORE)
+                    if match is not None:
+                        ref = {**concept_identity(match[1]), "id": match[0] or concept_id(match[1])}
+                        matched.append(ref)
+                    else:
+                        ref = concept_identity(prereq)
+                        new_names.append(prereq)
+                    seen[key] = ref
+                ref_key = normalize_concept_name(ref["name"])
+                if ref_key != own_key and ref_key not in linked:
+                    linked.add(ref_key)
+                    refs.append(ref)
+            row["prerequisites"] = refs
+
+        if matched:
+            result = await self.neo4j.execute_query(
+                queries.GET_EXPANSION_PENDING_NAMES,
+                {"names": list({ref["normalized_name"] for ref in matched})}
+            )
+            new_names.extend(record["name"] for record in result)
+        return new_names
+
+    async def _adopt_existing_ids(self, rows: List[Dict[str, Any]]) -> None:
+        """Gives every row and prerequisite that names a concept already in
+        the graph that concept's id, which need not be the derived one
+        (curriculum ids like ``math_g2_place_value``)."""
+        refs = rows + [prereq for row in rows for prereq in row["prerequisites"]]
+        result = await self.neo4j.execute_query(
+            queries.GET_CONCEPT_IDS_BY_NORMALIZED_NAME,
+            {"names": list({ref["normalized_name"] for ref in refs})}
+        )
+        existing = {record["normalized_name"]: record["id"] for record in result}
+        for ref in refs:
+            ref["id"] = existing.get(ref["normalized_name"], ref["id"])
 
-    async def ingest_concept(self, concept_name: str):
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        await self._adopt_existing_ids(rows)
+        # One transaction for the concepts and all of their prerequisites.
+        await self.neo4j.execute_write(queries.MERGE_INGESTED_CONCEPTS, {"concepts": rows})
+
+        if self._resolver is not None:
+            for row in rows:
+                self._resolver.add(row["name"], row["id"])
+                for prereq in row["prerequisites"]:
+                    self._resolver.add(prereq["name"], prereq["id"])
+        self._ingested += len(rows)
+
+    async def ingest_concept(self, concept_name: str) -> Dict[str, str]:
         logger.info(f"Auto-ingesting new concept: {concept_name}")
 
         prompt = f"""
@@ -25,48 +120,254 @@ Format:
   "domain": "...",
   "prerequisites": ["...", "..."]
 }}
+
+If the text does not name an academic concept, return {{"name": null}}.
 """
 
         llm_result = await self.groq.raw_completion(prompt)
+        self._llm_calls += 1
 
         raw = llm_result["content"].strip()
-        raw = raw.replace("```json", "").replace("```", "")
-
-        try:
-            data = json.loads(raw)
-        except Exception:
+        objects = parse_json_objects(raw)
+        if not objects:
+            self._failures += 1
             logger.error(f"Invalid JSON from LLM:\n{raw}")
             raise RuntimeError("LLM returned invalid JSON")
 
-        name = data["name"]
-        description = data.get("description", "")
-        domain = data.get("domain", "General")
-        prerequisites = data.get("prerequisites", [])
-
-        await self.neo4j.execute_query(
-            """
-            MERGE (c:Concept {name: $name})
-            SET c.description = $description,
-                c.domain = $domain
-            """,
-            {
-                "name": name,
-                "description": description,
-                "domain": domain,
-            }
+        data = objects[0]
+        if not isinstance(data.get("name"), str) or not data["name"].strip():
+            raise NotAConceptError(f"Not an academic concept: {concept_name}")
+
+        row = _concept_row(data)
+        # Fills in the concept the query already names, such as a
+        # placeholder awaiting expansion, rather than creating another.
+        if self._resolver is not None:
+            existing = await self._resolver.lookup(concept_name, settings.EXPANSION_MATCH_SCORE)
+            if existing is not None:
+                row.update(concept_identity(existing[1]))
+                row["id"] = existing[0] or row["id"]
+        await self._link([row], {})
+        await self._write([row])
+
+        logger.info(f"Concept '{row['name']}' successfully ingested.")
+        return {"id": row["id"], "name": row["name"]}
+
+    def _pack(self, names: List[str]) -> List[List[str]]:
+        """Splits ``names`` into prompts whose expected output fits the
+        per-call token budget."""
+        overhead = settings.INGEST_BATCH_TOKENS_PER_CONCEPT
+        per_call = (settings.INGEST_BATCH_MAX_TOKENS - overhead) // settings.INGEST_BATCH_TOKENS_PER_CONCEPT
+        size = max(1, min(settings.INGEST_BATCH_MAX_CONCEPTS, per_call))
+        return [names[i:i + size] for i in range(0, len(names), size)]
+
+    @staticmethod
+    def _batch_prompt(names: List[str]) -> str:
+        listing = "\n".join(f"{i}. {name}" for i, name in enumerate(names, 1))
+        return f"""
+Return a STRICT JSON array with one object per concept below, in the same order.
+
+Concepts:
+{listing}
+
+Format of each object:
+{{"query": "<the concept exactly as listed>", "name": "...", "description": "<one sentence>", "domain": "...", "prerequisites": ["...", "..."]}}
+
+Use "name": null for any entry that is not an academic concept.
+"""
+
+    async def _extract_batch(self, names: List[str], semaphore: asyncio.Semaphore) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Extracts one batch. Maps the normalized name of every concept the
+        model answered for to its row, or to None if it was rejected."""
+        requested = {normalize_concept_name(name) for name in names}
+        extracted: Dict[str, Optional[Dict[str, Any]]] = {}
+        stream = JSONObjectStream()
+        max_tokens = (len(names) + 1) * settings.INGEST_BATCH_TOKENS_PER_CONCEPT
+
+        def collect(data: Dict[str, Any]) -> None:
+            name = data.get("name")
+            key = normalize_concept_name(str(data.get("query") or name or ""))
+            if key not in requested:
+                key = normalize_concept_name(name) if isinstance(name, str) else ""
+            if key not in requested or key in extracted:
+                return
+            extracted[key] = _concept_row(data) if isinstance(name, str) and name.strip() else None
+
+        async with semaphore:
+            self._batch_calls += 1
+            try:
+                async for text in self.groq.stream_completion(self._batch_prompt(names), max_tokens):
+                    for data in stream.feed(text):
+                        collect(data)
+            except Exception as e:
+                # Keep whatever objects completed before the failure.
+                logger.error(f"Batch extraction of {len(names)} concepts failed after {len(extracted)}: {str(e)}")
+
+        if stream.truncated:
+            logger.warning(f"Batch extraction truncated after {len(extracted)} of {len(names)} concepts")
+        return extracted
+
+    async def _ingest_batch(
+        self,
+        names: List[str],
+        semaphore: asyncio.Semaphore,
+        seen: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str]:
+        extracted = await self._extract_batch(names, semaphore)
+        rows = [row for row in extracted.values() if row is not None]
+        if rows:
+            await self._link(rows, seen)
+            try:
+                await self._write(rows)
+            except Exception as e:
+                logger.error(f"Writing {len(rows)} extracted concepts failed: {str(e)}")
+                return {key: "rejected" for key, row in extracted.items() if row is None}
+        return {key: "ingested" if row is not None else "rejected" for key, row in extracted.items()}
+
+    async def ingest_concepts(self, concept_names: List[str]) -> Dict[str, Any]:
+        """Batch extraction for bootstrapping a subject.
+
+        Packs many names into each prompt and runs up to
+        ``INGEST_BATCH_CONCURRENCY`` prompts at once under the extraction
+        rate limit. Names a truncated or failed response left out are retried
+        in fresh batches up to ``INGEST_BATCH_RETRIES`` times.
+        """
+        pending: Dict[str, str] = {}
+        for name in concept_names:
+            key = normalize_concept_name(name)
+            if key:
+                pending.setdefault(key, name.strip())
+
+        requested = len(pending)
+        calls_before = self._batch_calls
+        semaphore = asyncio.Semaphore(settings.INGEST_BATCH_CONCURRENCY)
+        seen: Dict[str, Dict[str, Any]] = {}
+        ingested = rejected = 0
+
+        for _ in range(settings.INGEST_BATCH_RETRIES + 1):
+            if not pending:
+                break
+            batches = self._pack(list(pending.values()))
+            results = await asyncio.gather(*(self._ingest_batch(batch, semaphore, seen) for batch in batches))
+            for statuses in results:
+                for key, status in statuses.items():
+                    pending.pop(key, None)
+                    if status == "ingested":
+                        ingested += 1
+                    else:
+                        rejected += 1
+
+        self._failures += len(pending)
+        summary = {
+            "requested": requested,
+            "ingested": ingested,
+            "rejected": rejected,
+            "failed": len(pending),
+            "failed_concepts": list(pending.values()),
+            "llm_calls": self._batch_calls - calls_before
+        }
+        logger.info(
+            f"Batch ingestion: {ingested}/{requested} concepts in {summary['llm_calls']} LLM calls, "
+            f"{rejected} rejected, {len(pending)} failed"
         )
+        return summary
 
-        for prereq in prerequisites:
-            await self.neo4j.execute_query(
-                """
-                MERGE (p:Concept {name: $prereq})
-                MERGE (c:Concept {name: $name})
-                MERGE (p)-[:PREREQUISITE_OF]->(c)
-                """,
-                {
-                    "name": name,
-                    "prereq": prereq,
-                }
-            )
+    async def expand_concept(
+        self,
+        concept_name: str,
+        max_depth: Optional[int] = None,
+        max_llm_calls: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Ingests a topic together with its prerequisites, breadth first.
+
+        Each level's frontier (the prerequisites that matched no existing
+        concept, or only a placeholder still ``expansion_pending``) is extracted in batches, up to ``max_depth`` levels below
+        the topic and ``max_llm_calls`` calls in total. Frontier concepts keep
+        the name they were linked under, so expanding them fills in the
+        placeholder instead of creating a second node. Whatever the limits
+        leave unexpanded stays marked ``expansion_pending``.
+        """
+        max_depth = settings.EXPANSION_MAX_DEPTH if max_depth is None else max_depth
+        max_llm_calls = settings.EXPANSION_MAX_LLM_CALLS if max_llm_calls is None else max_llm_calls
+        semaphore = asyncio.Semaphore(settings.INGEST_BATCH_CONCURRENCY)
+        calls_before = self._batch_calls
+
+        root_key = normalize_concept_name(concept_name)
+        existing = None
+        if self._resolver is not None:
+            existing = await self._resolver.lookup(concept_name, settings.EXPANSION_MATCH_SCORE)
+        seen: Dict[str, Dict[str, Any]] = {}
+        frontier = {root_key: concept_name.strip()}
+        root_name = root_id = None
+        depth = written = rejected = 0
+
+        unexpanded: List[str] = []
+
+        while frontier and depth <= max_depth:
+            batches = self._pack(list(frontier.values()))
+            budget = max(max_llm_calls - (self._batch_calls - calls_before), 0)
+            unexpanded.extend(name for batch in batches[budget:] for name in batch)
+            batches = batches[:budget]
+            if not batches:
+                frontier = {}
+                break
+            results = await asyncio.gather(*(self._extract_batch(batch, semaphore) for batch in batches))
+
+            rows = []
+            for extracted in results:
+                for key, row in extracted.items():
+                    if row is None:
+                        rejected += 1
+                        continue
+                    if depth == 0:
+                        if existing:
+                            row.update(concept_identity(existing[1]))
+                            row["id"] = existing[0] or row["id"]
+                        root_row = row
+                        root_name = row["name"]
+                        seen[row["normalized_name"]] = {
+                            field: row[field] for field in ("id", "name", "normalized_name")
+                        }
+                    else:
+                        row.update(concept_identity(frontier[key]))
+                    rows.append(row)
+
+            if depth == 0 and root_name is None:
+                if root_key in results[0]:
+                    raise NotAConceptError(f"Not an academic concept: {concept_name}")
+                raise RuntimeError(f"LLM extraction failed for '{concept_name}'")
+
+            new_names = await self._link(rows, seen)
+            if rows:
+                await self._write(rows)
+                written += len(rows)
+            if depth == 0:
+                # The write may have adopted the id of a concept already stored under this name.
+                root_id = seen[root_row["normalized_name"]]["id"] = root_row["id"]
+            frontier = {normalize_concept_name(name): name for name in new_names}
+            depth += 1
+
+        unexpanded.extend(frontier.values())
+
+        summary = {
+            "id": root_id,
+            "name": root_name,
+            "concepts_written": written,
+            "rejected": rejected,
+            "unexpanded": len(unexpanded),
+            "unexpanded_concepts": unexpanded,
+            "depth_reached": depth - 1,
+            "llm_calls": self._batch_calls - calls_before
+        }
+        logger.info(
+            f"Expanded '{root_name}': {written} concepts over {summary['depth_reached'] + 1} levels "
+            f"in {summary['llm_calls']} LLM calls, {len(unexpanded)} left unexpanded"
+        )
+        return summary
 
-        logger.info(f"Concept '{name}' successfully ingested.")
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ingested": self._ingested,
+            "failures": self._failures,
+            "llm_calls": self._llm_calls,
+            "batch_llm_calls": self._batch_calls
+        }
@@ -0,0 +1,179 @@
+from typing import Dict, Any, List, Optional
+import hashlib
+import logging
+import re
+import unicodedata
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_concept_name(name: str) -> str:
+    return " ".join(re.sub(r"[-_/]", " ", name.lower()).split())
+
+
+def _hashed_id(slug: str, normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}_{digest}" if slug else f"concept_{digest}"
+
+
+def concept_id(name: str) -> str:
+    """Deterministic id for a concept name.
+
+    Names that normalize the same get the same id. Where the slug drops
+    characters that distinguish names ("C" and "C++", "Café" and "Cafe"),
+    a short hash of the normalized name keeps the ids apart.
+    """
+    normalized = normalize_concept_name(name)
+    ascii_name = unicodedata.normalize("NFKD", normalized).encode("ascii", "ignore").decode("ascii")
+    slug = re.sub(r"[^a-z0-9]+", "_", ascii_name).strip("_")
+    if slug and slug.replace("_", " ") == normalized:
+        return slug
+    return _hashed_id(slug, normalized)
+
+
+def concept_identity(name: str) -> Dict[str, str]:
+    name = name.strip()
+    return {"id": concept_id(name), "name": name, "normalized_name": normalize_concept_name(name)}
+
+
+class ConceptIdConflict(ValueError):
+    """The requested id belongs to one concept and the name to another."""
+
+
+async def upsert_concept(
+    neo4j: Neo4jClient,
+    id: str,
+    name: str,
+    description: Optional[str] = None,
+    domain: Optional[str] = None,
+    difficulty: Optional[float] = None,
+    rename: bool = True
+) -> str:
+    """Creates or updates a concept and returns the id it is stored under.
+
+    A concept already stored under the same normalized name is updated and
+    keeps its own id, which need not be ``id``. Otherwise the concept with
+    ``id`` is created, or renamed if it exists and ``rename`` is set.
+    """
+    identity = {"id": id, "name": name.strip(), "normalized_name": normalize_concept_name(name)}
+    holders = await neo4j.execute_query(
+        queries.GET_CONCEPT_IDS_BY_NORMALIZED_NAME, {"names": [identity["normalized_name"]]}
+    )
+    holder = holders[0]["id"] if holders else None
+    if holder != id:
+        taken = await neo4j.execute_query(queries.GET_CONCEPT_BY_ID, {"concept_id": id})
+        if taken and (holder is not None or not rename):
+            raise ConceptIdConflict(f"Concept id '{id}' belongs to a concept with another name")
+        if holder is not None:
+            identity["id"] = holder
+
+    result = await neo4j.execute_query(queries.UPSERT_CONCEPT, {
+        **identity,
+        "description": description,
+        "domain": domain,
+        "difficulty": difficulty
+    })
+    return result[0]["id"] if result else identity["id"]
+
+
+class ConceptIdentityMigration:
+    """Brings an existing graph onto canonical concept identity.
+
+    Concepts that normalize to the same name are merged into one node (the
+    one with an id, then the best connected), every concept gets an id and
+    a ``normalized_name``, ``PREREQUISITE_OF`` edges become ``REQUIRES`` in
+    the opposite direction, and finally the uniqueness constraints are
+    created. Each step runs in batches, so it can be re-run after a partial
+    failure.
+    """
+
+    def __init__(self, neo4j_client: Neo4jClient, batch_size: Optional[int] = None):
+        self._client = neo4j_client
+        self._batch_size = batch_size or settings.IDENTITY_MIGRATION_BATCH_SIZE
+
+    async def ensure_schema(self) -> None:
+        await self._client.create_constraint("Concept", "id")
+        await self._client.create_constraint("Concept", "normalized_name")
+
+    async def _load_concepts(self) -> List[Dict[str, Any]]:
+        concepts, cursor = [], ""
+        while True:
+            page = await self._client.execute_query(
+                queries.GET_CONCEPT_IDENTITY_PAGE, {"after": cursor, "limit": self._batch_size}
+            )
+            if not page:
+                return concepts
+            concepts.extend(page)
+            cursor = page[-1]["node_id"]
+
+    @staticmethod
+    def _group(concepts: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for concept in concepts:
+            if concept["name"]:
+                key = normalize_concept_name(concept["name"])
+            elif concept["id"]:
+                key = f"id:{concept['id']}"
+            else:
+                continue
+            groups.setdefault(key, []).append(concept)
+        for nodes in groups.values():
+            nodes.sort(key=lambda c: (c["id"] is None, bool(c["pending"]), -c["degree"], c["id"] or ""))
+        return groups
+
+    async def _run_batches(self, query: str, param: str, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self._batch_size):
+            await self._client.execute_query(query, {param: rows[start:start + self._batch_size]})
+
+    async def run(self) -> Dict[str, Any]:
+        concepts = await self._load_concepts()
+        groups = self._group(concepts)
+
+        merges = [
+            {"survivor": nodes[0]["node_id"], "duplicates": [n["node_id"] for n in nodes[1:]]}
+            for nodes in groups.values() if len(nodes) > 1
+        ]
+        await self._run_batches(queries.MERGE_DUPLICATE_CONCEPTS, "merges", merges)
+
+        taken = {c["id"] for c in concepts if c["id"]}
+        identities = []
+        for key, nodes in groups.items():
+            survivor = nodes[0]
+            if key.startswith("id:"):
+                continue
+            new_id = None
+            if not survivor["id"]:
+                new_id = concept_id(survivor["name"])
+                if new_id in taken:
+                    new_id = _hashed_id(new_id, key)
+                taken.add(new_id)
+            if new_id or survivor["normalized_name"] != key:
+                identities.append({"node_id": survivor["node_id"], "id": new_id, "normalized_name": key})
+        await self._run_batches(queries.SET_CONCEPT_IDENTITY, "rows", identities)
+
+        converted = 0
+        while True:
+            result = await self._client.execute_query(
+                queries.CONVERT_PREREQUISITE_EDGES, {"limit": self._batch_size}
+            )
+            batch = result[0]["converted"] if result else 0
+            if not batch:
+                break
+            converted += batch
+        await self._client.execute_write(queries.DELETE_REQUIRES_SELF_LOOPS)
+
+        await self.ensure_schema()
+
+        summary = {
+            "concepts_scanned": len(concepts),
+            "duplicate_groups": len(merges),
+            "nodes_merged": sum(len(m["duplicates"]) for m in merges),
+            "identities_updated": len(identities),
+            "edges_converted": converted
+        }
+        logger.info(f"Concept identity migration: {summary}")
+        return summary
@@ -1,27 +1,131 @@
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
 from rapidfuzz import process, fuzz
 
+from app.graph.cypher_queries import queries
+from app.kag.mastery_cache import ConceptInterner
+from app.kag.concept_identity import normalize_concept_name
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
 class ConceptResolver:
+    """Maps free-text queries onto concepts in the graph.
 
-    def __init__(self, neo4j):
+    The concept names are loaded once and refreshed every
+    ``RESOLVER_REFRESH_INTERVAL`` seconds, so a lookup is a dict probe on the
+    normalized name and, failing that, a fuzzy match over the in-memory list.
+    Resolves to the concept id where the concept has one, which lets the
+    traversal find it with a single id lookup.
+    """
+
+    def __init__(self, neo4j, interner: Optional[ConceptInterner] = None):
         self.neo4j = neo4j
+        self._interner = interner
+        self._names: List[str] = []
+        self._ids: List[Optional[str]] = []
+        self._by_normalized: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self._exact_hits = 0
+        self._fuzzy_hits = 0
+        self._misses = 0
+        self._refreshes = 0
 
-    async def resolve(self, user_query: str):
-        records = await self.neo4j.execute_query(
-            "MATCH (c:Concept) RETURN c.name AS name"
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.RESOLVER_REFRESH_INTERVAL
         )
 
-        names = [r["name"] for r in records]
+    async def refresh(self) -> None:
+        records = await self.neo4j.execute_query(queries.GET_CONCEPT_NAMES)
 
-        if not names:
-            return "__fallback__"
+        names, ids, by_normalized = [], [], {}
+        for record in records:
+            name = record["name"]
+            if not name:
+                continue
+            by_normalized.setdefault(normalize_concept_name(name), len(names))
+            names.append(name)
+            ids.append(record["id"])
+            if self._interner is not None and record["id"]:
+                self._interner.intern(record["id"], name)
 
-        match, score, _ = process.extractOne(
-            user_query,
-            names,
-            scorer=fuzz.WRatio
-        )
+        # Swapped in one step so a concurrent resolve never sees a half-built index.
+        self._names, self._ids, self._by_normalized = names, ids, by_normalized
+        self._loaded_at = time.monotonic()
+        self._refreshes += 1
+        logger.info(f"Concept resolver index loaded with {len(names)} concepts")
+
+    async def _ensure_fresh(self) -> None:
+        if self._is_fresh():
+            return
+        async with self._refresh_lock:
+            if not self._is_fresh():
+                await self.refresh()
+
+    def add(self, name: str, concept_id: Optional[str] = None) -> None:
+        """Registers a concept written since the last refresh."""
+        key = normalize_concept_name(name)
+        if key in self._by_normalized:
+            return
+        self._by_normalized[key] = len(self._names)
+        self._names.append(name)
+        self._ids.append(concept_id)
+        if self._interner is not None and concept_id:
+            self._interner.intern(concept_id, name)
+
+    def alias(self, query: str, name: str) -> None:
+        """Resolves ``query`` to the concept ``name`` resolves to."""
+        idx = self._by_normalized.get(normalize_concept_name(name))
+        if idx is not None:
+            self._by_normalized.setdefault(normalize_concept_name(query), idx)
+
+    def _match(self, user_query: str, min_score: float) -> Tuple[Optional[int], str]:
+        exact = self._by_normalized.get(normalize_concept_name(user_query))
+        if exact is not None:
+            return exact, "exact"
+
+        match = process.extractOne(user_query, self._names, scorer=fuzz.WRatio) if self._names else None
+        if match is None or match[1] < min_score:
+            return None, "miss"
+        return match[2], "fuzzy"
+
+    async def lookup(self, name: str, min_score: Optional[float] = None) -> Optional[Tuple[Optional[str], str]]:
+        """The ``(id, name)`` of the existing concept ``name`` refers to, if any."""
+        await self._ensure_fresh()
+        idx, _ = self._match(name, settings.RESOLVER_MIN_SCORE if min_score is None else min_score)
+        return (self._ids[idx], self._names[idx]) if idx is not None else None
+
+    async def resolve(self, user_query: str) -> Optional[str]:
+        await self._ensure_fresh()
+
+        if not self._names:
+            return "__fallback__"
 
-        if score < 80:
+        idx, kind = self._match(user_query, settings.RESOLVER_MIN_SCORE)
+        if kind == "exact":
+            self._exact_hits += 1
+        elif kind == "fuzzy":
+            self._fuzzy_hits += 1
+        else:
+            self._misses += 1
             return None
+        return self._ids[idx] or self._names[idx]
 
-        return match
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "indexed_concepts": len(self._names),
+            "index_age_seconds": (
+                round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+            ),
+            "refreshes": self._refreshes,
+            "exact_hits": self._exact_hits,
+            "fuzzy_hits": self._fuzzy_hits,
+            "misses": self._misses
+        }
@@ -1,5 +1,6 @@
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
+from collections import Counter
 import logging
 
 from app.kag.traversal_engine import TraversalContext, TraversalResult, ConceptNode
@@ -9,6 +10,37 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+BASE_CONSTRAINTS = [
+    "You MUST ONLY use the information provided in this context.",
+    "You CANNOT add, invent, or assume any knowledge not explicitly stated.",
+    "You CANNOT bypass the reasoning chain - follow the dependencies.",
+    "If information is missing, acknowledge the limitation - do not fabricate.",
+    "Your role is VERBALIZATION ONLY - expressing structured reasoning in natural language.",
+    "You must preserve the dependency order when explaining concepts.",
+    "You must acknowledge knowledge gaps explicitly when they exist."
+]
+
+RESPONSE_CONSTRAINTS = {
+    "explain": [
+        "Explain the target concept using the dependency chain provided.",
+        "Reference prerequisite concepts in order of dependency.",
+        "Use examples from the context only."
+    ],
+    "bridge_gaps": [
+        "You MUST explain the knowledge gaps BEFORE the target concept.",
+        "Start with the most critical gaps identified.",
+        "Provide a learning path based on the gap analysis.",
+        "Do not explain the target concept until gaps are addressed."
+    ],
+    "refuse": [
+        "You MUST refuse to provide an explanation.",
+        "State clearly that the concept was not found in the knowledge graph.",
+        "Suggest the user verify the concept name or check their curriculum.",
+        "Do NOT attempt to explain using external knowledge."
+    ]
+}
+
+
 @dataclass
 class ReasoningContext:
     target_concept: Dict[str, Any]
@@ -27,6 +59,11 @@ class ContextBuilder:
     
     def __init__(self):
         self._min_threshold = settings.MIN_MASTERY_THRESHOLD
+        self._constraints = {
+            response_type: tuple(BASE_CONSTRAINTS + specific)
+            for response_type, specific in RESPONSE_CONSTRAINTS.items()
+        }
+        self._built = Counter()
     
     def _concept_to_dict(self, concept: ConceptNode) -> Dict[str, Any]:
         return {
@@ -68,37 +105,7 @@ class ContextBuilder:
             return "low"
     
     def _build_constraints(self, response_type: str) -> List[str]:
-        base_constraints = [
-            "You MUST ONLY use the information provided in this context.",
-            "You CANNOT add, invent, or assume any knowledge not explicitly stated.",
-            "You CANNOT bypass the reasoning chain - follow the dependencies.",
-            "If information is missing, acknowledge the limitation - do not fabricate.",
-            "Your role is VERBALIZATION ONLY - expressing structured reasoning in natural language.",
-            "You must preserve the dependency order when explaining concepts.",
-            "You must acknowledge knowledge gaps explicitly when they exist."
-        ]
-        
-        type_specific = {
-            "explain": [
-                "Explain the target concept using the dependency chain provided.",
-                "Reference prerequisite concepts in order of dependency.",
-                "Use examples from the context only."
-            ],
-            "bridge_gaps": [
-                "You MUST explain the knowledge gaps BEFORE the target concept.",
-                "Start with the most critical gaps identified.",
-                "Provide a learning path based on the gap analysis.",
-                "Do not explain the target concept until gaps are addressed."
-            ],
-            "refuse": [
-                "You MUST refuse to provide an explanation.",
-                "State clearly that the concept was not found in the knowledge graph.",
-                "Suggest the user verify the concept name or check their curriculum.",
-                "Do NOT attempt to explain using external knowledge."
-            ]
-        }
-        
-        return base_constraints + type_specific.get(response_type, [])
+        return list(self._constraints.get(response_type, BASE_CONSTRAINTS))
     
     def _build_guidance(
         self,
@@ -250,11 +257,15 @@ class ContextBuilder:
             constraints=constraints
         )
         
+        self._built[response_type] += 1
         logger.info(f"Context built: response_type={response_type}, "
                    f"gaps={len(gap_context)}, confidence={confidence}")
         
         return context
     
+    def stats(self) -> Dict[str, Any]:
+        return {"contexts_built": dict(self._built)}
+    
     def format_for_llm(self, context: ReasoningContext) -> str:
         prompt_parts = [
             "# KAG REASONING CONTEXT",
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
@@ -7,6 +7,10 @@ from app.graph.neo4j_client import Neo4jClient
 from app.graph.cypher_queries import queries
 from app.kag.traversal_engine import ConceptNode, TraversalContext, TraversalResult
 from app.core.config import settings
+from app.core.tracing import tracer
+
+if TYPE_CHECKING:
+    from app.events.pipeline import EventPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +56,12 @@ class GapAnalysisResult:
 
 class GapAnalyzer:
     
-    def __init__(self, neo4j_client: Neo4jClient):
+    def __init__(self, neo4j_client: Neo4jClient, event_pipeline: Optional["EventPipeline"] = None):
         self._client = neo4j_client
+        self._event_pipeline = event_pipeline
         self._mastery_threshold = settings.MIN_MASTERY_THRESHOLD
+        self._analyses = 0
+        self._gaps_found = 0
     
     def classify_gap_type(self,mastery_level: Optional[float],has_struggle_record: bool) -> GapType:
         if mastery_level is None:
@@ -137,6 +144,8 @@ class GapAnalyzer:
             queries.GET_STUDENT_STRUGGLES,
             {"student_id": student_id}
         )
+        if self._event_pipeline is not None:
+            result = self._event_pipeline.merge_struggles(student_id, result)
         
         struggles = {}
         for record in result:
@@ -147,6 +156,13 @@ class GapAnalyzer:
         return struggles
     
     async def analyze_gaps(self,traversal_context: TraversalContext,student_id: str) -> GapAnalysisResult:
+        with tracer.span("kag.analyze_gaps") as span:
+            result = await self._analyze_gaps(traversal_context, student_id)
+            span.set_attribute("kag.total_gaps", result.total_gaps)
+            span.set_attribute("kag.critical_gaps", len(result.critical_gaps))
+        return result
+
+    async def _analyze_gaps(self,traversal_context: TraversalContext,student_id: str) -> GapAnalysisResult:
         if traversal_context.result == TraversalResult.CONCEPT_NOT_FOUND:
             raise ValueError("Cannot analyze gaps: concept not found in knowledge graph")
         
@@ -223,7 +239,11 @@ class GapAnalyzer:
         readiness = traversal_context.confidence_score
         can_proceed = len(critical_gaps) == 0 and readiness >= 0.5
         
-        learning_path = self._build_learning_path(analyzed_gaps)
+        self._analyses += 1
+        self._gaps_found += len(analyzed_gaps)
+        
+        precedence = await self._builds_on_precedence([g.concept.id for g in analyzed_gaps])
+        learning_path = self._build_learning_path(analyzed_gaps, precedence)
         estimated_time = self._estimate_time_to_ready(analyzed_gaps)
         
         return GapAnalysisResult(
@@ -251,13 +271,54 @@ class GapAnalyzer:
         
         return priority_score * 0.5 + distance_factor * 0.3 + mastery_factor * 0.2
     
-    def _build_learning_path(self,gaps: List[KnowledgeGap]) -> List[str]:
+    async def _builds_on_precedence(self, concept_ids: List[str]) -> Dict[str, Set[str]]:
+        """``{later: {earlier, ...}}`` for BUILDS_ON edges between gaps whose
+        mined evidence (written by the sequence feedback job) says studying
+        the earlier concept first pays off."""
+        if len(concept_ids) < 2:
+            return {}
+        result = await self._client.execute_query(
+            queries.GET_BUILDS_ON_EVIDENCE,
+            {
+                "concept_ids": concept_ids,
+                "min_support": settings.SEQUENCE_MIN_TRANSITIONS,
+                "min_strength": settings.SEQUENCE_MIN_EDGE_STRENGTH
+            }
+        )
+        precedence: Dict[str, Set[str]] = {}
+        for record in result:
+            precedence.setdefault(record["later_id"], set()).add(record["earlier_id"])
+        return precedence
+
+    def _build_learning_path(self,gaps: List[KnowledgeGap],precedence: Optional[Dict[str, Set[str]]] = None) -> List[str]:
+        # Within the same depth, concepts students empirically study earlier
+        # (order_hint near 0, mined offline) come first; unmined concepts sit
+        # in the middle.
         sorted_gaps = sorted(
             gaps,
-            key=lambda g: (-g.distance_to_target, g.priority.value)
+            key=lambda g: (
+                -g.distance_to_target,
+                g.concept.order_hint if g.concept.order_hint is not None else 0.5,
+                g.priority.value
+            )
         )
-        
-        return [g.concept.name for g in sorted_gaps]
+        if not precedence:
+            return [g.concept.name for g in sorted_gaps]
+
+        # Evidence-backed BUILDS_ON edges then pull a gap ahead of the gaps
+        # that build on it; otherwise the order above is kept, and a cycle
+        # falls back to it.
+        path: List[str] = []
+        remaining = sorted_gaps
+        while remaining:
+            pending = {g.concept.id for g in remaining}
+            ready = next(
+                (g for g in remaining if not precedence.get(g.concept.id, set()) & pending),
+                remaining[0]
+            )
+            path.append(ready.concept.name)
+            remaining = [g for g in remaining if g is not ready]
+        return path
     
     def _estimate_time_to_ready(self,gaps: List[KnowledgeGap]) -> int:
         time_estimates = {
@@ -289,3 +350,10 @@ class GapAnalyzer:
             confidence += 0.15
         
         return min(confidence, 1.0)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "analyses": self._analyses,
+            "gaps_found": self._gaps_found,
+            "avg_gaps": round(self._gaps_found / self._analyses, 2) if self._analyses else 0.0
+        }
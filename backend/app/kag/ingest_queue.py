@@ -0,0 +1,242 @@
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import asyncio
+import logging
+import time
+import uuid
+
+from app.kag.auto_ingest import AutoIngestor, NotAConceptError
+from app.kag.concept_resolver import ConceptResolver
+from app.kag.concept_identity import normalize_concept_name
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+INGEST_PENDING = "pending"
+INGEST_INGESTED = "ingested"
+INGEST_REJECTED = "rejected"
+INGEST_FAILED = "failed"
+INGEST_BUSY = "busy"
+
+
+@dataclass
+class IngestOutcome:
+    status: str
+    concept_name: Optional[str] = None
+    concept_id: Optional[str] = None
+
+
+class IngestQueue:
+    """Runs auto-ingestion off the request path.
+
+    Unknown queries are keyed by normalized name, so every request for the
+    same topic waits on one extraction rather than starting its own. Queries
+    the model rejects as not being concepts are remembered for
+    ``INGEST_NEGATIVE_TTL`` seconds and turned away without an LLM call.
+    Deduplication is per process; the ingest MERGE keeps a topic queued by
+    two workers from being written twice.
+    """
+
+    def __init__(self, ingestor: AutoIngestor, resolver: ConceptResolver):
+        self._ingestor = ingestor
+        self._resolver = resolver
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_MAX_SIZE)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._rejected: "OrderedDict[str, float]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+        self._submitted = 0
+        self._deduplicated = 0
+        self._negative_hits = 0
+        self._dropped = 0
+        self._outcomes: Dict[str, int] = {}
+        self._batch_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_BATCH_MAX_QUEUED_JOBS)
+        self._batch_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._batch_worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._run()) for _ in range(settings.INGEST_WORKERS)
+        ]
+        self._batch_worker = asyncio.create_task(self._run_batches())
+        logger.info(f"Auto-ingest queue started with {settings.INGEST_WORKERS} workers")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_result(IngestOutcome(INGEST_FAILED))
+        self._inflight.clear()
+
+        if self._batch_worker is not None:
+            self._batch_worker.cancel()
+            await asyncio.gather(self._batch_worker, return_exceptions=True)
+            self._batch_worker = None
+        for job in self._batch_jobs.values():
+            if job["status"] in ("queued", "running"):
+                self._finish_batch(job, "failed", error="Interrupted: API shutdown")
+
+    def _is_rejected(self, key: str) -> bool:
+        expires = self._rejected.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._rejected[key]
+            return False
+        return True
+
+    def _reject(self, key: str) -> None:
+        self._rejected[key] = time.monotonic() + settings.INGEST_NEGATIVE_TTL
+        self._rejected.move_to_end(key)
+        while len(self._rejected) > settings.INGEST_NEGATIVE_CACHE_SIZE:
+            self._rejected.popitem(last=False)
+
+    @staticmethod
+    def _done(outcome: IngestOutcome) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(outcome)
+        return future
+
+    def submit(self, query: str) -> asyncio.Future:
+        """Queues ``query`` for ingestion, or joins the extraction already
+        queued for it. The returned future resolves to an ``IngestOutcome``."""
+        key = normalize_concept_name(query)
+        if not key or len(key) > settings.INGEST_MAX_QUERY_LENGTH:
+            return self._done(IngestOutcome(INGEST_REJECTED))
+        if self._is_rejected(key):
+            self._negative_hits += 1
+            return self._done(IngestOutcome(INGEST_REJECTED))
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._deduplicated += 1
+            return future
+
+        try:
+            self._queue.put_nowait((key, query))
+        except asyncio.QueueFull:
+            self._dropped += 1
+            return self._done(IngestOutcome(INGEST_BUSY))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._submitted += 1
+        return future
+
+    async def request(self, query: str, wait: Optional[float] = None) -> IngestOutcome:
+        """Submits ``query`` and waits up to ``wait`` seconds (default
+        ``INGEST_WAIT_SECONDS``) for it to land, reporting ``pending`` if it
+        has not."""
+        wait = settings.INGEST_WAIT_SECONDS if wait is None else wait
+        future = self.submit(query)
+        if not future.done() and wait > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+        return future.result() if future.done() else IngestOutcome(INGEST_PENDING)
+
+    async def _ingest(self, key: str, query: str) -> IngestOutcome:
+        try:
+            if settings.INGEST_EXPAND:
+                concept = await self._ingestor.expand_concept(query)
+            else:
+                concept = await self._ingestor.ingest_concept(query)
+        except NotAConceptError:
+            self._reject(key)
+            return IngestOutcome(INGEST_REJECTED)
+        except Exception as e:
+            # Not cached: an LLM or database outage should not blacklist the topic.
+            logger.error(f"Auto-ingesting '{query}' failed: {str(e)}")
+            return IngestOutcome(INGEST_FAILED)
+
+        self._resolver.alias(query, concept["name"])
+        return IngestOutcome(INGEST_INGESTED, concept["name"], concept["id"])
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            key, query = await self._queue.get()
+            try:
+                outcome = await self._ingest(key, query)
+            finally:
+                self._queue.task_done()
+            self._outcomes[outcome.status] = self._outcomes.get(outcome.status, 0) + 1
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(outcome)
+
+    def submit_batch(self, concept_names: List[str]) -> Optional[Dict[str, Any]]:
+        """Queues a batch extraction job and returns it, or ``None`` if
+        ``INGEST_BATCH_MAX_QUEUED_JOBS`` jobs are already waiting.
+
+        Batch jobs run one at a time on their own worker, so a bulk load
+        shares the extraction rate limit with live requests but never takes
+        their queue slots.
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "requested": len(concept_names),
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        try:
+            self._batch_queue.put_nowait((job, list(concept_names)))
+        except asyncio.QueueFull:
+            return None
+
+        self._batch_jobs[job["job_id"]] = job
+        while len(self._batch_jobs) > settings.INGEST_BATCH_JOB_HISTORY:
+            oldest = next(iter(self._batch_jobs.values()))
+            if oldest["status"] in ("queued", "running"):
+                break
+            self._batch_jobs.popitem(last=False)
+        return job
+
+    def batch_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._batch_jobs.get(job_id)
+
+    @staticmethod
+    def _finish_batch(job: Dict[str, Any], status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        job.update(status=status, result=result, error=error, finished_at=datetime.utcnow().isoformat())
+
+    async def _run_batches(self) -> None:
+        while not self._stopping:
+            job, concept_names = await self._batch_queue.get()
+            try:
+                job.update(status="running", started_at=datetime.utcnow().isoformat())
+                try:
+                    result = await self._ingestor.ingest_concepts(concept_names)
+                except Exception as e:
+                    logger.error(f"Batch ingest job {job['job_id']} failed: {str(e)}")
+                    self._finish_batch(job, "failed", error=str(e))
+                else:
+                    self._finish_batch(job, "succeeded", result=result)
+            finally:
+                self._batch_queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        batch_statuses: Dict[str, int] = {}
+        for job in self._batch_jobs.values():
+            batch_statuses[job["status"]] = batch_statuses.get(job["status"], 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "in_flight": len(self._inflight),
+            "submitted": self._submitted,
+            "deduplicated": self._deduplicated,
+            "negative_cache_size": len(self._rejected),
+            "negative_cache_hits": self._negative_hits,
+            "dropped": self._dropped,
+            "outcomes": dict(self._outcomes),
+            "batch_jobs": batch_statuses
+        }
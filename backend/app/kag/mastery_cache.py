@@ -0,0 +1,306 @@
+from typing import Dict, Any, List, Optional, Callable
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fastapi import Request
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _as_float(value: np.float32) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 6)
+
+
+class ConceptInterner:
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._names: List[Optional[str]] = []
+
+    def intern(self, concept_id: str, name: Optional[str] = None) -> int:
+        idx = self._index.get(concept_id)
+        if idx is None:
+            idx = len(self._ids)
+            self._index[concept_id] = idx
+            self._ids.append(concept_id)
+            self._names.append(name)
+        elif name and self._names[idx] != name:
+            self._names[idx] = name
+        return idx
+
+    def lookup(self, concept_id: str) -> Optional[int]:
+        return self._index.get(concept_id)
+
+    def concept_id(self, idx: int) -> str:
+        return self._ids[idx]
+
+    def name(self, idx: int) -> Optional[str]:
+        return self._names[idx]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+@dataclass
+class StudentMasteryState:
+    levels: np.ndarray
+    confidence: np.ndarray
+    mastered_bits: np.ndarray
+    threshold: float
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def empty(cls, capacity: int, threshold: float) -> 'StudentMasteryState':
+        capacity = max(capacity, 8)
+        return cls(
+            levels=np.full(capacity, np.nan, dtype=np.float32),
+            confidence=np.full(capacity, np.nan, dtype=np.float32),
+            mastered_bits=np.zeros((capacity + 7) // 8, dtype=np.uint8),
+            threshold=threshold
+        )
+
+    def _ensure_capacity(self, idx: int) -> None:
+        size = self.levels.shape[0]
+        if idx < size:
+            return
+        new_size = max(idx + 1, size * 2)
+        self.levels = np.concatenate(
+            [self.levels, np.full(new_size - size, np.nan, dtype=np.float32)]
+        )
+        self.confidence = np.concatenate(
+            [self.confidence, np.full(new_size - size, np.nan, dtype=np.float32)]
+        )
+        self.mastered_bits = np.concatenate(
+            [self.mastered_bits, np.zeros((new_size + 7) // 8 - self.mastered_bits.shape[0], dtype=np.uint8)]
+        )
+
+    def set(self, idx: int, mastery_level: Optional[float], confidence: Optional[float]) -> None:
+        self._ensure_capacity(idx)
+        self.levels[idx] = np.nan if mastery_level is None else mastery_level
+        if confidence is not None:
+            self.confidence[idx] = confidence
+
+        mask = np.uint8(0x80 >> (idx & 7))
+        if mastery_level is not None and mastery_level >= self.threshold:
+            self.mastered_bits[idx >> 3] |= mask
+        else:
+            self.mastered_bits[idx >> 3] &= ~mask
+
+    def level(self, idx: Optional[int]) -> Optional[float]:
+        if idx is None or idx >= self.levels.shape[0]:
+            return None
+        return _as_float(self.levels[idx])
+
+    def confidence_of(self, idx: Optional[int]) -> Optional[float]:
+        if idx is None or idx >= self.confidence.shape[0]:
+            return None
+        return _as_float(self.confidence[idx])
+
+    def is_mastered(self, idx: Optional[int]) -> bool:
+        if idx is None or idx >= self.levels.shape[0]:
+            return False
+        return bool(self.mastered_bits[idx >> 3] & (0x80 >> (idx & 7)))
+
+    def known_indices(self) -> np.ndarray:
+        return np.flatnonzero(~np.isnan(self.levels))
+
+    def mastered_indices(self) -> np.ndarray:
+        bits = np.unpackbits(self.mastered_bits)[:self.levels.shape[0]]
+        return np.flatnonzero(bits)
+
+
+class MasteryCache:
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        interner: Optional[ConceptInterner] = None,
+        max_students: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        threshold: Optional[float] = None
+    ):
+        self._client = neo4j_client
+        self._interner = interner or ConceptInterner()
+        self._max_students = max_students or settings.MASTERY_CACHE_MAX_STUDENTS
+        self._ttl = ttl_seconds if ttl_seconds is not None else settings.MASTERY_CACHE_TTL
+        self._threshold = threshold or settings.MIN_MASTERY_THRESHOLD
+        self._states: "OrderedDict[str, StudentMasteryState]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Writes that arrive while a student's state is loading; the load may
+        # have read the graph before them, so they are replayed on top of it.
+        self._pending_writes: Dict[str, List[Dict[str, Any]]] = {}
+        self._overlay: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def interner(self) -> ConceptInterner:
+        return self._interner
+
+    def attach_overlay(self, overlay: Callable[[str], List[Dict[str, Any]]]) -> None:
+        self._overlay = overlay
+
+    def _apply_event(self, state: StudentMasteryState, event: Dict[str, Any]) -> None:
+        idx = self._interner.intern(event["concept_id"], event.get("concept_name"))
+        if event["type"] == "mastery":
+            state.set(idx, event["mastery_level"], event.get("confidence"))
+        elif event["type"] == "inferred_mastery":
+            if state.level(idx) is not None or event["mastery_level"] >= event["threshold"]:
+                state.set(idx, event["mastery_level"], event.get("confidence"))
+
+    def _get_fresh(self, student_id: str) -> Optional[StudentMasteryState]:
+        state = self._states.get(student_id)
+        if state is None:
+            return None
+        if self._ttl and time.monotonic() - state.loaded_at > self._ttl:
+            del self._states[student_id]
+            return None
+        self._states.move_to_end(student_id)
+        return state
+
+    def _store(self, student_id: str, state: StudentMasteryState) -> None:
+        self._states[student_id] = state
+        self._states.move_to_end(student_id)
+        while len(self._states) > self._max_students:
+            self._states.popitem(last=False)
+            self._evictions += 1
+
+    async def _load(self, student_id: str) -> StudentMasteryState:
+        result = await self._client.execute_query(
+            queries.GET_STUDENT_MASTERY,
+            {"student_id": student_id}
+        )
+
+        state = StudentMasteryState.empty(len(self._interner) + len(result), self._threshold)
+        for record in result:
+            idx = self._interner.intern(record['concept_id'], record.get('concept_name'))
+            state.set(idx, record.get('mastery_level'), record.get('confidence'))
+
+        if self._overlay is not None:
+            for event in self._overlay(student_id):
+                self._apply_event(state, event)
+
+        return state
+
+    async def get_state(self, student_id: str) -> StudentMasteryState:
+        state = self._get_fresh(student_id)
+        if state is not None:
+            self._hits += 1
+            return state
+
+        pending = self._loading.get(student_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self._misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[student_id] = future
+        self._pending_writes[student_id] = []
+        try:
+            state = await self._load(student_id)
+            for event in self._pending_writes.get(student_id, []):
+                self._apply_event(state, event)
+            self._store(student_id, state)
+            future.set_result(state)
+            return state
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(student_id, None)
+            self._pending_writes.pop(student_id, None)
+
+    async def get_mastery_map(self, student_id: str) -> Dict[str, float]:
+        state = await self.get_state(student_id)
+        return {
+            self._interner.concept_id(idx): _as_float(state.levels[idx])
+            for idx in state.known_indices()
+        }
+
+    async def get_mastery_records(self, student_id: str) -> List[Dict[str, Any]]:
+        state = await self.get_state(student_id)
+        indices = state.known_indices()
+        order = indices[np.argsort(-state.levels[indices], kind="stable")]
+
+        records = []
+        for idx in order:
+            records.append({
+                "concept_id": self._interner.concept_id(idx),
+                "concept_name": self._interner.name(idx),
+                "mastery_level": _as_float(state.levels[idx]),
+                "confidence": _as_float(state.confidence[idx])
+            })
+        return records
+
+    async def get_mastered_concepts(self, student_id: str) -> List[str]:
+        state = await self.get_state(student_id)
+        return [self._interner.concept_id(idx) for idx in state.mastered_indices()]
+
+    def _record(self, student_id: str, event: Dict[str, Any]) -> None:
+        state = self._get_fresh(student_id)
+        if state is not None:
+            self._apply_event(state, event)
+        elif student_id in self._pending_writes:
+            self._pending_writes[student_id].append(event)
+
+    def record_mastery(
+        self,
+        student_id: str,
+        concept_id: str,
+        mastery_level: Optional[float],
+        confidence: Optional[float] = None,
+        concept_name: Optional[str] = None
+    ) -> None:
+        self._record(student_id, {
+            "type": "mastery",
+            "concept_id": concept_id,
+            "concept_name": concept_name,
+            "mastery_level": mastery_level,
+            "confidence": confidence
+        })
+
+    def record_inferred_mastery(
+        self,
+        student_id: str,
+        concept_id: str,
+        mastery_level: float,
+        confidence: Optional[float],
+        threshold: float
+    ) -> None:
+        self._record(student_id, {
+            "type": "inferred_mastery",
+            "concept_id": concept_id,
+            "mastery_level": mastery_level,
+            "confidence": confidence,
+            "threshold": threshold
+        })
+
+    def invalidate(self, student_id: str) -> None:
+        self._states.pop(student_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "students_cached": len(self._states),
+            "max_students": self._max_students,
+            "interned_concepts": len(self._interner),
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def get_mastery_cache(request: Request) -> MasteryCache:
+    return request.app.state.mastery_cache
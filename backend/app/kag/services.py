@@ -0,0 +1,96 @@
+from typing import Dict, Any, List
+from fastapi import Request
+import logging
+
+from app.core.metrics import MetricFamily, cache_families
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.search import CONCEPT_SEARCH_INDEX, CONCEPT_SEARCH_PROPERTIES
+from app.kag.traversal_engine import TraversalEngine
+from app.kag.gap_analyzer import GapAnalyzer
+from app.kag.context_builder import ContextBuilder
+from app.kag.concept_resolver import ConceptResolver
+from app.kag.auto_ingest import AutoIngestor
+from app.kag.ingest_queue import IngestQueue
+from app.kag.mastery_cache import MasteryCache
+from app.events.pipeline import EventPipeline
+from app.llm.groq_client import GroqClient
+
+logger = logging.getLogger(__name__)
+
+
+class KAGServices:
+    """The KAG pipeline services, built once per application.
+
+    Handlers share these instances instead of constructing them per request,
+    so the resolver's name index, the mastery cache's concept intern table and
+    the context builder's constraint templates stay warm between requests.
+    """
+
+    def __init__(
+        self,
+        neo4j_client: Neo4jClient,
+        groq: GroqClient,
+        mastery_cache: MasteryCache,
+        event_pipeline: EventPipeline
+    ):
+        self._client = neo4j_client
+        self.mastery_cache = mastery_cache
+        self.traversal_engine = TraversalEngine(neo4j_client, mastery_cache)
+        self.gap_analyzer = GapAnalyzer(neo4j_client, event_pipeline)
+        self.context_builder = ContextBuilder()
+        self.resolver = ConceptResolver(neo4j_client, mastery_cache.interner)
+        self.ingestor = AutoIngestor(neo4j_client, groq, self.resolver)
+        self.ingest_queue = IngestQueue(self.ingestor, self.resolver)
+
+    async def start(self) -> None:
+        try:
+            # Name lookups fall back to this index; creating it is a no-op
+            # once the ingestion script has.
+            await self._client.create_fulltext_index(
+                CONCEPT_SEARCH_INDEX, "Concept", CONCEPT_SEARCH_PROPERTIES
+            )
+        except Exception as e:
+            logger.warning(f"Creating concept search index failed: {str(e)}")
+        try:
+            await self.resolver.refresh()
+        except Exception as e:
+            # The resolver loads lazily on first use, so startup carries on.
+            logger.warning(f"Warming concept resolver failed: {str(e)}")
+        await self.ingest_queue.start()
+
+    async def stop(self) -> None:
+        await self.ingest_queue.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "resolver": self.resolver.stats(),
+            "traversal": self.traversal_engine.stats(),
+            "gap_analyzer": self.gap_analyzer.stats(),
+            "context_builder": self.context_builder.stats(),
+            "ingestor": self.ingestor.stats(),
+            "ingest_queue": self.ingest_queue.stats(),
+            "mastery_cache": self.mastery_cache.stats()
+        }
+
+    def metric_families(self) -> List[MetricFamily]:
+        mastery = self.mastery_cache.stats()
+        resolver = self.resolver.stats()
+        queue = self.ingest_queue.stats()
+        families = cache_families({
+            "mastery": (mastery["hits"], mastery["misses"]),
+            "resolver": (resolver["exact_hits"] + resolver["fuzzy_hits"], resolver["misses"]),
+            # Every submission that got past the negative cache counts as a miss.
+            "ingest_negative": (
+                queue["negative_cache_hits"],
+                queue["submitted"] + queue["deduplicated"] + queue["dropped"]
+            )
+        })
+        depth = MetricFamily("kag_ingest_queue_depth", "gauge", "Auto-ingestion requests waiting or in flight.")
+        depth.add(queue["queued"], state="queued")
+        depth.add(queue["in_flight"], state="in_flight")
+        families.append(depth)
+        return families
+
+
+def get_kag_services(request: Request) -> KAGServices:
+    return request.app.state.kag_services
@@ -0,0 +1,49 @@
+from typing import Dict, Any, List
+import re
+
+from app.core.config import settings
+
+
+OTHER_BUCKET = "<other>"
+MAX_SIGNATURE_LENGTH = 120
+
+_QUOTED = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize_pattern(error_pattern: str) -> str:
+    def _quoted(match: re.Match) -> str:
+        value = (match.group(1) if match.group(1) is not None else match.group(2)).strip()
+        return "<num>" if _NUMBER.fullmatch(value) else f"'{value}'"
+
+    signature = _QUOTED.sub(_quoted, error_pattern.strip().lower())
+    signature = _NUMBER.sub("<num>", signature)
+    signature = _WHITESPACE.sub(" ", signature).strip(" .;:")
+    return signature[:MAX_SIGNATURE_LENGTH] or OTHER_BUCKET
+
+
+def struggle_query_params() -> Dict[str, Any]:
+    return {
+        "max_recent_patterns": settings.STRUGGLE_RECENT_PATTERNS,
+        "max_pattern_buckets": settings.STRUGGLE_PATTERN_BUCKETS,
+        "other_bucket": OTHER_BUCKET
+    }
+
+
+def add_to_buckets(buckets: List[Dict[str, Any]], signature: str) -> List[Dict[str, Any]]:
+    buckets = [dict(b) for b in buckets]
+    for bucket in buckets:
+        if bucket["signature"] == signature:
+            bucket["count"] += 1
+            return buckets
+
+    if len(buckets) >= settings.STRUGGLE_PATTERN_BUCKETS:
+        signature = OTHER_BUCKET
+        for bucket in buckets:
+            if bucket["signature"] == OTHER_BUCKET:
+                bucket["count"] += 1
+                return buckets
+
+    buckets.append({"signature": signature, "count": 1})
+    return buckets
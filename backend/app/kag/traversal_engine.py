@@ -1,11 +1,17 @@
 from typing import List, Dict, Any, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
+from collections import Counter
 import logging
+import time
 
 from app.graph.neo4j_client import Neo4jClient
 from app.graph.cypher_queries import queries
+from app.graph.search import concept_search_params
+from app.graph.traversal_queries import TraversalQueries, GET_CHAIN_EDGES, chain_depth
+from app.kag.mastery_cache import MasteryCache
 from app.core.config import settings
+from app.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,8 @@ class ConceptNode:
     difficulty: Optional[float] = None
     curriculum_code: Optional[str] = None
     keywords: List[str] = field(default_factory=list)
+    order_hint: Optional[float] = None
+    expansion_pending: bool = False
     
     @classmethod
     def from_neo4j(cls, data: Dict[str, Any]) -> 'ConceptNode':
@@ -36,9 +44,11 @@ class ConceptNode:
             description=data.get('description'),
             domain=data.get('domain'),
             grade_level=data.get('grade_level'),
-            difficulty=data.get('difficulty'),
+            difficulty=data.get('difficulty_calibrated', data.get('difficulty')),
             curriculum_code=data.get('curriculum_code'),
-            keywords=data.get('keywords', [])
+            keywords=data.get('keywords', []),
+            order_hint=data.get('order_hint'),
+            expansion_pending=bool(data.get('expansion_pending'))
         )
 
 
@@ -64,15 +74,20 @@ class TraversalContext:
 
 
 class TraversalEngine:
-    def __init__(self, neo4j_client: Neo4jClient):
+    def __init__(self, neo4j_client: Neo4jClient, mastery_cache: Optional[MasteryCache] = None):
         """
         Initialize traversal engine.
         
         Args:
             neo4j_client: Connected Neo4j client instance
+            mastery_cache: Optional per-student mastery cache used for reads
         """
         self._client = neo4j_client
+        self._mastery_cache = mastery_cache
         self._max_depth = settings.MAX_DEPENDENCY_DEPTH
+        self._traversals = TraversalQueries()
+        self._results = Counter()
+        self._traversal_seconds = 0.0
     
     async def resolve_concept(self, concept_query: str) -> Optional[ConceptNode]:
         logger.info(f"Resolving concept: {concept_query}")
@@ -87,13 +102,11 @@ class TraversalEngine:
             return ConceptNode.from_neo4j(result[0]['c'])
         
 
-        result = await self._client.execute_query(
-            queries.GET_CONCEPT_BY_NAME,
-            {"name": concept_query}
-        )
+        params = concept_search_params(concept_query)
+        result = await self._client.execute_query(queries.GET_CONCEPT_BY_NAME, params) if params else []
         
         if result:
-            logger.info(f"Found concept by name: {result[0]['c']['name']}")
+            logger.info(f"Found concept by name: {result[0]['c']['name']} (score {result[0]['score']:.2f})")
             return ConceptNode.from_neo4j(result[0]['c'])
         
         logger.warning(f"Concept not found in knowledge graph: {concept_query}")
@@ -104,13 +117,8 @@ class TraversalEngine:
         depth = max_depth or self._max_depth
         logger.info(f"Traversing prerequisites for {concept_id} with max depth {depth}")
         
-        result = await self._client.execute_query(
-            queries.GET_PREREQUISITES,
-            {
-                "concept_id": concept_id,
-                "max_depth": depth
-            }
-        )
+        query, params = self._traversals.prerequisites(concept_id, depth)
+        result = await self._client.execute_query(query, params)
         
         prerequisites = [
             ConceptNode.from_neo4j(record['prereq']) 
@@ -134,15 +142,15 @@ class TraversalEngine:
         
         prerequisites = await self.get_prerequisites(concept_id)
         
-        depth_result = await self._client.execute_query(
-            queries.GET_DEPENDENCY_CHAIN,
-            {"concept_id": concept_id}
-        )
-        
         max_depth = 0
-        if depth_result:
-            depths = [r['depth'] for r in depth_result]
-            max_depth = max(depths) if depths else 0
+        if prerequisites:
+            edge_result = await self._client.execute_query(
+                GET_CHAIN_EDGES,
+                {"concept_ids": [concept_id] + [p.id for p in prerequisites]}
+            )
+            max_depth = chain_depth(
+                concept_id, ((r['source_id'], r['target_id']) for r in edge_result)
+            )
         
         return DependencyChain(
             target_concept=target,
@@ -154,6 +162,11 @@ class TraversalEngine:
     
     async def get_user_mastery_state(self, student_id: str) -> Dict[str, float]:
     
+        if self._mastery_cache is not None:
+            mastery_state = await self._mastery_cache.get_mastery_map(student_id)
+            logger.info(f"Retrieved cached mastery state for {len(mastery_state)} concepts")
+            return mastery_state
+        
         result = await self._client.execute_query(
             queries.GET_STUDENT_MASTERY,
             {"student_id": student_id}
@@ -171,14 +184,10 @@ class TraversalEngine:
 
         mastery_threshold = threshold or settings.MIN_MASTERY_THRESHOLD
         
-        result = await self._client.execute_query(
-            queries.FIND_KNOWLEDGE_GAPS,
-            {
-                "student_id": student_id,
-                "concept_id": concept_id,
-                "threshold": mastery_threshold
-            }
+        query, params = self._traversals.knowledge_gaps(
+            student_id, concept_id, mastery_threshold, self._max_depth
         )
+        result = await self._client.execute_query(query, params)
         
         gaps = [
             ConceptNode.from_neo4j(record['gap_concept'])
@@ -210,6 +219,19 @@ class TraversalEngine:
         concept_query: str,
         student_id: str
     ) -> TraversalContext:
+        started = time.perf_counter()
+        with tracer.span("kag.traverse", attributes={"kag.concept_query": concept_query}) as span:
+            context = await self._traverse(concept_query, student_id)
+            span.set_attribute("kag.traversal_result", context.result.value)
+        self._results[context.result.value] += 1
+        self._traversal_seconds += time.perf_counter() - started
+        return context
+    
+    async def _traverse(
+        self,
+        concept_query: str,
+        student_id: str
+    ) -> TraversalContext:
     
         logger.info(f"Starting KAG traversal for: {concept_query}")
         
@@ -269,3 +291,11 @@ class TraversalEngine:
         )
         
         return context
+    
+    def stats(self) -> Dict[str, Any]:
+        traversals = sum(self._results.values())
+        return {
+            "traversals": traversals,
+            "results": dict(self._results),
+            "avg_traversal_ms": round(self._traversal_seconds * 1000 / traversals, 2) if traversals else 0.0
+        }
@@ -1,14 +1,21 @@
 from groq import AsyncGroq
-from typing import Optional, Dict
+from typing import Optional, Dict, Any, AsyncIterator
 from dataclasses import dataclass
 import logging
 
 from app.core.config import settings
+from app.core.metrics import record_llm_usage
+from app.core.tracing import tracer, SPAN_KIND_CLIENT
 from app.kag.context_builder import ReasoningContext
+from app.llm.rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
 
+# Response type that LLM metrics file auto-ingestion extraction calls under.
+EXTRACTION_RESPONSE_TYPE = "extraction"
+
+
 @dataclass
 class LLMResponse:
     content: str
@@ -24,44 +31,114 @@ class GroqClient:
         self._model = settings.GROQ_MODEL
         self._max_tokens = settings.GROQ_MAX_TOKENS
         self._temperature = settings.GROQ_TEMPERATURE
+        # Shared by every extraction call, single or batched.
+        self._extraction_limiter = RateLimiter(
+            settings.GROQ_EXTRACTION_RPM, settings.GROQ_EXTRACTION_TPM
+        )
 
         self._system_prompt = """
 You are a KAG verbalization engine.
 ONLY express reasoning. NEVER add knowledge.
 """
 
-    async def raw_completion(self, prompt: str) -> dict:
+    @staticmethod
+    def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+        return len(prompt) // 4 + max_tokens
+
+    def _span_attributes(self, response_type: str) -> Dict[str, Any]:
+        return {
+            "gen_ai.system": "groq",
+            "gen_ai.request.model": self._model,
+            "kag.response_type": response_type
+        }
+
+    @staticmethod
+    def _record_usage_attributes(span, usage) -> None:
+        span.set_attribute("gen_ai.usage.input_tokens", usage.prompt_tokens)
+        span.set_attribute("gen_ai.usage.output_tokens", usage.completion_tokens)
+
+    async def raw_completion(self, prompt: str, max_tokens: int = 800) -> dict:
         """
         Direct LLM call used ONLY for auto-ingestion.
         This bypasses KAG guardrails intentionally.
         """
 
+        await self._extraction_limiter.acquire(self._estimate_tokens(prompt, max_tokens))
+
         try:
-            completion = await self._client.chat.completions.create(
-                model=self._model,
-                messages=[
-                    {"role": "system", "content": "You extract structured academic knowledge."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=800
-            )
+            with tracer.span("groq chat", SPAN_KIND_CLIENT, self._span_attributes(EXTRACTION_RESPONSE_TYPE)) as span:
+                completion = await self._client.chat.completions.create(
+                    model=self._model,
+                    messages=[
+                        {"role": "system", "content": "You extract structured academic knowledge."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=max_tokens
+                )
+                self._record_usage_attributes(span, completion.usage)
 
             content = completion.choices[0].message.content
+            usage = {
+                "prompt_tokens": completion.usage.prompt_tokens,
+                "completion_tokens": completion.usage.completion_tokens,
+                "total_tokens": completion.usage.total_tokens,
+            }
+            record_llm_usage(EXTRACTION_RESPONSE_TYPE, usage)
 
             return {
                 "content": content,
-                "usage": {
-                    "prompt_tokens": completion.usage.prompt_tokens,
-                    "completion_tokens": completion.usage.completion_tokens,
-                    "total_tokens": completion.usage.total_tokens,
-                }
+                "usage": usage
             }
 
         except Exception as e:
             logger.error(f"Groq raw completion failed: {str(e)}")
             raise RuntimeError("LLM extraction failed")
 
+    async def stream_completion(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        """
+        Streaming variant of raw_completion for batch extraction, so the
+        caller can keep whatever arrived if the stream is cut short.
+        """
+
+        await self._extraction_limiter.acquire(self._estimate_tokens(prompt, max_tokens))
+
+        try:
+            # The span covers opening the stream only: a span kept current
+            # across yields would leak into the consumer's context.
+            with tracer.span("groq chat", SPAN_KIND_CLIENT, {
+                **self._span_attributes(EXTRACTION_RESPONSE_TYPE), "gen_ai.request.stream": True
+            }):
+                stream = await self._client.chat.completions.create(
+                    model=self._model,
+                    messages=[
+                        {"role": "system", "content": "You extract structured academic knowledge."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+            usage = None
+            try:
+                async for chunk in stream:
+                    # Groq reports usage on the final chunk only.
+                    x_groq = getattr(chunk, "x_groq", None)
+                    if x_groq is not None and x_groq.usage is not None:
+                        usage = {
+                            "prompt_tokens": x_groq.usage.prompt_tokens,
+                            "completion_tokens": x_groq.usage.completion_tokens,
+                            "total_tokens": x_groq.usage.total_tokens
+                        }
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # A stream cut short still counts as a call, without tokens.
+                record_llm_usage(EXTRACTION_RESPONSE_TYPE, usage)
+        except Exception as e:
+            logger.error(f"Groq streaming completion failed: {str(e)}")
+            raise RuntimeError("LLM extraction failed")
+
     async def verbalize(
         self,
         context: ReasoningContext,
@@ -72,26 +149,30 @@ ONLY express reasoning. NEVER add knowledge.
 
         prompt = self._format_context_prompt(context, user_query)
 
-        completion = await self._client.chat.completions.create(
-            model=self._model,
-            messages=[
-                {"role": "system", "content": self._system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=self._max_tokens,
-            temperature=self._temperature
-        )
+        with tracer.span("groq chat", SPAN_KIND_CLIENT, self._span_attributes(context.response_type)) as span:
+            completion = await self._client.chat.completions.create(
+                model=self._model,
+                messages=[
+                    {"role": "system", "content": self._system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=self._max_tokens,
+                temperature=self._temperature
+            )
+            self._record_usage_attributes(span, completion.usage)
 
         msg = completion.choices[0]
+        usage = {
+            "prompt_tokens": completion.usage.prompt_tokens,
+            "completion_tokens": completion.usage.completion_tokens,
+            "total_tokens": completion.usage.total_tokens
+        }
+        record_llm_usage(context.response_type, usage)
 
         return LLMResponse(
             content=msg.message.content,
             model=completion.model,
-            usage={
-                "prompt_tokens": completion.usage.prompt_tokens,
-                "completion_tokens": completion.usage.completion_tokens,
-                "total_tokens": completion.usage.total_tokens
-            },
+            usage=usage,
             finish_reason=msg.finish_reason,
             response_type=context.response_type
         )
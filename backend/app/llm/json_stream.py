@@ -0,0 +1,65 @@
+from typing import Dict, Any, List
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JSONObjectStream:
+    """Incrementally pulls top-level JSON objects out of model output.
+
+    Feed text as it arrives; each call returns the objects completed by that
+    chunk. Anything outside an object (code fences, the enclosing array's
+    brackets and commas, prose) is skipped, so a response truncated at the
+    token cap still yields every object that was finished, and one malformed
+    object does not lose the rest.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.malformed = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        objects.append(json.loads(raw))
+                    except ValueError:
+                        self.malformed += 1
+                        logger.warning(f"Skipping malformed JSON object from LLM: {raw[:200]}")
+        return objects
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the input ended inside an object."""
+        return self._depth > 0
+
+
+def parse_json_objects(text: str) -> List[Dict[str, Any]]:
+    return JSONObjectStream().feed(text)
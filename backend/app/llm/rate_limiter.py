@@ -0,0 +1,54 @@
+from typing import Optional
+import asyncio
+import time
+
+
+class _Bucket:
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self._rate)
+
+
+class RateLimiter:
+    """Request and token budgets per minute, as LLM providers meter them.
+
+    Waiters are served in arrival order. A limit of zero disables that
+    budget, and a single call larger than the token budget is clamped to it
+    rather than waiting forever.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float = 0):
+        self._requests: Optional[_Bucket] = _Bucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens: Optional[_Bucket] = _Bucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                if self._requests is not None:
+                    self._requests.refill(now)
+                    wait = self._requests.wait_for(1)
+                if self._tokens is not None:
+                    tokens = min(tokens, self._tokens.capacity)
+                    self._tokens.refill(now)
+                    wait = max(wait, self._tokens.wait_for(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= tokens
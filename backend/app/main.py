@@ -4,11 +4,26 @@ from contextlib import asynccontextmanager
 import logging
 import sys
 import asyncio
-from app.routers import student, learning, assessment, health, admin
+from app.routers import student, learning, assessment, health, admin, analytics
 from app.core.config import settings
 from app.graph.neo4j_client import Neo4jClient
+from app.kag.mastery_cache import MasteryCache
+from app.assessment.store import create_assessment_store, run_expiry_loop
+from app.assessment.grading import grading_engine
+from app.events.pipeline import EventPipeline
+from app.kag.services import KAGServices
+from app.llm.groq_client import groq_client
+from app.analytics.calibration import CalibrationPipeline
+from app.analytics.sequence_feedback import SequenceFeedbackPipeline
+from app.analytics.writeback import run_writeback_loop
+from app.analytics.job_service import AnalyticsJobService
+from app.analytics.stream_stats import StreamStatsReader
+from app.analytics.views import ConceptStatsView, run_view_refresh_loop
 from app.routers import knowledge
 from app.routers import ingest
+from app.routers import metrics as metrics_router
+from app.core.metrics import metrics, ServerTimingMiddleware
+from app.core.tracing import tracer, TracingMiddleware
 
 logging.basicConfig(
     level=logging.DEBUG if settings.DEBUG else logging.INFO,
@@ -20,6 +35,7 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    await tracer.start()
     neo4j_client = Neo4jClient()
     for attempt in range(10):
         try:
@@ -31,10 +47,56 @@ async def lifespan(app: FastAPI):
             await asyncio.sleep(3)
     else:
         raise RuntimeError("Neo4j never became available")
+    if settings.QUERY_WARMUP_ENABLED:
+        await neo4j_client.warm_up_queries()
     app.state.neo4j_client = neo4j_client
+    mastery_cache = MasteryCache(neo4j_client)
+    app.state.mastery_cache = mastery_cache
+    event_pipeline = EventPipeline(neo4j_client, mastery_cache)
+    await event_pipeline.start()
+    app.state.event_pipeline = event_pipeline
+    kag_services = KAGServices(neo4j_client, groq_client, mastery_cache, event_pipeline)
+    await kag_services.start()
+    app.state.kag_services = kag_services
+    metrics.add_collector(neo4j_client.metric_families)
+    metrics.add_collector(kag_services.metric_families)
+    assessment_store = create_assessment_store()
+    app.state.assessment_store = assessment_store
+    expiry_task = asyncio.create_task(run_expiry_loop(assessment_store))
+    analytics_jobs = AnalyticsJobService()
+    await analytics_jobs.start()
+    app.state.analytics_jobs = analytics_jobs
+    if settings.STREAM_STATS_ENABLED:
+        app.state.stream_stats = StreamStatsReader()
+    concept_stats_view = ConceptStatsView(neo4j_client)
+    app.state.concept_stats_view = concept_stats_view
+    view_task = None
+    if settings.VIEW_REFRESH_ENABLED:
+        view_task = asyncio.create_task(run_view_refresh_loop(concept_stats_view))
+    writeback_tasks = []
+    if settings.CALIBRATION_ENABLED:
+        writeback_tasks.append(asyncio.create_task(
+            run_writeback_loop(CalibrationPipeline(neo4j_client, analytics_jobs))
+        ))
+    if settings.SEQUENCE_FEEDBACK_ENABLED:
+        writeback_tasks.append(asyncio.create_task(
+            run_writeback_loop(SequenceFeedbackPipeline(neo4j_client, analytics_jobs))
+        ))
     yield
     logger.info("Shutting down application...")
+    metrics.clear_collectors()
+    expiry_task.cancel()
+    for task in writeback_tasks:
+        task.cancel()
+    if view_task is not None:
+        view_task.cancel()
+    await analytics_jobs.stop()
+    await kag_services.stop()
+    await event_pipeline.stop()
+    await assessment_store.close()
+    grading_engine.shutdown()
     await neo4j_client.close()
+    await tracer.stop()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -53,14 +115,18 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=False,
 )
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(ingest.router, prefix="/api/v1/admin", tags=["Ingest"])
 app.include_router(knowledge.router)
 app.include_router(admin.router, prefix="/api/v1")
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics_router.router, tags=["Metrics"])
 app.include_router(student.router, prefix="/api/v1/student", tags=["Student"])
 app.include_router(learning.router, prefix="/api/v1/learning", tags=["Learning"])
 app.include_router(assessment.router, prefix="/api/v1/assessment", tags=["Assessment"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
 @app.get("/")
 async def root():
@@ -1,13 +1,74 @@
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
 from fastapi import APIRouter, Depends
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
 from app.data.curriculum_dataset import load_sample_curriculum
+from app.kag.mastery_cache import MasteryCache, get_mastery_cache
+from app.kag.services import KAGServices, get_kag_services
+from app.kag.auto_ingest import NotAConceptError
+from app.kag.concept_identity import ConceptIdConflict, upsert_concept
+from app.core.tracing import tracer
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+@router.get("/kag/stats")
+async def kag_stats(kag: KAGServices = Depends(get_kag_services)):
+    return kag.stats()
+
+
+@router.get("/tracing/stats")
+async def tracing_stats():
+    return tracer.stats()
+
+
+@router.get("/queries/stats")
+async def query_stats(neo4j: Neo4jClient = Depends(get_neo4j_client)):
+    return neo4j.query_stats()
+
+
+class BatchIngestRequest(BaseModel):
+    concepts: List[str] = Field(..., min_length=1, max_length=2000)
+
+
+def _batch_job_status(job):
+    return {key: value for key, value in job.items() if key != "result"}
+
+
+@router.post("/ingest/batch", status_code=202)
+async def batch_ingest(data: BatchIngestRequest, kag: KAGServices = Depends(get_kag_services)):
+    job = kag.ingest_queue.submit_batch(data.concepts)
+    if job is None:
+        raise HTTPException(status_code=503, detail="Too many batch ingest jobs are queued; try again later")
+    return _batch_job_status(job)
+
+
+@router.get("/ingest/batch/{job_id}")
+async def batch_ingest_status(job_id: str, kag: KAGServices = Depends(get_kag_services)):
+    job = kag.ingest_queue.batch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+class ExpandIngestRequest(BaseModel):
+    concept: str = Field(..., min_length=1)
+    max_depth: Optional[int] = Field(default=None, ge=0, le=5)
+    max_llm_calls: Optional[int] = Field(default=None, ge=1, le=100)
+
+
+@router.post("/ingest/expand")
+async def expand_ingest(data: ExpandIngestRequest, kag: KAGServices = Depends(get_kag_services)):
+    try:
+        return await kag.ingestor.expand_concept(data.concept, data.max_depth, data.max_llm_calls)
+    except NotAConceptError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
 @router.post("/load-curriculum")
 async def load_curriculum(neo4j: Neo4jClient = Depends(get_neo4j_client)):
     await load_sample_curriculum(neo4j)
@@ -35,15 +96,14 @@ class MasteryCreate(BaseModel):
 
 @router.post("/concept")
 async def create_concept(data: ConceptCreate, neo4j: Neo4jClient = Depends(get_neo4j_client)):
-    query = """
-    MERGE (c:Concept {id: $id})
-    SET c.name = $name,
-        c.domain = $domain,
-        c.description = $description,
-        c.difficulty = $difficulty
-    """
-    await neo4j.execute_query(query, data.dict())
-    return {"status": "Concept created", "concept": data.id}
+    try:
+        stored_id = await upsert_concept(
+            neo4j, data.id, data.name,
+            description=data.description, domain=data.domain, difficulty=data.difficulty
+        )
+    except ConceptIdConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "Concept created", "concept": stored_id}
 
 
 @router.post("/prerequisite")
@@ -58,13 +118,21 @@ async def add_prerequisite(data: PrerequisiteCreate, neo4j: Neo4jClient = Depend
 
 
 @router.post("/student/mastery")
-async def add_mastery(data: MasteryCreate, neo4j: Neo4jClient = Depends(get_neo4j_client)):
+async def add_mastery(data: MasteryCreate, neo4j: Neo4jClient = Depends(get_neo4j_client), mastery_cache: MasteryCache = Depends(get_mastery_cache)):
     query = """
     MERGE (s:Student {id:$student_id})
     WITH s
     MATCH (c:Concept {id:$concept_id})
     MERGE (s)-[m:MASTERS]->(c)
     SET m.mastery_level = $mastery_level
+    RETURN c.name AS concept_name
     """
-    await neo4j.execute_query(query, data.dict())
+    result = await neo4j.execute_query(query, data.dict())
+    if result:
+        mastery_cache.record_mastery(
+            data.student_id,
+            data.concept_id,
+            data.mastery_level,
+            concept_name=result[0].get("concept_name")
+        )
     return {"status": "Mastery recorded"}
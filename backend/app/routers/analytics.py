@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional
+import os
+
+from app.analytics.job_service import AnalyticsJobService, get_job_service, FINISHED_STATUSES
+from app.analytics.outputs import read_manifest, MANIFEST_FILE
+
+router = APIRouter()
+
+
+class JobRequest(BaseModel):
+    job_type: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in job.items() if key != "result"}
+
+
+@router.post("/jobs", status_code=202)
+async def start_job(
+    request: JobRequest,
+    jobs: AnalyticsJobService = Depends(get_job_service)
+) -> Dict[str, Any]:
+    try:
+        job, created = await jobs.submit(request.job_type, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {**_job_status(job), "deduplicated": not created}
+
+
+@router.get("/jobs")
+async def list_jobs(
+    limit: int = 20,
+    status: Optional[str] = None,
+    jobs: AnalyticsJobService = Depends(get_job_service)
+) -> Dict[str, Any]:
+    entries = await jobs.list(min(limit, 200), status)
+    return {"jobs": [_job_status(job) for job in entries], "count": len(entries)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, jobs: AnalyticsJobService = Depends(get_job_service)) -> Dict[str, Any]:
+    job = await jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, jobs: AnalyticsJobService = Depends(get_job_service)) -> Dict[str, Any]:
+    job = await jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}")
+
+    result = job["result"] or {}
+    output_path = result.get("output_path")
+    has_manifest = output_path and os.path.exists(os.path.join(output_path, MANIFEST_FILE))
+    manifest = read_manifest(output_path) if has_manifest else None
+
+    return {
+        "job_id": job_id,
+        "job_type": job["job_type"],
+        "status": job["status"],
+        "error": job["error"],
+        "result": result,
+        "manifest": manifest
+    }
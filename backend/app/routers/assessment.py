@@ -2,13 +2,22 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+import asyncio
 import logging
 import uuid
 
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
 from app.graph.cypher_queries import queries
-from app.kag.traversal_engine import TraversalEngine
-from app.kag.gap_analyzer import GapAnalyzer
+from app.kag.mastery_cache import MasteryCache, get_mastery_cache
+from app.kag.services import KAGServices, get_kag_services
+from app.assessment.store import AssessmentStore, get_assessment_store
+from app.assessment.grading import grading_engine
+from app.assessment.knowledge_tracing import knowledge_tracer, PrerequisiteEvidence
+from app.events.event_log import ASSESSMENT_SOURCE
+from app.events.pipeline import EventPipeline, get_event_pipeline
+from app.analytics.stream_stats import StreamStatsReader, get_stream_stats
+from app.analytics.views import ConceptStatsView, get_concept_stats_view, view_freshness
+from app.core.config import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -48,11 +57,8 @@ class MasteryReport(BaseModel):
     recommended_focus: List[str]
 
 
-active_assessments: Dict[str, Dict[str, Any]] = {}
-
-
 @router.post("/create", response_model=Dict[str, Any])
-async def create_assessment(assessment: AssessmentCreate, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
+async def create_assessment(assessment: AssessmentCreate, neo4j: Neo4jClient = Depends(get_neo4j_client), store: AssessmentStore = Depends(get_assessment_store)) -> Dict[str, Any]:
     concept = await neo4j.execute_query(queries.GET_CONCEPT_BY_ID, {"concept_id": assessment.concept_id})
     if not concept:
         raise HTTPException(status_code=404, detail=f"Concept not found: {assessment.concept_id}")
@@ -61,9 +67,16 @@ async def create_assessment(assessment: AssessmentCreate, neo4j: Neo4jClient = D
     if not student:
         raise HTTPException(status_code=404, detail=f"Student not found: {assessment.student_id}")
 
+    unknown_scoring = grading_engine.unknown_scoring_types(assessment.questions)
+    if unknown_scoring:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring types: {', '.join(unknown_scoring)}")
+    invalid_questions = grading_engine.invalid_questions(assessment.questions)
+    if invalid_questions:
+        raise HTTPException(status_code=400, detail=f"Invalid questions: {'; '.join(invalid_questions)}")
+
     assessment_id = f"assess_{uuid.uuid4().hex[:12]}"
 
-    active_assessments[assessment_id] = {
+    await store.put({
         "assessment_id": assessment_id,
         "student_id": assessment.student_id,
         "concept_id": assessment.concept_id,
@@ -71,7 +84,7 @@ async def create_assessment(assessment: AssessmentCreate, neo4j: Neo4jClient = D
         "questions": assessment.questions,
         "created_at": datetime.utcnow().isoformat(),
         "status": "pending"
-    }
+    })
 
     return {
         "assessment_id": assessment_id,
@@ -84,74 +97,64 @@ async def create_assessment(assessment: AssessmentCreate, neo4j: Neo4jClient = D
 
 
 @router.post("/submit", response_model=AssessmentResult)
-async def submit_assessment(submission: AnswerSubmission, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
-    assessment = active_assessments.get(submission.assessment_id)
+async def submit_assessment(submission: AnswerSubmission, neo4j: Neo4jClient = Depends(get_neo4j_client), mastery_cache: MasteryCache = Depends(get_mastery_cache), store: AssessmentStore = Depends(get_assessment_store), events: EventPipeline = Depends(get_event_pipeline), kag: KAGServices = Depends(get_kag_services)) -> Dict[str, Any]:
+    assessment = await store.get(submission.assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail=f"Assessment not found: {submission.assessment_id}")
 
     if assessment["student_id"] != submission.student_id:
         raise HTTPException(status_code=403, detail="Student ID mismatch")
 
-    questions = assessment["questions"]
-    total_questions = len(questions)
-    correct_count = 0
-    feedback = []
-
-    for question in questions:
-        question_id = question.get("id")
-        correct_answer = question.get("correct_answer")
-
-        student_answer = None
-        for answer in submission.answers:
-            if answer.get("question_id") == question_id:
-                student_answer = answer.get("response")
-                break
-
-        is_correct = student_answer == correct_answer
-        if is_correct:
-            correct_count += 1
-
-        feedback.append({
-            "question_id": question_id,
-            "question": question.get("text"),
-            "student_answer": student_answer,
-            "correct_answer": correct_answer,
-            "is_correct": is_correct,
-            "explanation": question.get("explanation", "")
-        })
-
-    score = correct_count / total_questions if total_questions > 0 else 0
-    mastery_level = score
-
-    await neo4j.execute_query(
-        queries.UPDATE_MASTERY,
-        {
-            "student_id": submission.student_id,
-            "concept_id": assessment["concept_id"],
-            "mastery_level": mastery_level,
-            "confidence": min(score + 0.1, 1.0)
-        }
+    grading = grading_engine.grade(assessment["questions"], submission.answers)
+    feedback = grading.feedback
+    score = grading.score
+    responses = [fb["is_correct"] for fb in feedback]
+
+    mastery_state = await mastery_cache.get_state(submission.student_id)
+    concept_idx = mastery_cache.interner.lookup(assessment["concept_id"])
+    mastery_level = knowledge_tracer.update(mastery_state.level(concept_idx), responses)
+    confidence = knowledge_tracer.confidence(mastery_state.confidence_of(concept_idx), len(responses))
+
+    await events.record_mastery(
+        submission.student_id,
+        assessment["concept_id"],
+        mastery_level,
+        confidence,
+        source=ASSESSMENT_SOURCE
     )
 
-    for fb in feedback:
-        if not fb["is_correct"]:
-            error_pattern = f"Incorrect: chose '{fb['student_answer']}' over '{fb['correct_answer']}'"
-            await neo4j.execute_query(
-                queries.RECORD_STRUGGLE,
-                {
-                    "student_id": submission.student_id,
-                    "concept_id": assessment["concept_id"],
-                    "error_pattern": error_pattern
-                }
-            )
-
-    traversal_engine = TraversalEngine(neo4j)
-    gap_analyzer = GapAnalyzer(neo4j)
+    prereq_records = await neo4j.execute_query(
+        queries.GET_DIRECT_PREREQUISITES,
+        {"concept_id": assessment["concept_id"]}
+    )
+    evidence = []
+    for record in prereq_records:
+        prereq_idx = mastery_cache.interner.lookup(record['concept_id'])
+        evidence.append(PrerequisiteEvidence(
+            concept_id=record['concept_id'],
+            strength=record['strength'],
+            prior=mastery_state.level(prereq_idx),
+            prior_confidence=mastery_state.confidence_of(prereq_idx)
+        ))
+
+    propagated = knowledge_tracer.propagate(responses, evidence)
+    if propagated:
+        await events.record_inferred_mastery(submission.student_id, propagated)
+
+    await events.record_struggles(
+        submission.student_id,
+        assessment["concept_id"],
+        [
+            f"Incorrect: chose '{fb['student_answer']}' over '{fb['correct_answer']}'"
+            for fb in feedback
+            if not fb["is_correct"]
+        ]
+    )
 
     recommendations = []
 
     if mastery_level < 0.7:
-        traversal = await traversal_engine.traverse(assessment["concept_id"], submission.student_id)
+        traversal = await kag.traversal_engine.traverse(assessment["concept_id"], submission.student_id)
         if traversal.knowledge_gaps:
             for gap in traversal.knowledge_gaps[:3]:
                 recommendations.append(f"Review prerequisite: {gap.name}")
@@ -167,6 +170,8 @@ async def submit_assessment(submission: AnswerSubmission, neo4j: Neo4jClient = D
     assessment["status"] = "completed"
     assessment["score"] = score
     assessment["mastery_level"] = mastery_level
+    assessment["responses"] = responses
+    await store.put(assessment)
 
     return {
         "assessment_id": submission.assessment_id,
@@ -174,21 +179,24 @@ async def submit_assessment(submission: AnswerSubmission, neo4j: Neo4jClient = D
         "concept_id": assessment["concept_id"],
         "score": score,
         "mastery_level": mastery_level,
-        "questions_correct": correct_count,
-        "questions_total": total_questions,
+        "questions_correct": grading.questions_correct,
+        "questions_total": grading.questions_total,
         "feedback": feedback,
         "recommendations": recommendations
     }
 
 
 @router.get("/report/{student_id}", response_model=MasteryReport)
-async def get_mastery_report(student_id: str, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
+async def get_mastery_report(student_id: str, neo4j: Neo4jClient = Depends(get_neo4j_client), mastery_cache: MasteryCache = Depends(get_mastery_cache), events: EventPipeline = Depends(get_event_pipeline)) -> Dict[str, Any]:
     student = await neo4j.execute_query(queries.GET_STUDENT, {"student_id": student_id})
     if not student:
         raise HTTPException(status_code=404, detail=f"Student not found: {student_id}")
 
-    mastered = await neo4j.execute_query(queries.GET_STUDENT_MASTERY, {"student_id": student_id})
-    struggles = await neo4j.execute_query(queries.GET_STUDENT_STRUGGLES, {"student_id": student_id})
+    mastered = await mastery_cache.get_mastery_records(student_id)
+    struggles = events.merge_struggles(
+        student_id,
+        await neo4j.execute_query(queries.GET_STUDENT_STRUGGLES, {"student_id": student_id})
+    )
 
     domain_progress = {}
     for record in mastered:
@@ -240,54 +248,86 @@ async def get_mastery_report(student_id: str, neo4j: Neo4jClient = Depends(get_n
 
 
 @router.get("/history/{student_id}")
-async def get_assessment_history(student_id: str, limit: int = 10, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
-    student_assessments = [
-        {
-            "assessment_id": aid,
-            "concept_id": a["concept_id"],
-            "assessment_type": a["assessment_type"],
-            "score": a.get("score"),
-            "mastery_level": a.get("mastery_level"),
-            "created_at": a["created_at"],
-            "status": a["status"]
-        }
-        for aid, a in active_assessments.items()
-        if a["student_id"] == student_id
-    ]
-
-    student_assessments.sort(key=lambda x: x["created_at"], reverse=True)
+async def get_assessment_history(student_id: str, limit: int = 10, store: AssessmentStore = Depends(get_assessment_store)) -> Dict[str, Any]:
+    student_assessments, total_count = await store.history(student_id, limit)
 
     return {
         "student_id": student_id,
-        "assessments": student_assessments[:limit],
-        "total_count": len(student_assessments)
+        "assessments": student_assessments,
+        "total_count": total_count
     }
 
 
 @router.get("/analytics/difficulty-stats")
-async def get_difficulty_stats(neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
-    result = await neo4j.execute_query(queries.GET_CONCEPT_DIFFICULTY_STATS)
+async def get_difficulty_stats(offset: int = 0, limit: int = 50, neo4j: Neo4jClient = Depends(get_neo4j_client), view: ConceptStatsView = Depends(get_concept_stats_view), stream_stats: Optional[StreamStatsReader] = Depends(get_stream_stats)) -> Dict[str, Any]:
+    offset, limit = max(offset, 0), min(max(limit, 1), 200)
+
+    # With the streaming job running, stats come from its window aggregates
+    # over the recent horizon instead of a scan of every MASTERS edge.
+    if stream_stats is not None:
+        snapshot = await asyncio.to_thread(stream_stats.concept_stats)
+        if snapshot["stats"]:
+            return {
+                "difficulty_stats": snapshot["stats"][offset:offset + limit],
+                "total_concepts_analyzed": len(snapshot["stats"]),
+                "offset": offset,
+                "limit": limit,
+                "freshness": {"source": "stream", "as_of": snapshot["as_of"]}
+            }
+
+    page = await view.difficulty_page(offset, limit)
+    if page is not None:
+        rows, total, freshness = page["rows"], page["total"], view_freshness(page["state"])
+    else:
+        # The view has not been built yet (first start); answer from the graph once.
+        result = await neo4j.execute_query(queries.GET_CONCEPT_DIFFICULTY_STATS)
+        rows, total = result[offset:offset + limit], len(result)
+        freshness = {"source": "graph", "as_of": datetime.utcnow().isoformat()}
 
     stats = [{
         "concept_id": r['concept_id'],
         "concept_name": r['concept_name'],
         "avg_mastery": round(r['avg_mastery'], 3) if r['avg_mastery'] else 0,
         "student_count": r['student_count'],
-        "difficulty_score": round(r['difficulty_score'], 3) if r['difficulty_score'] else 0
-    } for r in result]
+        "difficulty_score": round(r['difficulty_score'], 3) if r['difficulty_score'] else 0,
+        # Only the stream counts individual assessments and struggles.
+        "assessments": None,
+        "success_rate": None,
+        "struggle_count": None
+    } for r in rows]
 
-    return {"difficulty_stats": stats, "total_concepts_analyzed": len(stats)}
+    return {
+        "difficulty_stats": stats,
+        "total_concepts_analyzed": total,
+        "offset": offset,
+        "limit": limit,
+        "freshness": freshness
+    }
 
 
 @router.get("/analytics/struggle-patterns")
-async def get_struggle_patterns(neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
-    result = await neo4j.execute_query(queries.GET_COMMON_STRUGGLE_PATTERNS)
+async def get_struggle_patterns(offset: int = 0, limit: int = 20, neo4j: Neo4jClient = Depends(get_neo4j_client), view: ConceptStatsView = Depends(get_concept_stats_view)) -> Dict[str, Any]:
+    offset, limit = max(offset, 0), min(max(limit, 1), 200)
+
+    page = await view.struggle_page(offset, limit)
+    if page is not None:
+        rows, total, freshness = page["rows"], page["total"], view_freshness(page["state"])
+    else:
+        result = await neo4j.execute_query(queries.GET_COMMON_STRUGGLE_PATTERNS)
+        rows, total = result[offset:offset + limit], len(result)
+        freshness = {"source": "graph", "as_of": datetime.utcnow().isoformat()}
 
     patterns = [{
         "concept_id": r['concept_id'],
         "concept_name": r['concept_name'],
         "struggle_count": r['struggle_count'],
-        "error_patterns": r['all_patterns'][:5] if r['all_patterns'] else []
-    } for r in result]
+        "error_patterns": r['all_patterns'][:settings.VIEW_TOP_PATTERNS] if r['all_patterns'] else []
+    } for r in rows]
 
-    return {"struggle_patterns": patterns, "total_patterns": len(patterns)}
+    return {
+        "struggle_patterns": patterns,
+        "total_patterns": total,
+        "offset": offset,
+        "limit": limit,
+        "freshness": freshness
+    }
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
+from app.kag.concept_identity import ConceptIdConflict, concept_id, upsert_concept
 
 router = APIRouter()
 
@@ -13,21 +14,18 @@ class KnowledgeIngestRequest(BaseModel):
 
 @router.post("/ingest")
 async def ingest_knowledge(request: KnowledgeIngestRequest, neo4j: Neo4jClient = Depends(get_neo4j_client)):
-    query = """
-    CREATE (c:Concept {
-        id: $id,
-        name: $name,
-        description: $description,
-        domain: $domain
-    })
-    RETURN c
-    """
+    try:
+        stored_id = await upsert_concept(
+            neo4j,
+            concept_id(request.title),
+            request.title,
+            description=request.content,
+            domain=request.domain,
+            # The id is derived from the title, so a concept already holding
+            # it is a different concept, not this one under an old name.
+            rename=False
+        )
+    except ConceptIdConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-    await neo4j.execute_query(query, {
-        "id": request.title.lower().replace(" ", "_"),
-        "name": request.title,
-        "description": request.content,
-        "domain": request.domain
-    })
-
-    return {"status": "Concept ingested successfully"}
+    return {"status": "Concept ingested successfully", "id": stored_id}
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Literal
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
+from app.kag.concept_identity import ConceptIdConflict, upsert_concept
 
 router = APIRouter(prefix="/api/v1/knowledge", tags=["Knowledge"])
 
@@ -14,25 +15,30 @@ class ConceptCreate(BaseModel):
 class RelationCreate(BaseModel):
     source_id: str
     target_id: str
-    relation: str = "PREREQUISITE_OF"
+    relation: Literal["REQUIRES", "PREREQUISITE_OF"] = "PREREQUISITE_OF"
 
 @router.post("/concept")
 async def create_concept(data: ConceptCreate, neo4j: Neo4jClient = Depends(get_neo4j_client)):
-    query = """
-    MERGE (c:Concept {id:$id})
-    SET c.name=$name,
-        c.domain=$domain,
-        c.description=$description
-    """
-    await neo4j.execute_query(query, data.dict())
-    return {"status": "concept_added", "id": data.id}
+    try:
+        stored_id = await upsert_concept(
+            neo4j, data.id, data.name, description=data.description, domain=data.domain
+        )
+    except ConceptIdConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "concept_added", "id": stored_id}
 
 @router.post("/relation")
 async def create_relation(data: RelationCreate, neo4j: Neo4jClient = Depends(get_neo4j_client)):
-    query = f"""
-    MATCH (a:Concept {{id:$source_id}})
-    MATCH (b:Concept {{id:$target_id}})
-    MERGE (a)-[:{data.relation}]->(b)
+    # Prerequisites are stored as REQUIRES only; "a PREREQUISITE_OF b" is
+    # "b REQUIRES a".
+    params = {"source_id": data.source_id, "target_id": data.target_id}
+    if data.relation == "PREREQUISITE_OF":
+        params = {"source_id": data.target_id, "target_id": data.source_id}
+    query = """
+    MATCH (a:Concept {id:$source_id})
+    MATCH (b:Concept {id:$target_id})
+    MERGE (a)-[r:REQUIRES]->(b)
+    ON CREATE SET r.strength = 1.0, r.created_at = datetime()
     """
-    await neo4j.execute_query(query, data.dict())
+    await neo4j.execute_query(query, params)
     return {"status": "relation_created"}
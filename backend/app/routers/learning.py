@@ -3,13 +3,14 @@ from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 import logging
 
-from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
-from app.kag.traversal_engine import TraversalEngine, TraversalResult
-from app.kag.gap_analyzer import GapAnalyzer
-from app.kag.context_builder import ContextBuilder
-from app.kag.concept_resolver import ConceptResolver
-from app.kag.auto_ingest import AutoIngestor
+from app.kag.traversal_engine import TraversalResult
+from app.kag.services import KAGServices, get_kag_services
+from app.kag.ingest_queue import INGEST_INGESTED, INGEST_REJECTED, INGEST_FAILED, INGEST_BUSY
 from app.llm.groq_client import GroqClient, get_groq_client
+from app.core.metrics import (
+    stage, kag_responses,
+    STAGE_RESOLVE, STAGE_AUTO_INGEST, STAGE_TRAVERSE, STAGE_GAP_ANALYSIS, STAGE_CONTEXT_BUILD, STAGE_LLM
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -33,31 +34,79 @@ class LearningResponse(BaseModel):
     can_proceed: bool
     reasoning_path: List[str]
     llm_usage: Optional[Dict[str, int]]
+    ingest_status: Optional[str] = None
+
+
+INGEST_MESSAGES = {
+    INGEST_REJECTED: "This does not look like a concept in the knowledge graph. Please check the topic name.",
+    INGEST_FAILED: "Adding this concept to the knowledge graph failed. Please try again later.",
+    INGEST_BUSY: "Too many new concepts are being added right now. Please try again in a few minutes.",
+}
+PENDING_MESSAGE = "This concept is being added to the knowledge graph. Please ask again in a moment."
+
+INGEST_RESPONSE_TYPES = {
+    INGEST_REJECTED: "refuse",
+    INGEST_FAILED: "error",
+    INGEST_BUSY: "busy",
+}
+
+
+def _not_ready_response(request: LearningRequest, status: str) -> Dict[str, Any]:
+    response_type = INGEST_RESPONSE_TYPES.get(status, "pending")
+    kag_responses.inc(response_type=response_type)
+    return {
+        "student_id": request.student_id,
+        "query": request.query,
+        "response": INGEST_MESSAGES.get(status, PENDING_MESSAGE),
+        "response_type": response_type,
+        "target_concept": None,
+        "prerequisites": [],
+        "knowledge_gaps": [],
+        "readiness_score": 0.0,
+        "can_proceed": False,
+        "reasoning_path": ["Concept not found", f"Auto-ingestion {status}"],
+        "llm_usage": None,
+        "ingest_status": status
+    }
 
 
 @router.post("/ask", response_model=LearningResponse)
-async def kag_learning_interaction(request: LearningRequest, neo4j: Neo4jClient = Depends(get_neo4j_client), groq: GroqClient = Depends(get_groq_client)) -> Dict[str, Any]:
+async def kag_learning_interaction(request: LearningRequest, groq: GroqClient = Depends(get_groq_client), kag: KAGServices = Depends(get_kag_services)) -> Dict[str, Any]:
     logger.info("=== KAG PIPELINE START ===")
     logger.info(f"Student: {request.student_id}")
     logger.info(f"Query: {request.query}")
 
-    traversal_engine = TraversalEngine(neo4j)
-    gap_analyzer = GapAnalyzer(neo4j)
-    context_builder = ContextBuilder()
-    resolver = ConceptResolver(neo4j)
-    ingestor = AutoIngestor(neo4j, groq)
-
-    resolved_concept = await resolver.resolve(request.query)
+    with stage(STAGE_RESOLVE):
+        resolved_concept = await kag.resolver.resolve(request.query)
 
     if not resolved_concept:
-        logger.info("Concept not found → triggering Auto-Ingestion")
-        await ingestor.ingest_concept(request.query)
-        resolved_concept = request.query
+        logger.info("Concept not found → queueing Auto-Ingestion")
+        with stage(STAGE_AUTO_INGEST):
+            outcome = await kag.ingest_queue.request(request.query)
+        if outcome.status != INGEST_INGESTED:
+            return _not_ready_response(request, outcome.status)
+        resolved_concept = outcome.concept_id or outcome.concept_name
         logger.info(f"Concept '{request.query}' ingested dynamically")
 
-    traversal_context = await traversal_engine.traverse(resolved_concept, request.student_id)
+    with stage(STAGE_TRAVERSE):
+        traversal_context = await kag.traversal_engine.traverse(resolved_concept, request.student_id)
+
+    target = traversal_context.target_concept
+    if target is not None and target.expansion_pending:
+        # A prerequisite placeholder: it has a name but no description or
+        # prerequisites until it is expanded. If the expansion does not land
+        # in time it keeps running, and this answer uses the placeholder.
+        logger.info(f"Concept '{target.name}' awaits expansion → queueing Auto-Ingestion")
+        with stage(STAGE_AUTO_INGEST):
+            outcome = await kag.ingest_queue.request(target.name)
+        if outcome.status == INGEST_INGESTED:
+            with stage(STAGE_TRAVERSE):
+                traversal_context = await kag.traversal_engine.traverse(
+                    outcome.concept_id or target.id, request.student_id
+                )
 
     if traversal_context.result == TraversalResult.CONCEPT_NOT_FOUND:
+        kag_responses.inc(response_type="refuse")
         return {
             "student_id": request.student_id,
             "query": request.query,
@@ -72,11 +121,15 @@ async def kag_learning_interaction(request: LearningRequest, neo4j: Neo4jClient
             "llm_usage": None
         }
 
-    gap_analysis = await gap_analyzer.analyze_gaps(traversal_context, request.student_id)
+    with stage(STAGE_GAP_ANALYSIS):
+        gap_analysis = await kag.gap_analyzer.analyze_gaps(traversal_context, request.student_id)
 
-    reasoning_context = context_builder.build_context(traversal_context, gap_analysis)
+    with stage(STAGE_CONTEXT_BUILD):
+        reasoning_context = kag.context_builder.build_context(traversal_context, gap_analysis)
 
-    llm_response = await groq.verbalize(reasoning_context, request.query)
+    with stage(STAGE_LLM):
+        llm_response = await groq.verbalize(reasoning_context, request.query)
+    kag_responses.inc(response_type=reasoning_context.response_type)
 
     target_concept = None
     if traversal_context.target_concept:
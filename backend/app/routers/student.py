@@ -5,6 +5,8 @@ from fastapi import Response
 
 from app.graph.neo4j_client import Neo4jClient, get_neo4j_client
 from app.graph.cypher_queries import queries
+from app.kag.mastery_cache import MasteryCache, get_mastery_cache
+from app.events.pipeline import EventPipeline, get_event_pipeline
 
 router = APIRouter()
 
@@ -142,14 +144,17 @@ async def update_student(student_id: str, update: StudentUpdate, neo4j: Neo4jCli
 
 
 @router.get("/{student_id}/knowledge-state", response_model=KnowledgeStateResponse)
-async def get_knowledge_state(student_id: str, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
+async def get_knowledge_state(student_id: str, neo4j: Neo4jClient = Depends(get_neo4j_client), mastery_cache: MasteryCache = Depends(get_mastery_cache), events: EventPipeline = Depends(get_event_pipeline)) -> Dict[str, Any]:
     student = await neo4j.execute_query(queries.GET_STUDENT, {"student_id": student_id})
 
     if not student:
         raise HTTPException(status_code=404, detail=f"Student not found: {student_id}")
 
-    mastered = await neo4j.execute_query(queries.GET_STUDENT_MASTERY, {"student_id": student_id})
-    struggles = await neo4j.execute_query(queries.GET_STUDENT_STRUGGLES, {"student_id": student_id})
+    mastered = await mastery_cache.get_mastery_records(student_id)
+    struggles = events.merge_struggles(
+        student_id,
+        await neo4j.execute_query(queries.GET_STUDENT_STRUGGLES, {"student_id": student_id})
+    )
 
     grade_level = student[0]['s']['grade_level']
     progress = await neo4j.execute_query(
@@ -181,7 +186,12 @@ async def get_knowledge_state(student_id: str, neo4j: Neo4jClient = Depends(get_
                 "concept_id": s['concept_id'],
                 "concept_name": s['concept_name'],
                 "struggle_count": s['struggle_count'],
-                "error_patterns": s['error_patterns']
+                "error_patterns": s['error_patterns'],
+                "pattern_buckets": sorted(
+                    s.get('pattern_buckets') or [],
+                    key=lambda b: b['count'] or 0,
+                    reverse=True
+                )
             }
             for s in struggles
         ],
@@ -191,24 +201,24 @@ async def get_knowledge_state(student_id: str, neo4j: Neo4jClient = Depends(get_
 
 
 @router.post("/{student_id}/mastery")
-async def update_mastery(student_id: str, mastery: MasteryUpdate, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
+async def update_mastery(student_id: str, mastery: MasteryUpdate, neo4j: Neo4jClient = Depends(get_neo4j_client), events: EventPipeline = Depends(get_event_pipeline)) -> Dict[str, Any]:
     concept = await neo4j.execute_query(queries.GET_CONCEPT_BY_ID, {"concept_id": mastery.concept_id})
 
     if not concept:
         raise HTTPException(status_code=404, detail=f"Concept not found: {mastery.concept_id}")
 
-    result = await neo4j.execute_query(
-        queries.UPDATE_MASTERY,
-        {
-            "student_id": student_id,
-            "concept_id": mastery.concept_id,
-            "mastery_level": mastery.mastery_level,
-            "confidence": mastery.confidence
-        }
-    )
+    # The event is applied later and silently skipped for an unknown student.
+    student = await neo4j.execute_query(queries.GET_STUDENT, {"student_id": student_id})
+    if not student:
+        raise HTTPException(status_code=404, detail=f"Student not found: {student_id}")
 
-    if not result:
-        raise HTTPException(status_code=500, detail="Failed to update mastery")
+    await events.record_mastery(
+        student_id,
+        mastery.concept_id,
+        mastery.mastery_level,
+        mastery.confidence,
+        concept[0]['c'].get('name')
+    )
 
     return {
         "status": "success",
@@ -220,18 +230,16 @@ async def update_mastery(student_id: str, mastery: MasteryUpdate, neo4j: Neo4jCl
 
 
 @router.post("/{student_id}/struggle")
-async def record_struggle(student_id: str, struggle: StruggleRecord, neo4j: Neo4jClient = Depends(get_neo4j_client)) -> Dict[str, Any]:
-    result = await neo4j.execute_query(
-        queries.RECORD_STRUGGLE,
-        {
-            "student_id": student_id,
-            "concept_id": struggle.concept_id,
-            "error_pattern": struggle.error_pattern
-        }
-    )
+async def record_struggle(student_id: str, struggle: StruggleRecord, neo4j: Neo4jClient = Depends(get_neo4j_client), events: EventPipeline = Depends(get_event_pipeline)) -> Dict[str, Any]:
+    concept = await neo4j.execute_query(queries.GET_CONCEPT_BY_ID, {"concept_id": struggle.concept_id})
+    if not concept:
+        raise HTTPException(status_code=404, detail=f"Concept not found: {struggle.concept_id}")
 
-    if not result:
-        raise HTTPException(status_code=500, detail="Failed to record struggle")
+    student = await neo4j.execute_query(queries.GET_STUDENT, {"student_id": student_id})
+    if not student:
+        raise HTTPException(status_code=404, detail=f"Student not found: {student_id}")
+
+    await events.record_struggles(student_id, struggle.concept_id, [struggle.error_pattern])
 
     return {
         "status": "success",
@@ -253,7 +261,7 @@ async def get_recommended_concepts(student_id: str, threshold: float = 0.7, neo4
             "concept_id": r['potential']['id'],
             "name": r['potential']['name'],
             "domain": r['potential'].get('domain'),
-            "difficulty": r['potential'].get('difficulty')
+            "difficulty": r['potential'].get('difficulty_calibrated', r['potential'].get('difficulty'))
         }
         for r in result
     ]
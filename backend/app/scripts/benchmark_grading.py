@@ -0,0 +1,85 @@
+import asyncio
+import random
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.assessment.grading import GradingEngine
+
+
+SCORING_TYPES = ["exact", "numeric", "multi_select", "partial_credit"]
+
+
+def make_submission(num_questions: int):
+    questions = []
+    answers = []
+    for i in range(num_questions):
+        scoring = SCORING_TYPES[i % len(SCORING_TYPES)]
+        if scoring == "exact":
+            correct = random.choice("abcd")
+            response = random.choice("abcd")
+        elif scoring == "numeric":
+            correct = round(random.uniform(0, 100), 2)
+            response = correct + random.choice([0, 0.5])
+        else:
+            correct = random.sample("abcdef", 3)
+            response = random.sample("abcdef", 3)
+        questions.append({
+            "id": f"q{i}",
+            "text": f"Question {i}",
+            "scoring": scoring,
+            "correct_answer": correct,
+            "tolerance": 0.01
+        })
+        answers.append({"question_id": f"q{i}", "response": response})
+    random.shuffle(answers)
+    return questions, answers
+
+
+def time_single(engine: GradingEngine, num_questions: int, repeats: int = 200) -> float:
+    questions, answers = make_submission(num_questions)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        engine.grade(questions, answers)
+    return (time.perf_counter() - start) / repeats
+
+
+async def time_batch(engine: GradingEngine, submissions) -> float:
+    start = time.perf_counter()
+    await engine.grade_batch(submissions)
+    return time.perf_counter() - start
+
+
+async def main():
+    random.seed(7)
+    engine = GradingEngine()
+
+    print("=" * 60)
+    print("Grading micro-benchmark")
+    print("=" * 60)
+
+    print("\nSingle submission (exam size scaling):")
+    print(f"  {'questions':>10} {'ms/submit':>12} {'us/question':>12}")
+    for size in [25, 50, 100, 200, 400, 800]:
+        elapsed = time_single(engine, size)
+        print(f"  {size:>10} {elapsed * 1000:>12.3f} {elapsed / size * 1e6:>12.2f}")
+
+    print(f"\nBatch grading (200-question exams, {engine.max_workers} worker processes):")
+    print(f"  {'submissions':>12} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for batch_size in [256, 1024, 4096]:
+        submissions = [make_submission(200) for _ in range(batch_size)]
+
+        start = time.perf_counter()
+        engine.grade_many(submissions)
+        serial = time.perf_counter() - start
+
+        parallel = await time_batch(engine, submissions)
+        print(f"  {batch_size:>12} {serial:>10.3f} {parallel:>11.3f} {serial / parallel:>8.2f}")
+
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
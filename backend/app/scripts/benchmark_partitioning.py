@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.analytics.graph_partitioning import GraphPartitioner
+
+
+def make_curriculum(num_domains: int, concepts_per_domain: int, cross_links: int, seed: int = 1):
+    # Each domain is a prerequisite DAG where concepts build on recent ones,
+    # plus a few cross-domain links; grade level follows position in the domain.
+    rng = np.random.default_rng(seed)
+    node_ids, grades, sources, targets = [], [], [], []
+    for d in range(num_domains):
+        base = d * concepts_per_domain
+        for j in range(concepts_per_domain):
+            node_ids.append(f"c{base + j}")
+            grades.append(1 + j * 12 // concepts_per_domain)
+            for _ in range(2 if j else 0):
+                p = int(rng.integers(max(0, j - 20), j))
+                sources.append(f"c{base + j}")
+                targets.append(f"c{base + p}")
+    total = len(node_ids)
+    for _ in range(cross_links):
+        a, b = rng.integers(0, total, 2)
+        sources.append(f"c{a}")
+        targets.append(f"c{b}")
+    return node_ids, grades, sources, targets
+
+
+def grade_modulo_cut(node_ids, grades, sources, targets, k: int) -> float:
+    partition = {node_id: grade % k for node_id, grade in zip(node_ids, grades)}
+    return sum(partition[s] != partition[t] for s, t in zip(sources, targets)) / len(sources)
+
+
+def main():
+    print("=" * 60)
+    print("Knowledge graph partitioning benchmark")
+    print("=" * 60)
+
+    print(f"\n  {'concepts':>9} {'k':>4} {'grade%k cut':>12} {'cut':>8} {'imbalance':>10} {'seconds':>8}")
+    for num_domains, per_domain in [(20, 100), (40, 250), (80, 500)]:
+        node_ids, grades, sources, targets = make_curriculum(num_domains, per_domain, num_domains * 12)
+        for k in [4, 8, 16]:
+            start = time.perf_counter()
+            result = GraphPartitioner(k).partition(node_ids, sources, targets)
+            elapsed = time.perf_counter() - start
+
+            baseline = grade_modulo_cut(node_ids, grades, sources, targets, k)
+            print(
+                f"  {len(node_ids):>9} {k:>4} {baseline:>12.3f} {result.cut_ratio:>8.3f} "
+                f"{result.imbalance:>10.3f} {elapsed:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
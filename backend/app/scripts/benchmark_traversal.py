@@ -0,0 +1,134 @@
+import asyncio
+import random
+import statistics
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.traversal_queries import TraversalQueries, TRAVERSAL_STRATEGIES
+
+
+PREFIX = "bench_traversal_"
+REPEATS = 20
+
+CREATE_NODES = """
+UNWIND $ids AS id
+MERGE (c:Concept:BenchConcept {id: id})
+SET c.name = id, c.normalized_name = id, c.difficulty = 0.5
+"""
+
+CREATE_EDGES = """
+UNWIND $edges AS edge
+MATCH (a:Concept {id: edge[0]})
+MATCH (b:Concept {id: edge[1]})
+MERGE (a)-[:REQUIRES]->(b)
+"""
+
+DELETE_BATCH = """
+MATCH (c:BenchConcept)
+WITH c LIMIT 5000
+DETACH DELETE c
+RETURN count(*) AS deleted
+"""
+
+
+def deep_curriculum(levels: int, width: int, seed: int = 1):
+    # A long chain of narrow levels; each concept requires two concepts from
+    # the level below and one a few levels further down, so the number of
+    # distinct paths grows exponentially with depth.
+    rng = random.Random(seed)
+    ids = [[f"{PREFIX}d{level}_{i}" for i in range(width)] for level in range(levels)]
+    edges = []
+    for level in range(1, levels):
+        for node in ids[level]:
+            for target in rng.sample(ids[level - 1], 2):
+                edges.append((node, target))
+            if level > 3:
+                edges.append((node, rng.choice(ids[level - rng.randint(2, 4)])))
+    return ids[-1][0], [i for row in ids for i in row], edges
+
+
+def wide_curriculum(fanout: int, leaves: int, seed: int = 2):
+    # A shallow, very wide graph: the root requires many concepts that share
+    # a large pool of foundations.
+    rng = random.Random(seed)
+    root = f"{PREFIX}w_root"
+    middle = [f"{PREFIX}w_m{i}" for i in range(fanout)]
+    bottom = [f"{PREFIX}w_l{i}" for i in range(leaves)]
+    edges = [(root, m) for m in middle]
+    for m in middle:
+        edges.extend((m, leaf) for leaf in rng.sample(bottom, 10))
+    for leaf in bottom[: leaves // 2]:
+        edges.append((leaf, rng.choice(bottom[leaves // 2:])))
+    return root, [root] + middle + bottom, edges
+
+
+async def load(client: Neo4jClient, ids, edges) -> None:
+    for i in range(0, len(ids), 1000):
+        await client.execute_query(CREATE_NODES, {"ids": ids[i:i + 1000]})
+    for i in range(0, len(edges), 1000):
+        await client.execute_query(CREATE_EDGES, {"edges": [list(e) for e in edges[i:i + 1000]]})
+
+
+async def clear(client: Neo4jClient) -> None:
+    while True:
+        result = await client.execute_query(DELETE_BATCH)
+        if not result or not result[0]["deleted"]:
+            break
+
+
+async def time_strategy(client: Neo4jClient, strategy: str, root: str, depth: int):
+    query, params = TraversalQueries(strategy).prerequisites(root, depth)
+    rows = await client.execute_query(query, params)
+    # Strategies order ties differently, so results are compared as sorted ids.
+    ids = sorted(row["prereq"]["id"] for row in rows)
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await client.execute_query(query, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return ids, statistics.median(timings), max(timings)
+
+
+async def main():
+    print("=" * 60)
+    print("Prerequisite traversal benchmark")
+    print("=" * 60)
+
+    client = Neo4jClient()
+    try:
+        await client.connect()
+        await clear(client)
+        await client.create_constraint("Concept", "id")
+
+        for label, (root, ids, edges) in [
+            ("deep", deep_curriculum(levels=60, width=6)),
+            ("wide", wide_curriculum(fanout=400, leaves=4000)),
+        ]:
+            await load(client, ids, edges)
+            print(f"\n{label}: {len(ids)} concepts, {len(edges)} REQUIRES edges")
+            print(f"  {'depth':>5} {'strategy':>9} {'rows':>6} {'median ms':>10} {'max ms':>8}")
+            for depth in [2, 4, 8, 12, 16]:
+                results = {}
+                for strategy in TRAVERSAL_STRATEGIES:
+                    ids, median, worst = await time_strategy(client, strategy, root, depth)
+                    results[strategy] = ids
+                    print(f"  {depth:>5} {strategy:>9} {len(ids):>6} {median:>10.2f} {worst:>8.2f}")
+                baseline_strategy, baseline = next(iter(results.items()))
+                for strategy, ids in results.items():
+                    if ids != baseline:
+                        differing = sorted(set(ids) ^ set(baseline))
+                        print(
+                            f"  !! {strategy} and {baseline_strategy} disagree at depth {depth} "
+                            f"on {len(differing)} concepts, e.g. {differing[:5]}"
+                        )
+            await clear(client)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
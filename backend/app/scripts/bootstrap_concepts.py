@@ -0,0 +1,43 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.kag.auto_ingest import AutoIngestor
+from app.llm.groq_client import groq_client
+
+
+async def main():
+    if len(sys.argv) < 2:
+        print("Usage: bootstrap_concepts.py <file with one concept name per line>")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        names = [line.strip() for line in f if line.strip()]
+
+    print("=" * 60)
+    print(f"Bootstrapping {len(names)} concepts")
+    print("=" * 60)
+
+    client = Neo4jClient()
+    try:
+        await client.connect()
+        summary = await AutoIngestor(client, groq_client).ingest_concepts(names)
+        print(f"\nRequested:  {summary['requested']}")
+        print(f"Ingested:   {summary['ingested']}")
+        print(f"Rejected:   {summary['rejected']}")
+        print(f"Failed:     {summary['failed']}")
+        print(f"LLM calls:  {summary['llm_calls']}")
+        for name in summary["failed_concepts"]:
+            print(f"  - {name}")
+    except Exception as e:
+        print(f"\nBootstrap failed: {e}")
+        raise
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
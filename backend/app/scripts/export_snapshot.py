@@ -0,0 +1,31 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.analytics.snapshot_exporter import SnapshotExporter
+
+
+async def main():
+    snapshot_id = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("=" * 60)
+    print("Analytics snapshot export")
+    print("=" * 60)
+
+    client = Neo4jClient()
+    try:
+        await client.connect()
+        path = await SnapshotExporter(client).export(snapshot_id)
+        print(f"\nSnapshot written to {path}")
+    except Exception as e:
+        print(f"\nExport failed: {e}")
+        raise
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
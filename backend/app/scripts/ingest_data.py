@@ -6,15 +6,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from app.graph.neo4j_client import Neo4jClient
 from app.graph.cypher_queries import queries
+from app.graph.search import CONCEPT_SEARCH_INDEX, CONCEPT_SEARCH_PROPERTIES
 from app.data.curriculum_dataset import get_all_concepts, get_all_relationships
+from app.kag.concept_identity import normalize_concept_name
 
 
 async def create_constraints_and_indexes(client: Neo4jClient):
     print("Creating constraints and indexes...")
     await client.create_constraint("Concept", "id")
+    await client.create_constraint("Concept", "normalized_name")
     await client.create_index("Concept", "name")
     await client.create_index("Concept", "domain")
     await client.create_index("Concept", "grade_level")
+    await client.create_fulltext_index(CONCEPT_SEARCH_INDEX, "Concept", CONCEPT_SEARCH_PROPERTIES)
     await client.create_constraint("Student", "id")
     await client.create_constraint("Example", "id")
     await client.create_constraint("Formula", "id")
@@ -31,6 +35,7 @@ async def ingest_concepts(client: Neo4jClient):
                 {
                     "id": concept["id"],
                     "name": concept["name"],
+                    "normalized_name": normalize_concept_name(concept["name"]),
                     "description": concept.get("description", ""),
                     "domain": concept.get("domain", "General"),
                     "grade_level": concept.get("grade_level", 1),
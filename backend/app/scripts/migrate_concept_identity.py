@@ -0,0 +1,33 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.kag.concept_identity import ConceptIdentityMigration
+
+
+async def main():
+    print("=" * 60)
+    print("Concept identity migration")
+    print("=" * 60)
+
+    client = Neo4jClient()
+    try:
+        await client.connect()
+        summary = await ConceptIdentityMigration(client).run()
+        print(f"\nConcepts scanned:    {summary['concepts_scanned']}")
+        print(f"Duplicate groups:    {summary['duplicate_groups']}")
+        print(f"Nodes merged:        {summary['nodes_merged']}")
+        print(f"Identities updated:  {summary['identities_updated']}")
+        print(f"Edges converted:     {summary['edges_converted']}")
+    except Exception as e:
+        print(f"\nMigration failed: {e}")
+        raise
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.graph.cypher_queries import queries
+from app.assessment.store import create_assessment_store
+from app.assessment.knowledge_tracing import knowledge_tracer, response_records
+from app.events.event_log import new_event, REPLAY_SOURCE
+from app.events.pipeline import EventPipeline
+
+PUBLISH_BATCH = 10000
+QUERY_BATCH = 10000
+
+
+def load_cohort(path: str) -> set:
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+async def complete_history_pairs(client: Neo4jClient, assessments) -> set:
+    """Pairs whose every applied assessment is still in the store.
+
+    Completed assessments expire from the store, and a replay starts from
+    the prior, so replaying a pair with older history would overwrite the
+    mastery it earned with a lower estimate. A pair qualifies when the
+    graph has applied no more assessments to it than the store still holds.
+    """
+    stored = {}
+    for a in assessments:
+        key = (a["student_id"], a["concept_id"])
+        stored[key] = stored.get(key, 0) + 1
+
+    pairs = [{"student_id": s, "concept_id": c} for s, c in stored]
+    applied = {}
+    for i in range(0, len(pairs), QUERY_BATCH):
+        for record in await client.execute_query(
+            queries.GET_MASTERY_ASSESSMENT_COUNTS, {"pairs": pairs[i:i + QUERY_BATCH]}
+        ):
+            applied[(record["student_id"], record["concept_id"])] = record["assessment_count"]
+    return {key for key, count in stored.items() if applied.get(key, 0) <= count}
+
+
+async def main():
+    cohort = None
+    if "--students" in sys.argv:
+        cohort = load_cohort(sys.argv[sys.argv.index("--students") + 1])
+    dry_run = "--dry-run" in sys.argv
+
+    print("=" * 60)
+    print("Mastery replay")
+    print("=" * 60)
+
+    store = create_assessment_store()
+    client = Neo4jClient()
+    pipeline = None
+    try:
+        assessments = await store.completed()
+        if cohort is not None:
+            assessments = [a for a in assessments if a["student_id"] in cohort]
+        print(f"\nAssessments:      {len(assessments)}")
+
+        await client.connect()
+        complete = await complete_history_pairs(client, assessments)
+        replayable = [a for a in assessments if (a["student_id"], a["concept_id"]) in complete]
+        print(f"Skipped:          {len(assessments) - len(replayable)} assessments on pairs with expired history")
+        records = response_records(replayable)
+        print(f"Responses:        {len(records)}")
+
+        started = time.perf_counter()
+        estimates = knowledge_tracer.replay_records(records)
+        print(f"Mastery pairs:    {len(estimates)} ({time.perf_counter() - started:.2f}s)")
+        if dry_run or not estimates:
+            return
+
+        # Written through the event log, so the replayed values are ordered
+        # against live submissions like any other mastery update.
+        pipeline = EventPipeline(client)
+        await pipeline.start()
+        for i in range(0, len(estimates), PUBLISH_BATCH):
+            await pipeline.publish([
+                new_event(
+                    "mastery", e["student_id"], e["concept_id"],
+                    mastery_level=e["mastery_level"],
+                    confidence=e["confidence"],
+                    source=REPLAY_SOURCE
+                )
+                for e in estimates[i:i + PUBLISH_BATCH]
+            ])
+        print(f"Published:        {len(estimates)} mastery events")
+    except Exception as e:
+        print(f"\nReplay failed: {e}")
+        raise
+    finally:
+        if pipeline is not None:
+            await pipeline.stop()
+        await client.close()
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
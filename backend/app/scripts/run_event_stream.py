@@ -0,0 +1,40 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pyspark.sql import SparkSession
+
+from app.analytics.streaming import start_concept_stats_stream
+from app.core.config import settings
+
+
+def main():
+    print("=" * 60)
+    print("Event stream analytics")
+    print("=" * 60)
+
+    spark = (
+        SparkSession.builder
+        .appName(f"{settings.SPARK_APP_NAME}-stream")
+        .master(settings.SPARK_MASTER)
+        .config("spark.driver.memory", settings.SPARK_DRIVER_MEMORY)
+        # Event timestamps are naive UTC; the state store's partition count
+        # is fixed by the first checkpoint, so keep it small for this volume.
+        .config("spark.sql.session.timeZone", "UTC")
+        .config("spark.sql.shuffle.partitions", "8")
+        .getOrCreate()
+    )
+    try:
+        query = start_concept_stats_stream(spark)
+        print(f"\nReading events from {settings.EVENT_LOG_ARCHIVE_DIR}")
+        print(f"Writing window stats to {settings.STREAM_OUTPUT_DIR}")
+        query.awaitTermination()
+    except KeyboardInterrupt:
+        print("\nStopping stream")
+    finally:
+        spark.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.graph.neo4j_client import Neo4jClient
+from app.analytics.sequence_feedback import SequenceFeedbackPipeline
+from app.analytics.job_service import AnalyticsJobService
+
+
+async def main():
+    force = "--force" in sys.argv
+
+    print("=" * 60)
+    print("Learning sequence feedback")
+    print("=" * 60)
+
+    client = Neo4jClient()
+    jobs = AnalyticsJobService()
+    try:
+        await client.connect()
+        await jobs.start()
+        pipeline = SequenceFeedbackPipeline(client, jobs)
+        state = await (pipeline.run() if force else pipeline.run_if_due())
+        if state is None:
+            print("\nSequence feedback is not due yet (use --force to run anyway).")
+            return
+        print(f"\nSnapshot:         {state['snapshot_id']}")
+        print(f"Job output:       {state['output_path']}")
+        print(f"Edges updated:    {state['edges_updated']}")
+        print(f"Order hints set:  {state['concepts_updated']}")
+    except Exception as e:
+        print(f"\nSequence feedback failed: {e}")
+        raise
+    finally:
+        await jobs.stop()
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())